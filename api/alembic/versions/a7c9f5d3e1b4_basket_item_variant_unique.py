@@ -0,0 +1,73 @@
+"""Basket item unique product variant index
+
+Revision ID: a7c9f5d3e1b4
+Revises: f6b8e4c2d0a3
+Create Date: 2026-10-17 20:03:26.184952
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c9f5d3e1b4"
+down_revision: Union[str, None] = "f6b8e4c2d0a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+KEY_COLUMNS = [
+    "basket_id",
+    "product_id",
+    "color_id",
+    "size_id",
+    "covering_id",
+    "glass_color_id",
+    "material",
+    "type_of_platband",
+    "orientation",
+    "with_glass",
+]
+
+
+def upgrade() -> None:
+    # Merge existing duplicates into the oldest row of each variant.
+    # GROUP BY and IS NOT DISTINCT FROM treat NULLs as equal, like
+    # the NULLS NOT DISTINCT index below
+    key = ", ".join(KEY_COLUMNS)
+    newer_key = ", ".join(f"newer.{column}" for column in KEY_COLUMNS)
+    older_key = ", ".join(f"older.{column}" for column in KEY_COLUMNS)
+    op.execute(
+        f"""
+        UPDATE basket_item
+        SET quantity = dup.quantity
+        FROM (
+            SELECT min(id) AS id, sum(quantity) AS quantity
+            FROM basket_item
+            GROUP BY {key}
+            HAVING count(*) > 1
+        ) AS dup
+        WHERE basket_item.id = dup.id
+        """
+    )
+    op.execute(
+        f"""
+        DELETE FROM basket_item AS newer
+        USING basket_item AS older
+        WHERE newer.id > older.id
+        AND ({newer_key}) IS NOT DISTINCT FROM ({older_key})
+        """
+    )
+    op.create_index(
+        "uq_basket_item_variant",
+        "basket_item",
+        KEY_COLUMNS,
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_basket_item_variant", table_name="basket_item")
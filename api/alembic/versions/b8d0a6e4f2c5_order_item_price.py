@@ -0,0 +1,40 @@
+"""Order item price snapshot
+
+Revision ID: b8d0a6e4f2c5
+Revises: a7c9f5d3e1b4
+Create Date: 2026-10-17 21:15:42.630518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d0a6e4f2c5"
+down_revision: Union[str, None] = "a7c9f5d3e1b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "order_item",
+        sa.Column("price", sa.Integer(), nullable=True),
+    )
+    # Past orders get the current prices, the best known
+    op.execute(
+        """
+        UPDATE order_item
+        SET price = product.price
+        FROM product
+        WHERE product.id = order_item.product_id
+        """
+    )
+    op.alter_column("order_item", "price", nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column("order_item", "price")
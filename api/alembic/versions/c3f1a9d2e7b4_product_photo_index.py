@@ -0,0 +1,92 @@
+"""Product main photo and photo index columns
+
+Revision ID: c3f1a9d2e7b4
+Revises: b5e3ecea04e4
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src.product.enums import (
+    ProductPhotoDepEnum,
+    ProductOrientationEnum,
+    ProductTypeOfPlatbandEnum,
+)
+from src.product.utils import build_product_photo_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f1a9d2e7b4"
+down_revision: Union[str, None] = "b5e3ecea04e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Postgres enums store the member names
+_enum_columns = {
+    "dependency": ProductPhotoDepEnum,
+    "orientation": ProductOrientationEnum,
+    "type_of_platband": ProductTypeOfPlatbandEnum,
+}
+
+product = sa.table(
+    "product",
+    sa.column("id", sa.Integer),
+    sa.column("main_photo", sa.String),
+    sa.column("photo_index", postgresql.JSONB),
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "product", sa.Column("main_photo", sa.String(), nullable=True)
+    )
+    op.add_column(
+        "product",
+        sa.Column(
+            "photo_index",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+
+    # Build the index for existing products
+    photos_by_product = defaultdict(list)
+    rows = op.get_bind().execute(
+        sa.text(
+            "SELECT id, product_id, photo, is_main, dependency, color_id, "
+            "size_id, orientation, with_glass, type_of_platband "
+            "FROM product_photo"
+        )
+    )
+    for row in rows.mappings():
+        photo = dict(row)
+        for column, enum in _enum_columns.items():
+            if photo[column] is not None:
+                photo[column] = enum[photo[column]]
+        photos_by_product[photo["product_id"]].append(
+            SimpleNamespace(**photo)
+        )
+    for product_id, photos in photos_by_product.items():
+        photo_index = build_product_photo_index(photos)
+        main = photo_index["main"]
+        op.execute(
+            product.update()
+            .where(product.c.id == product_id)
+            .values(
+                photo_index=photo_index,
+                main_photo=main["photo"] if main else None,
+            )
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("product", "photo_index")
+    op.drop_column("product", "main_photo")
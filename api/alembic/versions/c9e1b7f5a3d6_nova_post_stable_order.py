@@ -0,0 +1,75 @@
+"""Nova Post mirror ordered by stable keys instead of upstream position
+
+Revision ID: c9e1b7f5a3d6
+Revises: b8d0a6e4f2c5
+Create Date: 2026-10-18 10:21:37.904215
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e1b7f5a3d6"
+down_revision: Union[str, None] = "b8d0a6e4f2c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ["nova_post_area", "nova_post_city", "nova_post_warehouse"]
+
+
+def upgrade() -> None:
+    op.drop_index(
+        "ix_nova_post_warehouse_city_ref_position",
+        table_name="nova_post_warehouse",
+    )
+    op.drop_index(
+        "ix_nova_post_city_area_ref_position", table_name="nova_post_city"
+    )
+    for table in TABLES:
+        op.drop_column(table, "position")
+    op.create_index(
+        "ix_nova_post_city_area_ref_description",
+        "nova_post_city",
+        ["area_ref", "description"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_nova_post_warehouse_city_ref_number",
+        "nova_post_warehouse",
+        ["city_ref", "number"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_nova_post_warehouse_city_ref_number",
+        table_name="nova_post_warehouse",
+    )
+    op.drop_index(
+        "ix_nova_post_city_area_ref_description", table_name="nova_post_city"
+    )
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "position", sa.Integer(), nullable=False, server_default="0"
+            ),
+        )
+    op.create_index(
+        "ix_nova_post_city_area_ref_position",
+        "nova_post_city",
+        ["area_ref", "position"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_nova_post_warehouse_city_ref_position",
+        "nova_post_warehouse",
+        ["city_ref", "position"],
+        unique=False,
+    )
@@ -0,0 +1,95 @@
+"""Nova Post reference data mirror tables
+
+Revision ID: d4e2b8c1f3a5
+Revises: c3f1a9d2e7b4
+Create Date: 2026-10-17 14:03:27.540196
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4e2b8c1f3a5"
+down_revision: Union[str, None] = "c3f1a9d2e7b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _mirror_columns() -> list[sa.Column]:
+    return [
+        sa.Column("ref", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("checksum", sa.String(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "nova_post_area",
+        *_mirror_columns(),
+        sa.PrimaryKeyConstraint("ref"),
+    )
+    op.create_table(
+        "nova_post_city",
+        *_mirror_columns(),
+        sa.Column("area_ref", sa.String(), nullable=False),
+        sa.Column("city_id", sa.String(), nullable=False),
+        sa.Column("settlement_type", sa.String(), nullable=False),
+        sa.Column("settlement_type_description", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("ref"),
+    )
+    op.create_index(
+        "ix_nova_post_city_area_ref_position",
+        "nova_post_city",
+        ["area_ref", "position"],
+        unique=False,
+    )
+    op.create_table(
+        "nova_post_warehouse",
+        *_mirror_columns(),
+        sa.Column("city_ref", sa.String(), nullable=False),
+        sa.Column("short_address", sa.String(), nullable=False),
+        sa.Column("type_of_warehouse", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=False),
+        sa.Column("number", sa.String(), nullable=False),
+        sa.Column("total_max_weight_allowed", sa.String(), nullable=False),
+        sa.Column("place_max_weight_allowed", sa.String(), nullable=False),
+        sa.Column(
+            "reception",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column("city_description", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("ref"),
+    )
+    op.create_index(
+        "ix_nova_post_warehouse_city_ref_position",
+        "nova_post_warehouse",
+        ["city_ref", "position"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_nova_post_warehouse_city_ref_position",
+        table_name="nova_post_warehouse",
+    )
+    op.drop_table("nova_post_warehouse")
+    op.drop_index(
+        "ix_nova_post_city_area_ref_position", table_name="nova_post_city"
+    )
+    op.drop_table("nova_post_city")
+    op.drop_table("nova_post_area")
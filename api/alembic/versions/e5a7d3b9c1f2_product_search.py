@@ -0,0 +1,66 @@
+"""Product full-text search vector and trigram indexes
+
+Revision ID: e5a7d3b9c1f2
+Revises: d4e2b8c1f3a5
+Create Date: 2026-10-17 16:41:09.327415
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src.product.utils import PRODUCT_SEARCH_VECTOR_SQL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a7d3b9c1f2"
+down_revision: Union[str, None] = "d4e2b8c1f3a5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Generated columns are filled for existing rows by Postgres
+    op.add_column(
+        "product",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(PRODUCT_SEARCH_VECTOR_SQL, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_product_search_vector",
+        "product",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_product_name_trgm",
+        "product",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_product_sku_trgm",
+        "product",
+        ["sku"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"sku": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_sku_trgm", table_name="product")
+    op.drop_index("ix_product_name_trgm", table_name="product")
+    op.drop_index("ix_product_search_vector", table_name="product")
+    op.drop_column("product", "search_vector")
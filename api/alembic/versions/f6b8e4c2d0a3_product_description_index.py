@@ -0,0 +1,33 @@
+"""Product description containment index
+
+Revision ID: f6b8e4c2d0a3
+Revises: e5a7d3b9c1f2
+Create Date: 2026-10-17 18:12:47.501936
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f6b8e4c2d0a3"
+down_revision: Union[str, None] = "e5a7d3b9c1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_product_description_path_ops",
+        "product",
+        ["description"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"description": "jsonb_path_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_description_path_ops", table_name="product")
@@ -1,27 +1,277 @@
 import hashlib
 import asyncio
 import functools
-import pickle
-from typing import Any, Optional, Callable
+import inspect
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import (
+    Any,
+    Awaitable,
+    Optional,
+    Callable,
+    Iterable,
+    get_type_hints,
+)
 
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from .config import settings
+from .codecs import CacheSerializer, CacheCodecException, get_cache_serializer
+
+
+log = logging.getLogger(__name__)
+
+
+_MISSING = object()
+_PROCESS_ID = uuid.uuid4().hex
+INVALIDATION_CHANNEL = "cache:invalidate"
+_LOCK_POLL_INTERVAL = 0.05
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class _TagArguments(dict):
+    def __getitem__(self, key: str) -> Any:
+        return super().__getitem__(key)()
+
+
+@dataclass
+class CacheStats:
+    local_hits: int = 0
+    local_misses: int = 0
+    redis_hits: int = 0
+    redis_misses: int = 0
+    stale_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: Optional[float] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.fresh_until is None or time.time() < self.fresh_until
+
+
+class LocalCache:
+    """
+    Per-process LRU cache with a TTL for every entry.
+    Sits in front of Redis, so hot keys don't need a network round-trip.
+    Entries can be tagged and dropped by tag.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._key_tags: dict[str, frozenset[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, stats: CacheStats) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            stats.local_misses += 1
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            stats.expirations += 1
+            stats.local_misses += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        stats.local_hits += 1
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        expire: int,
+        stats: CacheStats,
+        tags: Iterable[str] = (),
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        self._data[key] = (time.monotonic() + expire, value)
+        self._data.move_to_end(key)
+        if tags:
+            self._key_tags[key] = frozenset(tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.max_size:
+            self.delete(next(iter(self._data)))
+            stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        keys = set()
+        for tag in tags:
+            keys.update(self._tags.get(tag, ()))
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._tags.clear()
+        self._key_tags.clear()
 
 
 class RedisCaching:
     _redis_instance: Optional[Redis] = None
+    _local_cache: Optional[LocalCache] = None
+    _serializer: Optional[CacheSerializer] = None
+    _inflight: dict[str, asyncio.Future] = {}
+    # Other in-process caches dropped by the same tags
+    _tagged_local_caches: list[LocalCache] = []
+    stats: CacheStats = CacheStats()
 
     def __init__(self) -> None:
-        if not RedisCaching._redis_instance:
-            RedisCaching._redis_instance = Redis.from_url(settings.cache.redis_url)
+        RedisCaching.init()
         self.redis = RedisCaching._redis_instance
+        self.local = RedisCaching._local_cache
+        self.serializer = RedisCaching._serializer
 
     @classmethod
     def init(cls):
-        """Initialize Redis client"""
-        if not cls._redis_instance:
+        """Initialize Redis client and the in-process tier"""
+        if cls._redis_instance is None and settings.cache.use_redis:
             cls._redis_instance = Redis.from_url(settings.cache.redis_url)
+        if cls._local_cache is None:
+            cls._local_cache = LocalCache(settings.cache.local_max_size)
+        if cls._serializer is None:
+            cls._serializer = get_cache_serializer()
+
+    @classmethod
+    def register_local_cache(cls, local_cache: LocalCache) -> None:
+        """
+        Invalidate entries of a cache kept outside the cache decorator
+        with the tags of `invalidate_tags`, also those sent by other
+        workers
+        """
+        cls._tagged_local_caches.append(local_cache)
+
+    def _invalidate_local_tags(self, tags: Iterable[str]) -> int:
+        for local_cache in self._tagged_local_caches:
+            local_cache.invalidate_tags(tags)
+        return self.local.invalidate_tags(tags)
+
+    def clear_local(self) -> None:
+        for local_cache in self._tagged_local_caches:
+            local_cache.clear()
+        self.local.clear()
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        return {
+            **cls.stats.as_dict(),
+            "local_size": len(cls._local_cache or ()),
+            "local_max_size": settings.cache.local_max_size,
+        }
+
+    @classmethod
+    def _key_part(cls, value: Any) -> Any:
+        """Convert an argument into a JSON-serializable, stable value"""
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, BaseModel):
+            return value.model_dump(mode="json")
+        if isinstance(value, dict):
+            return {
+                str(key): cls._key_part(item) for key, item in value.items()
+            }
+        if isinstance(value, (set, frozenset)):
+            return sorted((cls._key_part(item) for item in value), key=repr)
+        if isinstance(value, (list, tuple)):
+            return [cls._key_part(item) for item in value]
+        if hasattr(value, "__dict__"):
+            return {
+                key: cls._key_part(item)
+                for key, item in vars(value).items()
+                if not key.startswith("_")
+            }
+        return repr(value)
+
+    @staticmethod
+    def _bind_arguments(func: Callable, args: tuple, kwargs: dict) -> dict:
+        try:
+            bound = inspect.signature(func).bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            return dict(bound.arguments)
+        except (TypeError, ValueError):
+            return {"args": args, "kwargs": kwargs}
+
+    @classmethod
+    def format_tags(
+        cls,
+        func: Callable,
+        tags: Iterable[str],
+        args: tuple,
+        kwargs: dict,
+    ) -> list[str]:
+        """Fill tag templates like "product:{product_id}" from the call"""
+        if not tags:
+            return []
+        arguments = cls._bind_arguments(func, args, kwargs)
+        # Convert only the arguments the templates actually use
+        values = _TagArguments(
+            (name, functools.partial(cls._key_part, value))
+            for name, value in arguments.items()
+        )
+        return [tag.format_map(values) for tag in tags]
+
+    @classmethod
+    def get_args_digest(
+        cls,
+        func: Callable,
+        args: tuple,
+        kwargs: dict,
+        ignore_args: Iterable[str] = (),
+    ) -> str:
+        """
+        Stable digest of the call arguments, bound by parameter name,
+        so `f(1)` and `f(x=1)` share the same key.
+        """
+        arguments = cls._bind_arguments(func, args, kwargs)
+        key_data = {
+            name: cls._key_part(value)
+            for name, value in arguments.items()
+            if name not in ignore_args
+        }
+        raw = json.dumps(key_data, sort_keys=True, default=str)
+        return hashlib.md5(raw.encode()).hexdigest()
 
     @classmethod
     def get_cache_key(
@@ -29,34 +279,224 @@ class RedisCaching:
         func: Callable,
         namespace: str = "",
         prefix: str = "",
+        args_digest: str = "",
     ) -> str:
         """
         Generates a hashed cache key based on the
-        function name, prefix, and namespace.
+        function name, call arguments, prefix, and namespace.
         """
         prefix_str = f"{prefix}:{namespace}:" if prefix or namespace else ""
-        key_raw = f"{func.__module__}:{func.__name__}"
+        key_raw = f"{func.__module__}:{func.__qualname__}:{args_digest}"
         cache_key = prefix_str + hashlib.md5(key_raw.encode()).hexdigest()
         return cache_key
 
-    async def _get_processed_value(self, value: Any) -> Any:
-        return pickle.loads(value) if value else None
+    async def _get_processed_value(self, value: bytes) -> Optional[CacheEntry]:
+        try:
+            entry_value, fresh_until = self.serializer.loads(value)
+        except CacheCodecException as e:
+            # Written in an old or unknown format, treat as a miss
+            log.warning("Failed to decode cache entry: %r", e)
+            return None
+        return CacheEntry(value=entry_value, fresh_until=fresh_until)
+
+    async def get_entry(
+        self,
+        key: str,
+        use_local: bool = True,
+        decode: Optional[Callable[[Any], Any]] = None,
+    ) -> Optional[CacheEntry]:
+        """
+        `decode` turns a value read from Redis back into its type
+        before it is kept locally, a value it rejects is a miss.
+        """
+        if use_local:
+            entry = self.local.get(key, self.stats)
+            if entry is not _MISSING:
+                return entry
+        if not self.redis:
+            return None
+        raw_value = await self.redis.get(key)
+        if raw_value is None:
+            self.stats.redis_misses += 1
+            return None
+        entry = await self._get_processed_value(raw_value)
+        if entry is not None and decode is not None:
+            try:
+                entry.value = decode(entry.value)
+            except ValueError as e:
+                log.warning("Failed to decode cache entry: %r", e)
+                entry = None
+        if entry is None:
+            self.stats.redis_misses += 1
+            return None
+        self.stats.redis_hits += 1
+        self._set_local(key, entry, None)
+        return entry
 
     async def get(self, key: str) -> Optional[Any]:
-        value = await self.redis.get(key)
-        return await self._get_processed_value(value)
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def _set_local(
+        self,
+        key: str,
+        entry: CacheEntry,
+        expire: Optional[int],
+        tags: Iterable[str] = (),
+    ) -> None:
+        local_ttl = settings.cache.local_ttl
+        self.local.set(
+            key,
+            entry,
+            min(expire, local_ttl) if expire else local_ttl,
+            self.stats,
+            tags,
+        )
 
     async def set(
         self,
         key: str,
         value: Any,
         expire: Optional[int] = 15,
+        stale_ttl: int = 0,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """
+        Store the value. With `stale_ttl` the entry outlives
+        its freshness by that many seconds, so it can be served
+        stale while it's being refreshed. Tagged entries are dropped
+        by `invalidate_tags`.
+        """
+        entry = CacheEntry(
+            value=value,
+            fresh_until=time.time() + expire if expire else None,
+        )
+        total_expire = expire + stale_ttl if expire else None
+        self._set_local(key, entry, total_expire, tags)
+        if not self.redis:
+            return
+        serialized_value = self.serializer.dumps(
+            entry.value, entry.fresh_until
+        )
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if total_expire:
+                pipe.setex(key, total_expire, serialized_value)
+            else:
+                pipe.set(key, serialized_value)
+            for tag in tags:
+                pipe.sadd(f"tag:{tag}", key)
+                pipe.expire(f"tag:{tag}", settings.cache.tag_ttl)
+            await pipe.execute()
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        """
+        Drop every entry with one of the tags, here and in Redis,
+        and tell the other workers to drop their local copies.
+        """
+        tags = sorted(set(tags))
+        if not tags:
+            return
+        self.stats.invalidations += self._invalidate_local_tags(tags)
+        if not self.redis:
+            return
+        tag_keys = [f"tag:{tag}" for tag in tags]
+        keys = set()
+        for members in await asyncio.gather(
+            *(self.redis.smembers(tag_key) for tag_key in tag_keys)
+        ):
+            keys.update(
+                key.decode() if isinstance(key, bytes) else key
+                for key in members
+            )
+        # Local copies of Redis hits are stored without their tags
+        for key in keys:
+            self.local.delete(key)
+        await self.redis.delete(*keys, *tag_keys)
+        await self.redis.publish(
+            INVALIDATION_CHANNEL,
+            json.dumps(
+                {"sender": _PROCESS_ID, "tags": tags, "keys": sorted(keys)}
+            ),
+        )
+
+    def apply_invalidation_message(self, data: bytes | str) -> None:
+        message = json.loads(data)
+        if message.get("sender") == _PROCESS_ID:
+            return
+        dropped = self._invalidate_local_tags(message.get("tags", ()))
+        for key in message.get("keys", ()):
+            self.local.delete(key)
+        self.stats.invalidations += dropped
+
+    async def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.redis:
+            await self.redis.delete(key)
+
+    async def acquire_lock(self, key: str, timeout: int) -> Optional[str]:
+        """Try to take the cross-worker recompute lock for the key"""
+        token = uuid.uuid4().hex
+        acquired = await self.redis.set(
+            f"lock:{key}", token, nx=True, ex=timeout
+        )
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
+
+    async def wait_for_entry(
+        self,
+        key: str,
+        timeout: int,
+        decode: Optional[Callable[[Any], Any]] = None,
+    ) -> Optional[CacheEntry]:
+        """Poll Redis until another worker stores a fresh entry"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(_LOCK_POLL_INTERVAL)
+            entry = await self.get_entry(key, use_local=False, decode=decode)
+            if entry is not None and entry.is_fresh:
+                return entry
+        return None
+
+    async def single_flight(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Run `loader` once per key in this process, every concurrent
+        caller awaits the same result.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(loader())
+            self._inflight[key] = future
+            future.add_done_callback(
+                functools.partial(self._finish_flight, key)
+            )
+        return await asyncio.shield(future)
+
+    @classmethod
+    def _finish_flight(cls, key: str, future: asyncio.Future) -> None:
+        cls._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is not None:
+            log.warning(
+                "Cache loader for %s failed: %r", key, future.exception()
+            )
+
+    def refresh_in_background(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
     ) -> None:
-        serialized_value = pickle.dumps(value)
-        if expire:
-            await self.redis.setex(key, expire, serialized_value)
-        else:
-            await self.redis.set(key, serialized_value)
+        """Serve a stale entry and let one task refresh it"""
+        self.stats.stale_hits += 1
+        if key in self._inflight:
+            return
+        future = asyncio.ensure_future(loader())
+        self._inflight[key] = future
+        future.add_done_callback(functools.partial(self._finish_flight, key))
 
 
 def init_caching():
@@ -64,33 +504,170 @@ def init_caching():
     RedisCaching.init()
 
 
+async def invalidate_cache_tags(tags: Iterable[str]) -> None:
+    """Invalidate tags, a Redis outage must not fail the write itself"""
+    try:
+        await RedisCaching().invalidate_tags(tags)
+    except RedisError as e:
+        log.exception(e)
+
+
+async def listen_for_invalidations() -> None:
+    """
+    Drop local entries invalidated by other workers.
+    Runs for the lifetime of the app, reconnecting on Redis errors.
+    """
+    redis_caching = RedisCaching()
+    if not redis_caching.redis:
+        return
+    while True:
+        try:
+            async with redis_caching.redis.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        redis_caching.apply_invalidation_message(
+                            message["data"]
+                        )
+        except RedisError as e:
+            # Entries missed while disconnected may be stale, drop them all
+            log.warning("Cache invalidation listener error: %r", e)
+            redis_caching.clear_local()
+            await asyncio.sleep(1)
+
+
 def cache(
     expire: int = 60,
     namespace: str = "",
     prefix: str = "",
+    ignore_args: Iterable[str] = ("uow", "request"),
+    stale_ttl: int = 0,
+    lock: bool = False,
+    lock_timeout: int = 10,
+    as_response: bool = False,
+    tags: Iterable[str] = (),
+    response_model: Any = None,
 ) -> Callable:
     """
     Cache decorator to cache the result of the function.
-    Works with both async and sync functions.
+    Works with both async and sync functions. The cache key
+    includes a digest of the call arguments, except `ignore_args`
+    (dependencies like the unit of work that don't affect the result).
+
+    Concurrent misses for the same key run the function once per process.
+    With `lock` a Redis lock also lets only one worker recompute the key,
+    the others wait up to `lock_timeout` seconds for its result.
+    With `stale_ttl` an expired value is served for that many seconds
+    more while one background task refreshes it.
+
+    Results are typed by `response_model`, the function's return
+    annotation by default. With `as_response` the result is validated
+    and serialized through it once, the way FastAPI does for a route's
+    response model, cached as bytes and returned as a `Response`, so
+    hits skip validation and serialization entirely. Use it on route
+    handlers. Without it values read from Redis are validated back into
+    that type, so callers get the same type from every cache tier.
+
+    `tags` are formatted with the call arguments, e.g. "product:{product_id}",
+    and let writes drop the entry through `invalidate_cache_tags`.
     """
+    ignore_args = frozenset(ignore_args)
 
     def wrapper(func: Callable) -> Callable:
+        @functools.cache
+        def get_adapter() -> Optional[TypeAdapter]:
+            # Resolved on first call, when forward references exist
+            model = response_model
+            if model is None:
+                model = get_type_hints(func).get("return")
+            if model in (None, Any, type(None)):
+                return None
+            return TypeAdapter(model)
+
+        def serialize(res: Any) -> bytes:
+            adapter = get_adapter()
+            if adapter is None:
+                return to_json(res)
+            return adapter.dump_json(
+                adapter.validate_python(res, from_attributes=True),
+                by_alias=True,
+            )
+
+        def get_decode() -> Optional[Callable[[Any], Any]]:
+            adapter = None if as_response else get_adapter()
+            return adapter.validate_python if adapter else None
+
+        async def call_func(*args, **kwargs) -> Any:
+            if asyncio.iscoroutinefunction(func):
+                return await func(*args, **kwargs)
+            return func(*args, **kwargs)
+
+        async def load(
+            redis_caching: RedisCaching,
+            cache_key: str,
+            args: tuple,
+            kwargs: dict,
+            entry_tags: list[str],
+        ) -> Any:
+            token = None
+            if lock and redis_caching.redis:
+                token = await redis_caching.acquire_lock(
+                    cache_key, lock_timeout
+                )
+                if not token:
+                    entry = await redis_caching.wait_for_entry(
+                        cache_key, lock_timeout, get_decode()
+                    )
+                    if entry is not None:
+                        return entry.value
+            try:
+                res = await call_func(*args, **kwargs)
+                if as_response:
+                    res = serialize(res)
+                await redis_caching.set(
+                    cache_key, res, expire, stale_ttl, entry_tags
+                )
+                return res
+            finally:
+                if token:
+                    await redis_caching.release_lock(cache_key, token)
+
+        def to_result(value: Any) -> Any:
+            if as_response:
+                return Response(content=value, media_type="application/json")
+            return value
+
         @functools.wraps(func)
         async def inner(*args, **kwargs) -> Any:
             redis_caching = RedisCaching()
-            cache_key = RedisCaching.get_cache_key(func, namespace, prefix)
+            cache_key = RedisCaching.get_cache_key(
+                func,
+                namespace,
+                prefix,
+                RedisCaching.get_args_digest(func, args, kwargs, ignore_args),
+            )
+            loader = functools.partial(
+                load,
+                redis_caching,
+                cache_key,
+                args,
+                kwargs,
+                RedisCaching.format_tags(func, tags, args, kwargs),
+            )
 
-            cached_value = await redis_caching.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-
-            if asyncio.iscoroutinefunction(func):
-                res = await func(*args, **kwargs)
-            else:
-                res = func(*args, **kwargs)
+            entry = await redis_caching.get_entry(
+                cache_key, decode=get_decode()
+            )
+            if entry is not None:
+                if entry.is_fresh:
+                    return to_result(entry.value)
+                if stale_ttl:
+                    redis_caching.refresh_in_background(cache_key, loader)
+                    return to_result(entry.value)
 
-            await redis_caching.set(cache_key, res, expire)
-            return res
+            return to_result(
+                await redis_caching.single_flight(cache_key, loader)
+            )
 
         return inner
 
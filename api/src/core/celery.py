@@ -1,7 +1,13 @@
+import asyncio
+
+from typing import Any, Coroutine, Optional
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 
 from .config import settings
+from .db.session import dispose_db
 
 app = Celery(__name__)
 app.conf.update(
@@ -13,6 +19,7 @@ app.conf.update(
 app.autodiscover_tasks(["src.user.tasks"])
 app.autodiscover_tasks(["src.letter.tasks"])
 app.autodiscover_tasks(["src.order.tasks"])
+app.autodiscover_tasks(["src.nova_post.tasks"])
 
 
 app.conf.timezone = "Europe/Kyiv"
@@ -22,4 +29,34 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=0, minute=0),  # run once a day at midnight
         "options": {"expires": 3600},  # expire task if not executed in 1 hour
     },
+    "sync_nova_post_reference_data": {
+        "task": "sync_nova_post_reference_data",
+        "schedule": crontab(hour=4, minute=30),  # run once a day at night
+        "options": {"expires": 3600},
+    },
 }
+
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro: Coroutine) -> Any:
+    """
+    Run a coroutine on the worker process event loop.
+    Connections in the shared DB pool are bound to the loop
+    they were opened on, so tasks reuse one loop per process
+    instead of creating a new one with `asyncio.run`.
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop.run_until_complete(coro)
+
+
+@worker_process_shutdown.connect
+def dispose_worker_db(**kwargs) -> None:
+    global _worker_loop
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(dispose_db())
+        _worker_loop.close()
+    _worker_loop = None
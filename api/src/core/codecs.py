@@ -0,0 +1,243 @@
+import logging
+import math
+import pickle
+import struct
+import zlib
+
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from pydantic_core import to_json, from_json, to_jsonable_python
+
+from .config import settings
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import lz4.frame
+
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+
+log = logging.getLogger(__name__)
+
+
+# codec id, compressor id, fresh until (NaN when the entry never goes stale)
+_HEADER = struct.Struct("!BBd")
+
+
+class CacheCodecException(Exception):
+    pass
+
+
+class CacheCodec(ABC):
+    id: int
+    name: str
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError()
+
+
+class RawCodec(CacheCodec):
+    """Already serialized bytes, e.g. a ready-to-send JSON response body"""
+
+    id = 0
+    name = "raw"
+
+    def dumps(self, value: bytes) -> bytes:
+        return bytes(value)
+
+    def loads(self, data: bytes) -> bytes:
+        return data
+
+
+class PickleCodec(CacheCodec):
+    id = 1
+    name = "pickle"
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class JSONCodec(CacheCodec):
+    """
+    JSON through pydantic-core. Pydantic models are stored as plain
+    data and come back as dicts, so the cached value doesn't depend
+    on the schema classes of the deploy that wrote it.
+    """
+
+    id = 2
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return to_json(value)
+
+    def loads(self, data: bytes) -> Any:
+        return from_json(data)
+
+
+class MsgpackCodec(CacheCodec):
+    id = 3
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(to_jsonable_python(value), use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class Compressor(ABC):
+    id: int
+    name: str
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError()
+
+
+class NoCompressor(Compressor):
+    id = 0
+    name = "none"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCompressor(Compressor):
+    id = 1
+    name = "zlib"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, level=1)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class LZ4Compressor(Compressor):
+    id = 2
+    name = "lz4"
+
+    def compress(self, data: bytes) -> bytes:
+        return lz4.frame.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lz4.frame.decompress(data)
+
+
+CODECS: dict[int, CacheCodec] = {
+    codec.id: codec
+    for codec in (RawCodec(), PickleCodec(), JSONCodec(), MsgpackCodec())
+}
+COMPRESSORS: dict[int, Compressor] = {
+    compressor.id: compressor
+    for compressor in (NoCompressor(), ZlibCompressor(), LZ4Compressor())
+}
+
+
+def _get_by_name(registry: dict, name: str, available: dict[str, bool]):
+    for item in registry.values():
+        if item.name == name:
+            if not available.get(name, True):
+                log.warning("Cache %s is not installed, falling back", name)
+                return None
+            return item
+    raise CacheCodecException(f"Unknown cache codec or compressor: {name}")
+
+
+class CacheSerializer:
+    """
+    Turns a value and its freshness timestamp into bytes for Redis.
+    The header records the codec and compressor used, so entries
+    written with other settings (or by an older deploy) still decode.
+    """
+
+    def __init__(
+        self,
+        codec: str,
+        compression: str,
+        compress_threshold: int,
+    ) -> None:
+        self.codec = _get_by_name(
+            CODECS, codec, {"msgpack": MSGPACK_AVAILABLE}
+        ) or CODECS[JSONCodec.id]
+        self.compressor = _get_by_name(
+            COMPRESSORS, compression, {"lz4": LZ4_AVAILABLE}
+        ) or COMPRESSORS[ZlibCompressor.id]
+        self.compress_threshold = compress_threshold
+
+    def _encode_payload(self, value: Any) -> tuple[CacheCodec, bytes]:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            codec = CODECS[RawCodec.id]
+            return codec, codec.dumps(value)
+        try:
+            return self.codec, self.codec.dumps(value)
+        except (TypeError, ValueError) as e:
+            # Values the codec can't represent still get cached
+            log.debug(
+                "Cache codec %s failed, using pickle: %r", self.codec.name, e
+            )
+            codec = CODECS[PickleCodec.id]
+            return codec, codec.dumps(value)
+
+    def dumps(self, value: Any, fresh_until: Optional[float]) -> bytes:
+        codec, payload = self._encode_payload(value)
+        compressor = COMPRESSORS[NoCompressor.id]
+        if len(payload) >= self.compress_threshold:
+            compressor = self.compressor
+            payload = compressor.compress(payload)
+        header = _HEADER.pack(
+            codec.id,
+            compressor.id,
+            fresh_until if fresh_until is not None else float("nan"),
+        )
+        return header + payload
+
+    def loads(self, data: bytes) -> tuple[Any, Optional[float]]:
+        try:
+            codec_id, compressor_id, fresh_until = _HEADER.unpack_from(data)
+            codec = CODECS[codec_id]
+            compressor = COMPRESSORS[compressor_id]
+            payload = compressor.decompress(data[_HEADER.size:])
+            value = codec.loads(payload)
+        except (
+            KeyError,
+            ValueError,
+            EOFError,
+            struct.error,
+            zlib.error,
+            pickle.UnpicklingError,
+        ):
+            raise CacheCodecException("Unknown cache entry format")
+        return value, None if math.isnan(fresh_until) else fresh_until
+
+
+def get_cache_serializer() -> CacheSerializer:
+    return CacheSerializer(
+        codec=settings.cache.codec,
+        compression=settings.cache.compression,
+        compress_threshold=settings.cache.compress_threshold,
+    )
@@ -37,6 +37,10 @@ class DBSettings(BaseSettings):
     port: int = Field(alias="db_port", default=5432)
     scheme: str = Field(alias="db_scheme", default="postgresql")
     url: str | None = Field(alias="db_url", default=None)
+    pool_size: int = Field(alias="db_pool_size", default=50)
+    max_overflow: int = Field(alias="db_max_overflow", default=10)
+    pool_timeout: int = Field(alias="db_pool_timeout", default=30)
+    pool_recycle: int = Field(alias="db_pool_recycle", default=1800)
 
     @field_validator("url")
     @classmethod
@@ -80,6 +84,15 @@ class CelerySettings(BaseSettings):
 class CacheSettings(BaseSettings):
     use_redis: bool = Field(alias="cache_use_redis", default=True)
     redis_url: str = Field(alias="cache_redis_url", default="redis://localhost:6379")
+    local_max_size: int = Field(alias="cache_local_max_size", default=1024)
+    local_ttl: int = Field(alias="cache_local_ttl", default=30)
+    codec: str = Field(alias="cache_codec", default="json")
+    compression: str = Field(alias="cache_compression", default="zlib")
+    compress_threshold: int = Field(
+        alias="cache_compress_threshold",
+        default=4096,
+    )
+    tag_ttl: int = Field(alias="cache_tag_ttl", default=86400)
 
 
 class StaticFilesSettings(BaseSettings):
@@ -98,6 +111,11 @@ class PaginationSettings(BaseSettings):
         alias="pagination_limit_per_page",
         default=30,
     )
+    # Rows fetched per round-trip by streaming exports
+    export_batch_size: int = Field(
+        alias="pagination_export_batch_size",
+        default=500,
+    )
 
 
 class SMTPSettings(BaseSettings):
@@ -125,6 +143,17 @@ class JWTSettings(BaseSettings):
     access_token_expire: int = Field(alias="jwt_access_token_expire", default=3600)
     refresh_token_expire: int = Field(alias="jwt_refresh_token_expire", default=604800)
     algorithm: str = Field(alias="jwt_algorithm", default="HS256")
+    # Decoded tokens kept per process until they expire
+    claims_cache_size: int = Field(alias="jwt_claims_cache_size", default=1024)
+    # How long an authenticated user is served without a DB lookup
+    user_cache_ttl: int = Field(alias="jwt_user_cache_ttl", default=30)
+    user_cache_size: int = Field(alias="jwt_user_cache_size", default=1024)
+
+
+class HashingSettings(BaseSettings):
+    # Stored hashes with other rounds are rehashed on the next login
+    bcrypt_rounds: int = Field(alias="hashing_bcrypt_rounds", default=12)
+    max_workers: int = Field(alias="hashing_max_workers", default=2)
 
 
 class FrontendSettings(BaseSettings):
@@ -154,6 +183,16 @@ class FrontendSettings(BaseSettings):
 class NovaPostSettings(BaseSettings):
     api_key: str = Field(alias="nova_post_api_key", default="")
     enter_url: str = Field(alias="nova_post_enter_url", default="https://api.novaposhta.ua/v2.0/json/")
+    timeout: float = Field(alias="nova_post_timeout", default=10.0)
+    connect_timeout: float = Field(alias="nova_post_connect_timeout", default=3.0)
+    max_connections: int = Field(alias="nova_post_max_connections", default=20)
+    keepalive_expiry: float = Field(alias="nova_post_keepalive_expiry", default=30.0)
+    max_concurrency: int = Field(alias="nova_post_max_concurrency", default=10)
+    retries: int = Field(alias="nova_post_retries", default=3)
+    backoff: float = Field(alias="nova_post_backoff", default=0.5)
+    max_backoff: float = Field(alias="nova_post_max_backoff", default=5.0)
+    sync_page_size: int = Field(alias="nova_post_sync_page_size", default=500)
+    search_index_ttl: int = Field(alias="nova_post_search_index_ttl", default=3600)
 
 
 class Settings(BaseSettings):
@@ -191,6 +230,9 @@ class Settings(BaseSettings):
     # JWT
     jwt: JWTSettings = Field(default_factory=JWTSettings)
 
+    # Password hashing
+    hashing: HashingSettings = Field(default_factory=HashingSettings)
+
     # Frontend
     frontend_app: FrontendSettings = Field(default_factory=FrontendSettings)
 
@@ -0,0 +1,139 @@
+import base64
+import binascii
+import json
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_json
+from sqlalchemy import and_, or_, false, true
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ColumnElement, UnaryExpression
+
+from ...utils.exceptions.http.pagination import InvalidCursorException
+
+
+CURSOR_NEXT = "next"
+CURSOR_PREV = "prev"
+
+
+@dataclass
+class SortKey:
+    """One column of the ordering, ascending or descending"""
+
+    column: ColumnElement
+    descending: bool = False
+
+    @classmethod
+    def from_order_by(cls, clause) -> "SortKey":
+        if isinstance(clause, UnaryExpression):
+            if clause.modifier is operators.desc_op:
+                return cls(clause.element, descending=True)
+            if clause.modifier is operators.asc_op:
+                return cls(clause.element)
+        return cls(clause)
+
+    def reversed(self) -> "SortKey":
+        return SortKey(self.column, not self.descending)
+
+    @property
+    def order_by(self) -> UnaryExpression:
+        return self.column.desc() if self.descending else self.column.asc()
+
+    def after(self, value: Any) -> ColumnElement:
+        """
+        Rows strictly after `value` in this ordering. Follows the
+        Postgres defaults: NULLs last ascending, NULLs first descending.
+        """
+        if value is None:
+            return self.column.is_not(None) if self.descending else false()
+        if self.descending:
+            return self.column < value
+        if not getattr(self.column, "nullable", True):
+            return self.column > value
+        return or_(self.column > value, self.column.is_(None))
+
+    def equal(self, value: Any) -> ColumnElement:
+        if value is None:
+            return self.column.is_(None)
+        return self.column == value
+
+    def parse(self, value: Any) -> Any:
+        """Restore a cursor value to the column's python type"""
+        if value is None:
+            return None
+        try:
+            python_type = self.column.type.python_type
+        except NotImplementedError:
+            return value
+        try:
+            return TypeAdapter(python_type).validate_python(value)
+        except ValidationError:
+            raise InvalidCursorException()
+
+
+class Page(list):
+    """
+    Page of objects with the total count of the list (None when
+    it wasn't requested) and whether a next page exists.
+    """
+
+    def __init__(
+        self,
+        objs: list,
+        objects_count: Optional[int] = None,
+        has_next: bool = False,
+    ) -> None:
+        super().__init__(objs)
+        self.objects_count = objects_count
+        self.has_next = has_next
+
+
+class KeysetPage(Page):
+    """Page of objects with the cursors of the neighbouring pages"""
+
+    def __init__(
+        self,
+        objs: list,
+        next_cursor: Optional[str] = None,
+        previous_cursor: Optional[str] = None,
+        objects_count: Optional[int] = None,
+    ) -> None:
+        super().__init__(objs, objects_count, next_cursor is not None)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def encode_cursor(values: list, direction: str) -> str:
+    payload = to_json({"d": direction, "v": values})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, list]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        direction, values = data["d"], data["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursorException()
+    if direction not in (CURSOR_NEXT, CURSOR_PREV) or not isinstance(
+        values, list
+    ):
+        raise InvalidCursorException()
+    return direction, values
+
+
+def keyset_filter(keys: list[SortKey], values: list) -> ColumnElement:
+    """
+    Rows after the `values` row in the `keys` ordering:
+    (k1 after v1) OR (k1 = v1 AND k2 after v2) OR ...
+    """
+    if len(keys) != len(values):
+        raise InvalidCursorException()
+    conditions = []
+    equal = []
+    for key, value in zip(keys, values):
+        conditions.append(and_(*equal, key.after(value)))
+        equal.append(key.equal(value))
+    return or_(*conditions) if conditions else true()
@@ -1,17 +1,18 @@
+import functools
 import uuid
 
-from typing import TypeVar, Optional
+from typing import Iterable, TypeVar, Optional
 
 from abc import ABC, abstractmethod
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 from ...core.dependencies import PaginationParams
 from ...core.schemas import BaseListSchema
 
 from .dependencies import uowDEP
 from ...utils.processors.filters.dependencies import FiltersDecoder
-from ...utils.processors.filters.base import FilterProcessor
+from ...utils.processors.filters.base import FilterProcessor, SortPlan
 from ...utils.exceptions.processors.filters import FilterException
 from ...utils.exceptions.http.filters import FilterProcessException
 from ...utils.exceptions.http.base import IdNotFoundException
@@ -20,6 +21,11 @@ from ...utils.exceptions.http.base import IdNotFoundException
 Repo = TypeVar("Repo")
 
 
+@functools.lru_cache(maxsize=None)
+def _get_list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
 class AbstractService(ABC):
     @abstractmethod
     async def get_show_scheme(self, obj) -> BaseModel:
@@ -42,12 +48,47 @@ class AbstractService(ABC):
 class BaseService(AbstractService):
     filter_processor: FilterProcessor
     list_schema: Optional[BaseListSchema] = None
+    # Built straight from the ORM objects (from_attributes)
+    show_schema: Optional[type[BaseModel]] = None
+    # Cache tags dropped when objects of the service change
+    cache_tag: Optional[str] = None
+    list_cache_tags: tuple[str, ...] = ()
 
     def __init__(self, uow: uowDEP) -> None:
         self.uow = uow
 
+    def serialize(self, obj) -> BaseModel:
+        return self.show_schema.model_validate(obj, from_attributes=True)
+
+    def serialize_list(self, objs: Iterable) -> list[BaseModel]:
+        """
+        Validate the whole result list in one pydantic-core call,
+        instead of a coroutine and a schema constructor per object
+        """
+        return _get_list_adapter(self.show_schema).validate_python(
+            list(objs), from_attributes=True
+        )
+
+    async def get_show_scheme(self, obj) -> BaseModel:
+        return self.serialize(obj)
+
+    async def get_show_schemes(self, objs: Iterable) -> list[BaseModel]:
+        if self.show_schema is not None:
+            return self.serialize_list(objs)
+        return [await self.get_show_scheme(obj) for obj in objs]
+
+    async def invalidate_cache(
+        self,
+        obj_id: Optional[int | uuid.UUID] = None,
+    ) -> None:
+        tags = list(self.list_cache_tags)
+        if self.cache_tag and obj_id is not None:
+            tags.append(f"{self.cache_tag}:{obj_id}")
+        await self.uow.invalidate_cache(*tags)
+
     async def create_obj(self, repo: Repo, data: BaseModel) -> BaseModel:
         obj_id = await repo.create(obj_in=data)
+        await self.invalidate_cache()
         await self.uow.commit()
         obj = await repo.get_by_id(obj_id=obj_id)
         return await self.get_show_scheme(obj)
@@ -66,6 +107,7 @@ class BaseService(AbstractService):
             obj_id=obj_id,
             clean_dict_ignore_keys=clean_dict_ignore_keys,
         )
+        await self.invalidate_cache(obj_id)
         await self.uow.commit()
         obj = await repo.get_by_id(obj_id=obj_id)
         return await self.get_show_scheme(obj)
@@ -76,65 +118,108 @@ class BaseService(AbstractService):
             raise IdNotFoundException(model=repo.model, id=obj_id)
         return await self.get_show_scheme(obj)
 
-    async def get_obj_list(
+    async def process_filters(
         self,
-        repo: Repo,
-        options: Optional[list] = None,
         filters: Optional[list] = None,
-        pagination_params: Optional[PaginationParams] = None,
         filters_decoder: Optional[FiltersDecoder] = None,
-    ) -> BaseListSchema[BaseModel] | list[BaseModel]:
+    ) -> Optional[list]:
+        """Add the client's decoded filters to the service's own ones"""
         try:
-            if filters_decoder and filters_decoder.decoded_filters:
+            if filters_decoder and filters_decoder.encoded_filters:
                 decoded_filters = (
-                    await self.filter_processor().process_filters(
-                        filters_decoder.decoded_filters,
+                    await self.filter_processor().compile_filters(
+                        filters_decoder,
                     )
                 )
                 if filters:
                     filters.extend(decoded_filters)
                 else:
                     filters = decoded_filters
-        except FilterException:
-            raise FilterProcessException()
-
-        if pagination_params and pagination_params.page:
-            paginated = True
-            objs = await repo.get_all(
-                with_pagination=True,
-                options=options,
-                filters=filters,
-                pagination=pagination_params,
-            )
-        else:
-            paginated = False
-            objs = await repo.get_all(
-                options=options,
-                filters=filters,
-            )
+        except FilterException as e:
+            raise FilterProcessException(e.message)
+        return filters
 
-        objs_list = [await self.get_show_scheme(obj) for obj in objs]
-
-        if paginated:
-            objs_total_count = await repo.get_count()
-            total_pages = (
-                objs_total_count + pagination_params.size - 1
-            ) // pagination_params.size
-            next_page = (
-                pagination_params.page + 1
-                if pagination_params.page < total_pages
-                else None
-            )
-            previous_page = (
-                pagination_params.page - 1
-                if pagination_params.page > 1
-                else None
+    async def process_sort(
+        self,
+        filters_decoder: Optional[FiltersDecoder] = None,
+    ) -> Optional[SortPlan]:
+        """Ordering requested by the client, None for the default one"""
+        if not (filters_decoder and filters_decoder.sort):
+            return None
+        try:
+            return await self.filter_processor().compile_sort(
+                filters_decoder.sort
             )
-            return self.list_schema(
-                objects_count=objs_total_count,
-                next_page=next_page,
-                previous_page=previous_page,
-                pages_count=total_pages,
-                results=objs_list,
+        except FilterException as e:
+            raise FilterProcessException(e.message)
+
+    @staticmethod
+    def is_paginated(pagination_params: Optional[PaginationParams]) -> bool:
+        return bool(
+            pagination_params
+            and (pagination_params.use_cursor or pagination_params.page)
+        )
+
+    def make_list_response(
+        self,
+        objs: list,
+        results: list,
+        pagination_params: Optional[PaginationParams] = None,
+        list_schema: Optional[type[BaseListSchema]] = None,
+    ) -> BaseListSchema[BaseModel] | list[BaseModel]:
+        """
+        Wrap the serialized `results` of a repository page (`objs`)
+        into the list schema, plain lists are returned as is
+        """
+        if not self.is_paginated(pagination_params):
+            return results
+        list_schema = list_schema or self.list_schema
+
+        if pagination_params.use_cursor:
+            return list_schema(
+                objects_count=objs.objects_count,
+                next_cursor=objs.next_cursor,
+                previous_cursor=objs.previous_cursor,
+                results=results,
             )
-        return objs_list
+
+        objs_total_count = objs.objects_count
+        total_pages = (
+            (objs_total_count + pagination_params.size - 1)
+            // pagination_params.size
+            if objs_total_count is not None
+            else None
+        )
+        next_page = pagination_params.page + 1 if objs.has_next else None
+        previous_page = (
+            pagination_params.page - 1 if pagination_params.page > 1 else None
+        )
+        return list_schema(
+            objects_count=objs_total_count,
+            next_page=next_page,
+            previous_page=previous_page,
+            pages_count=total_pages,
+            results=results,
+        )
+
+    async def get_obj_list(
+        self,
+        repo: Repo,
+        options: Optional[list] = None,
+        filters: Optional[list] = None,
+        pagination_params: Optional[PaginationParams] = None,
+        filters_decoder: Optional[FiltersDecoder] = None,
+    ) -> BaseListSchema[BaseModel] | list[BaseModel]:
+        filters = await self.process_filters(filters, filters_decoder)
+        sort = await self.process_sort(filters_decoder)
+        paginated = self.is_paginated(pagination_params)
+        objs = await repo.get_all(
+            options=options,
+            filters=filters,
+            sort=sort,
+            with_pagination=paginated,
+            pagination=pagination_params if paginated else None,
+        )
+        return self.make_list_response(
+            objs, await self.get_show_schemes(objs), pagination_params
+        )
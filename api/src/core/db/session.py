@@ -1,3 +1,5 @@
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     create_async_engine,
@@ -6,6 +8,10 @@ from sqlalchemy.ext.asyncio import (
 from ..config import settings
 
 
+_async_engine: Optional[AsyncEngine] = None
+_async_session_maker: Optional[async_sessionmaker] = None
+
+
 def get_async_engine() -> AsyncEngine:
     # Конвертувати postgresql:// в postgresql+psycopg://
     db_url = str(settings.db.url)
@@ -13,17 +19,52 @@ def get_async_engine() -> AsyncEngine:
     if db_url.startswith("postgresql://"):
         db_url = db_url.replace("postgresql://", "postgresql+psycopg://", 1)
     print(f"CONVERTED DB URL: {db_url}")  # DEBUG
-    
+
     return create_async_engine(
         db_url,
         echo=True if settings.debug else False,
         future=True,
         pool_pre_ping=True,
-        pool_size=50,  # Зменшив з 1000 - Railway має ліміти
-        max_overflow=10,  # Зменшив з 150
+        pool_size=settings.db.pool_size,
+        max_overflow=settings.db.max_overflow,
+        pool_timeout=settings.db.pool_timeout,
+        pool_recycle=settings.db.pool_recycle,
     )
 
 
-def create_async_session_maker() -> async_sessionmaker:
-    engine: AsyncEngine = get_async_engine()
-    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
\ No newline at end of file
+def create_async_session_maker(
+    engine: Optional[AsyncEngine] = None,
+) -> async_sessionmaker:
+    if engine is None:
+        engine = get_async_engine()
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+def init_db() -> None:
+    """
+    Create the process-wide engine and session factory.
+    Safe to call more than once, only the first call creates them.
+    """
+    global _async_engine, _async_session_maker
+    if _async_engine is None:
+        _async_engine = get_async_engine()
+        _async_session_maker = create_async_session_maker(_async_engine)
+
+
+def get_async_session_maker() -> async_sessionmaker:
+    """
+    Return the shared session factory, creating it on first use
+    (scripts and Celery workers don't go through the app lifespan).
+    """
+    if _async_session_maker is None:
+        init_db()
+    return _async_session_maker
+
+
+async def dispose_db() -> None:
+    """Close all pooled connections and drop the shared engine"""
+    global _async_engine, _async_session_maker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_maker = None
@@ -3,7 +3,8 @@ from abc import abstractmethod
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db.session import create_async_session_maker
+from ..db.session import get_async_session_maker
+from ..caching import invalidate_cache_tags
 
 from ...repositories.user import UserRepository, AuthTokenRepository
 from ...repositories.product import (
@@ -21,6 +22,11 @@ from ...repositories.order import (
     OrderRepository,
     OrderItemRepository,
 )
+from ...repositories.nova_post import (
+    NovaPostAreaRepository,
+    NovaPostCityRepository,
+    NovaPostWarehouseRepository,
+)
 
 
 class AbstractUnitOfWork(ABC):
@@ -37,6 +43,9 @@ class AbstractUnitOfWork(ABC):
     basket_item: BasketItemRepository
     order: OrderRepository
     order_item: OrderItemRepository
+    nova_post_area: NovaPostAreaRepository
+    nova_post_city: NovaPostCityRepository
+    nova_post_warehouse: NovaPostWarehouseRepository
 
     @abstractmethod
     async def __aenter__(self):
@@ -58,6 +67,10 @@ class AbstractUnitOfWork(ABC):
     async def rollback(self):
         raise NotImplementedError()
 
+    @abstractmethod
+    async def invalidate_cache(self, *tags: str):
+        raise NotImplementedError()
+
     @abstractmethod
     async def add(self, instance):
         raise NotImplementedError()
@@ -69,7 +82,8 @@ class AbstractUnitOfWork(ABC):
 
 class UnitOfWork(AbstractUnitOfWork):
     def __init__(self) -> None:
-        self.session_factory = create_async_session_maker()
+        self.session_factory = get_async_session_maker()
+        self._cache_tags: set[str] = set()
 
     async def __aenter__(self):
         self.session: AsyncSession = self.session_factory()
@@ -97,18 +111,31 @@ class UnitOfWork(AbstractUnitOfWork):
         self.order = OrderRepository(self.session)
         self.order_item = OrderItemRepository(self.session)
 
+        # Nova Post reference data
+        self.nova_post_area = NovaPostAreaRepository(self.session)
+        self.nova_post_city = NovaPostCityRepository(self.session)
+        self.nova_post_warehouse = NovaPostWarehouseRepository(self.session)
+
     async def __aexit__(self, *args):
         await self.rollback()
         await self.session.close()
 
     async def commit(self):
         await self.session.commit()
+        if self._cache_tags:
+            tags, self._cache_tags = self._cache_tags, set()
+            await invalidate_cache_tags(tags)
 
     async def flush(self):
         await self.session.flush()
 
     async def rollback(self):
         await self.session.rollback()
+        self._cache_tags.clear()
+
+    async def invalidate_cache(self, *tags: str):
+        """Queue cache tags to be invalidated after the next commit"""
+        self._cache_tags.update(tags)
 
     async def add(self, instance):
         self.session.add(instance)
@@ -3,6 +3,7 @@ from typing import Annotated, Optional
 from fastapi import Depends, Query
 
 from .config import settings
+from .enums import PaginationCountEnum
 
 
 class PaginationParams:
@@ -12,13 +13,33 @@ class PaginationParams:
         size: int = Query(
             ge=1, le=500, default=settings.pagination.limit_per_page
         ),
+        cursor: Optional[str] = Query(
+            default=None,
+            description=(
+                "Cursor pagination: pass an empty value for the first page, "
+                "then next_cursor or previous_cursor from the response"
+            ),
+        ),
+        count: PaginationCountEnum = Query(
+            default=PaginationCountEnum.EXACT,
+            description=(
+                "Total objects count: exact, estimated from table "
+                "statistics (unfiltered lists only) or none"
+            ),
+        ),
     ):
         self.page = page
         self.size = size
+        self.cursor = cursor
+        self.count = count
+
+    @property
+    def use_cursor(self) -> bool:
+        return self.cursor is not None
 
     @property
     def params_dict(self):
-        return {"page": self.page, "limit": self.size}
+        return {"page": self.page, "limit": self.size, "cursor": self.cursor}
 
 
 def get_pagination_params(params: PaginationParams = Depends()):
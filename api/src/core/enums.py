@@ -0,0 +1,7 @@
+from ..utils.enums import BaseEnum
+
+
+class PaginationCountEnum(BaseEnum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
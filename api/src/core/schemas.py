@@ -15,4 +15,6 @@ class BaseListSchema(MainSchema, Generic[T]):
     next_page: Optional[int] = None
     previous_page: Optional[int] = None
     pages_count: Optional[int] = None
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
     results: Optional[list[T]] = None
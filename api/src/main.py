@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 from pathlib import Path
 import os
@@ -11,7 +13,15 @@ from .admin.router import router as admin_router  # ← Додайте цей і
 
 from .middlewares.request_logger import RequestAuditMiddleware
 from .core.config import settings
-from .core.caching import init_caching
+from .core.caching import (
+    init_caching,
+    listen_for_invalidations,
+    RedisCaching,
+)
+from .core.db.session import init_db, dispose_db
+from .nova_post.utils import init_nova_post_client, close_nova_post_client
+from .utils.hashing import get_hashing_executor, shutdown_hashing_executor
+from .utils.token import init_jwt_codec
 from .user.router import router as user_router
 from .product.router import router as product_router
 from .order.router import router as order_router
@@ -22,7 +32,18 @@ from .letter.router import router as letter_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_caching()
+    init_db()
+    init_nova_post_client()
+    init_jwt_codec()
+    get_hashing_executor()
+    invalidation_listener = asyncio.create_task(listen_for_invalidations())
     yield
+    invalidation_listener.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await invalidation_listener
+    await close_nova_post_client()
+    shutdown_hashing_executor()
+    await dispose_db()
 
 
 app = FastAPI(
@@ -91,6 +112,12 @@ async def health_check():
     )
 
 
+@app.get("/debug/cache-stats", include_in_schema=False)
+async def cache_stats():
+    """Cache hit/miss/eviction counters of this worker process"""
+    return RedisCaching.get_stats()
+
+
 # Include routers
 routers: list[APIRouter] = [
     user_router,
@@ -0,0 +1,96 @@
+import datetime
+
+from sqlalchemy import Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
+
+from ..core.db.base import Base
+
+
+class NovaPostMirrorMixin:
+    """
+    Row of the local copy of Nova Post reference data.
+    `checksum` covers the upstream fields only and lets the sync job
+    skip rows that didn't change since the last run.
+    """
+
+    ref: Mapped[str] = mapped_column(primary_key=True, doc="Nova Post ref")
+    description: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="Description",
+    )
+    checksum: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="Checksum of the upstream data",
+    )
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+        doc="Updated at",
+    )
+
+
+class NovaPostAreaModel(NovaPostMirrorMixin, Base):
+    __tablename__ = "nova_post_area"
+    __label__ = "Nova Post area"
+
+
+class NovaPostCityModel(NovaPostMirrorMixin, Base):
+    __tablename__ = "nova_post_city"
+    __label__ = "Nova Post city"
+    __table_args__ = (
+        Index(
+            "ix_nova_post_city_area_ref_description",
+            "area_ref",
+            "description",
+        ),
+    )
+
+    area_ref: Mapped[str] = mapped_column(nullable=False, doc="Area ref")
+    city_id: Mapped[str] = mapped_column(nullable=False, doc="City ID")
+    settlement_type: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="Settlement type ref",
+    )
+    settlement_type_description: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="Settlement type",
+    )
+
+
+class NovaPostWarehouseModel(NovaPostMirrorMixin, Base):
+    __tablename__ = "nova_post_warehouse"
+    __label__ = "Nova Post warehouse"
+    __table_args__ = (
+        Index("ix_nova_post_warehouse_city_ref_number", "city_ref", "number"),
+    )
+
+    city_ref: Mapped[str] = mapped_column(nullable=False, doc="City ref")
+    short_address: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="Short address",
+    )
+    type_of_warehouse: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="Type of warehouse ref",
+    )
+    phone: Mapped[str] = mapped_column(nullable=False, doc="Phone")
+    number: Mapped[str] = mapped_column(nullable=False, doc="Number")
+    total_max_weight_allowed: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="Total max weight allowed",
+    )
+    place_max_weight_allowed: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="Place max weight allowed",
+    )
+    reception: Mapped[dict] = mapped_column(
+        JSONB,
+        nullable=False,
+        doc="Reception schedule",
+    )
+    city_description: Mapped[str] = mapped_column(
+        nullable=False,
+        doc="City description",
+    )
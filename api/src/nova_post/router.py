@@ -1,9 +1,19 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Query
 
 from ..core.caching import cache
+from ..core.db.dependencies import uowDEP
 
-from .schemas import NovaPostArea, NovaPostCity, NovaPostWarehouse
-from .utils import NovaPostAPIManager
+from .schemas import (
+    NovaPostArea,
+    NovaPostCity,
+    NovaPostWarehouse,
+    NovaPostCitySuggestion,
+    NovaPostWarehouseSuggestion,
+)
+from .service import NovaPostService
+from .utils import NOVA_POST_CACHE_TAG
 
 
 router = APIRouter(
@@ -13,22 +23,74 @@ router = APIRouter(
 
 
 @router.get("/areas/", response_model=list[NovaPostArea])
-@cache(expire=3600)
-async def get_areas() -> list[NovaPostArea]:
-    return NovaPostAPIManager().get_areas()
+@cache(
+    expire=3600,
+    stale_ttl=86400,
+    lock=True,
+    tags=[NOVA_POST_CACHE_TAG],
+    as_response=True,
+)
+async def get_areas(uow: uowDEP) -> list[NovaPostArea]:
+    return await NovaPostService(uow).get_areas()
 
 
 @router.get(
     "/cities/{area_ref}/",
     response_model=list[NovaPostCity],
 )
-async def get_cities_by_area(area_ref: str) -> list[NovaPostCity]:
-    return NovaPostAPIManager().get_cities_by_area(area_ref)
+@cache(
+    expire=3600,
+    stale_ttl=86400,
+    lock=True,
+    tags=[NOVA_POST_CACHE_TAG],
+    as_response=True,
+)
+async def get_cities_by_area(
+    uow: uowDEP, area_ref: str
+) -> list[NovaPostCity]:
+    return await NovaPostService(uow).get_cities_by_area(area_ref)
 
 
 @router.get(
     "/warehouses/{city_ref}/",
     response_model=list[NovaPostWarehouse],
 )
-async def get_warehouses_by_city(city_ref: str) -> list[NovaPostWarehouse]:
-    return NovaPostAPIManager().get_warehouses_by_city(city_ref)
+@cache(
+    expire=3600,
+    stale_ttl=86400,
+    lock=True,
+    tags=[NOVA_POST_CACHE_TAG],
+    as_response=True,
+)
+async def get_warehouses_by_city(
+    uow: uowDEP, city_ref: str
+) -> list[NovaPostWarehouse]:
+    return await NovaPostService(uow).get_warehouses_by_city(city_ref)
+
+
+@router.get(
+    "/search/cities/",
+    response_model=list[NovaPostCitySuggestion],
+)
+async def search_cities(
+    uow: uowDEP,
+    q: str = Query(min_length=1, max_length=100),
+    area_ref: Optional[str] = None,
+    limit: int = Query(ge=1, le=50, default=10),
+) -> list[NovaPostCitySuggestion]:
+    """Typeahead over city names, tolerant to typos"""
+    return await NovaPostService(uow).search_cities(q, limit, area_ref)
+
+
+@router.get(
+    "/search/warehouses/",
+    response_model=list[NovaPostWarehouseSuggestion],
+)
+async def search_warehouses(
+    uow: uowDEP,
+    q: str = Query(min_length=1, max_length=100),
+    city_ref: Optional[str] = None,
+    limit: int = Query(ge=1, le=50, default=10),
+) -> list[NovaPostWarehouseSuggestion]:
+    """Typeahead over warehouse numbers and addresses"""
+    return await NovaPostService(uow).search_warehouses(q, limit, city_ref)
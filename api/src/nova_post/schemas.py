@@ -2,6 +2,9 @@ from pydantic import BaseModel
 
 
 class BaseNovaPostDataObj(BaseModel):
+    class Config:
+        from_attributes = True
+
     ref: str
     description: str
 
@@ -25,3 +28,15 @@ class NovaPostWarehouse(BaseNovaPostDataObj):
     place_max_weight_allowed: str
     reception: dict
     city_description: str
+
+
+class NovaPostCitySuggestion(BaseNovaPostDataObj):
+    area_ref: str
+    settlement_type_description: str
+
+
+class NovaPostWarehouseSuggestion(BaseNovaPostDataObj):
+    city_ref: str
+    short_address: str
+    number: str
+    city_description: str
@@ -0,0 +1,261 @@
+import bisect
+import heapq
+import re
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from .schemas import NovaPostCitySuggestion, NovaPostWarehouseSuggestion
+
+
+_APOSTROPHES = re.compile(r"[\'`ʼ’‘]")
+_NON_WORD = re.compile(r"[^\w]+")
+
+# Score of a query token matching an indexed word
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+FUZZY_SCORE = 0.6
+# Bonus when the whole label starts with the query
+LABEL_PREFIX_BONUS = 0.5
+# Shorter tokens match only whole words unless the search is scoped
+MIN_PREFIX_LENGTH = 2
+
+
+def normalize(text: str) -> str:
+    text = _APOSTROPHES.sub("", text.casefold()).replace("ё", "е")
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def tokenize(text: str) -> list[str]:
+    return normalize(text).split()
+
+
+def trigrams(word: str) -> set[str]:
+    """Trigrams of a word padded the way pg_trgm does it"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SearchEntry:
+    ref: str
+    label: str
+    # What the search returns for the entry
+    item: Any
+    parent_ref: Optional[str] = None
+    position: int = 0
+    normalized_label: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.normalized_label = normalize(self.label)
+
+
+class TypeaheadIndex:
+    """
+    In-memory prefix and fuzzy index over a list of entries.
+
+    Every distinct word of the indexed texts gets a posting list of the
+    entries it occurs in. A query token is matched against the words as
+    an exact word, a prefix (bisect over the sorted vocabulary) or,
+    when neither finds anything, by trigram similarity to tolerate
+    typos. Entries have to match all tokens of the query.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[tuple[SearchEntry, Iterable[str]]],
+        fuzzy_threshold: float = 0.35,
+    ) -> None:
+        self.fuzzy_threshold = fuzzy_threshold
+        self.entries: list[SearchEntry] = []
+        self.children: dict[str, set[int]] = defaultdict(set)
+        word_ids: dict[str, int] = {}
+        postings: list[set[int]] = []
+        for entry, texts in entries:
+            entry_id = len(self.entries)
+            self.entries.append(entry)
+            if entry.parent_ref is not None:
+                self.children[entry.parent_ref].add(entry_id)
+            for text in texts:
+                for word in tokenize(text or ""):
+                    word_id = word_ids.setdefault(word, len(word_ids))
+                    if word_id == len(postings):
+                        postings.append(set())
+                    postings[word_id].add(entry_id)
+        self.words = sorted(word_ids)
+        self.postings = [postings[word_ids[word]] for word in self.words]
+        self.word_trigrams: dict[str, list[int]] = defaultdict(list)
+        self.trigram_counts: list[int] = []
+        for word_id, word in enumerate(self.words):
+            word_trigrams = trigrams(word)
+            self.trigram_counts.append(len(word_trigrams))
+            for trigram in word_trigrams:
+                self.word_trigrams[trigram].append(word_id)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _match_words(
+        self, token: str, prefix: bool = True
+    ) -> list[tuple[int, float]]:
+        start = bisect.bisect_left(self.words, token)
+        matches = []
+        for word_id in range(start, len(self.words)):
+            word = self.words[word_id]
+            if not word.startswith(token):
+                break
+            if word == token:
+                matches.append((word_id, EXACT_SCORE))
+            elif prefix:
+                matches.append((word_id, PREFIX_SCORE))
+        if matches or len(token) < 3:
+            return matches
+
+        token_trigrams = trigrams(token)
+        shared = Counter(
+            word_id
+            for trigram in token_trigrams
+            for word_id in self.word_trigrams.get(trigram, ())
+        )
+        for word_id, count in shared.items():
+            similarity = count / (
+                len(token_trigrams) + self.trigram_counts[word_id] - count
+            )
+            if similarity >= self.fuzzy_threshold:
+                matches.append(
+                    (word_id, round(FUZZY_SCORE * similarity, 2))
+                )
+        return matches
+
+    def _match_token(
+        self,
+        token: str,
+        allowed: Optional[set[int]],
+        prefix: bool,
+    ) -> list[tuple[float, set[int]]]:
+        """
+        Entries matching the token grouped by score, best first.
+        Set unions keep the per-entry work in C even for short
+        prefixes that match thousands of words.
+        """
+        levels: dict[float, set[int]] = defaultdict(set)
+        for word_id, score in self._match_words(token, prefix):
+            postings = self.postings[word_id]
+            levels[score] |= postings if allowed is None else (
+                postings & allowed
+            )
+        return sorted(
+            ((score, ids) for score, ids in levels.items() if ids),
+            key=lambda level: level[0],
+            reverse=True,
+        )
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        parent_ref: Optional[str] = None,
+    ) -> list[SearchEntry]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        allowed = None
+        if parent_ref is not None:
+            allowed = self.children.get(parent_ref)
+            if not allowed:
+                return []
+
+        # A lone letter over the whole country matches nearly
+        # everything, only a whole-word match is useful there
+        short_prefix = allowed is not None or len(tokens) > 1
+        token_levels = [
+            self._match_token(
+                token,
+                allowed,
+                short_prefix or len(token) >= MIN_PREFIX_LENGTH,
+            )
+            for token in tokens
+        ]
+        candidates = set.intersection(
+            *[
+                set().union(*[ids for _, ids in levels]) if levels else set()
+                for levels in token_levels
+            ]
+        )
+        if not candidates:
+            return []
+
+        normalized_query = " ".join(tokens)
+        # Tokens with one score level add the same to every candidate
+        base_score = sum(
+            levels[0][0] for levels in token_levels if len(levels) == 1
+        )
+        token_levels = [levels for levels in token_levels if len(levels) > 1]
+
+        def rank(entry_id: int) -> tuple[Any, ...]:
+            entry = self.entries[entry_id]
+            score = base_score
+            for levels in token_levels:
+                score += next(
+                    score for score, ids in levels if entry_id in ids
+                )
+            if entry.normalized_label.startswith(normalized_query):
+                score += LABEL_PREFIX_BONUS
+            return (score, -len(entry.label), -entry.position)
+
+        return [
+            self.entries[entry_id]
+            for entry_id in heapq.nlargest(limit, candidates, key=rank)
+        ]
+
+
+@dataclass
+class NovaPostSearchIndexes:
+    cities: TypeaheadIndex
+    warehouses: TypeaheadIndex
+
+
+def build_search_indexes(
+    cities: Iterable[NovaPostCitySuggestion],
+    warehouses: Iterable[NovaPostWarehouseSuggestion],
+) -> NovaPostSearchIndexes:
+    """
+    Cities are searched by name. Warehouses are searched by number,
+    short address and city, and their label starts with the number, so
+    typing "12" ranks warehouse No 12 above No 120.
+    """
+    return NovaPostSearchIndexes(
+        cities=TypeaheadIndex(
+            (
+                SearchEntry(
+                    ref=city.ref,
+                    label=city.description,
+                    item=city,
+                    parent_ref=city.area_ref,
+                    position=position,
+                ),
+                (city.description,),
+            )
+            for position, city in enumerate(cities)
+        ),
+        warehouses=TypeaheadIndex(
+            (
+                SearchEntry(
+                    ref=warehouse.ref,
+                    label=f"{warehouse.number} {warehouse.short_address}",
+                    item=warehouse,
+                    parent_ref=warehouse.city_ref,
+                    position=position,
+                ),
+                # The description repeats the address after words like
+                # "Відділення" that every warehouse has
+                (
+                    warehouse.number,
+                    warehouse.short_address,
+                    warehouse.city_description,
+                ),
+            )
+            for position, warehouse in enumerate(warehouses)
+        ),
+    )
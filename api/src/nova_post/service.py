@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import logging
+
+from typing import Optional
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from ..core.caching import CacheStats, LocalCache, RedisCaching
+from ..core.config import settings
+from ..core.db.service import BaseService
+from ..repositories.nova_post import NovaPostMirrorRepository
+
+from .schemas import (
+    NovaPostArea,
+    NovaPostCity,
+    NovaPostWarehouse,
+    NovaPostCitySuggestion,
+    NovaPostWarehouseSuggestion,
+)
+from .search import NovaPostSearchIndexes, build_search_indexes
+from .utils import NovaPostAPIManager, NOVA_POST_CACHE_TAG
+
+
+log = logging.getLogger(__name__)
+
+
+_city_suggestions_adapter = TypeAdapter(list[NovaPostCitySuggestion])
+_warehouse_suggestions_adapter = TypeAdapter(
+    list[NovaPostWarehouseSuggestion]
+)
+
+# One entry, dropped with NOVA_POST_CACHE_TAG when a sync (run by the
+# Celery worker) changes the mirror
+_SEARCH_INDEXES_KEY = "search_indexes"
+search_index_stats = CacheStats()
+_search_indexes_cache = LocalCache(1)
+RedisCaching.register_local_cache(_search_indexes_cache)
+_search_indexes_lock = asyncio.Lock()
+
+
+def _get_cached_search_indexes() -> Optional[NovaPostSearchIndexes]:
+    indexes = _search_indexes_cache.get(
+        _SEARCH_INDEXES_KEY, search_index_stats
+    )
+    return indexes if isinstance(indexes, NovaPostSearchIndexes) else None
+
+
+def _get_checksum(row: dict) -> str:
+    return hashlib.blake2b(to_json(row), digest_size=16).hexdigest()
+
+
+class NovaPostService(BaseService):
+    """
+    Nova Post reference data served from the local mirror tables.
+    Until the first sync fills them, requests go to the API.
+    """
+
+    list_cache_tags = (NOVA_POST_CACHE_TAG,)
+
+    async def get_areas(self) -> list[NovaPostArea]:
+        async with self.uow:
+            areas = await self.uow.nova_post_area.get_areas()
+            if areas or await self.uow.nova_post_area.has_rows():
+                return [NovaPostArea.model_validate(area) for area in areas]
+        return await NovaPostAPIManager().get_areas()
+
+    async def get_cities_by_area(self, area_ref: str) -> list[NovaPostCity]:
+        async with self.uow:
+            cities = await self.uow.nova_post_city.get_by_area_ref(area_ref)
+            if cities or await self.uow.nova_post_city.has_rows():
+                return [NovaPostCity.model_validate(city) for city in cities]
+        return await NovaPostAPIManager().get_cities_by_area(area_ref)
+
+    async def get_warehouses_by_city(
+        self, city_ref: str
+    ) -> list[NovaPostWarehouse]:
+        async with self.uow:
+            warehouses = await self.uow.nova_post_warehouse.get_by_city_ref(
+                city_ref
+            )
+            if warehouses or await self.uow.nova_post_warehouse.has_rows():
+                return [
+                    NovaPostWarehouse.model_validate(warehouse)
+                    for warehouse in warehouses
+                ]
+        return await NovaPostAPIManager().get_warehouses_by_city(city_ref)
+
+    async def get_search_indexes(self) -> NovaPostSearchIndexes:
+        """
+        Typeahead indexes of the mirror, built once per process and
+        rebuilt when older than `search_index_ttl` or after a sync.
+        Indexes of an empty mirror are not kept.
+        """
+        indexes = _get_cached_search_indexes()
+        if indexes is not None:
+            return indexes
+        async with _search_indexes_lock:
+            indexes = _get_cached_search_indexes()
+            if indexes is not None:
+                return indexes
+            async with self.uow:
+                cities = await self.uow.nova_post_city.get_search_rows()
+                warehouses = (
+                    await self.uow.nova_post_warehouse.get_search_rows()
+                )
+            # Building takes a while for the whole country, keep it
+            # off the event loop
+            indexes = await asyncio.to_thread(
+                build_search_indexes,
+                _city_suggestions_adapter.validate_python(
+                    cities, from_attributes=True
+                ),
+                _warehouse_suggestions_adapter.validate_python(
+                    warehouses, from_attributes=True
+                ),
+            )
+            if cities or warehouses:
+                _search_indexes_cache.set(
+                    _SEARCH_INDEXES_KEY,
+                    indexes,
+                    settings.nova_post.search_index_ttl,
+                    search_index_stats,
+                    tags=[NOVA_POST_CACHE_TAG],
+                )
+        return indexes
+
+    async def search_cities(
+        self, query: str, limit: int, area_ref: Optional[str] = None
+    ) -> list[NovaPostCitySuggestion]:
+        indexes = await self.get_search_indexes()
+        return [
+            entry.item
+            for entry in indexes.cities.search(query, limit, area_ref)
+        ]
+
+    async def search_warehouses(
+        self, query: str, limit: int, city_ref: Optional[str] = None
+    ) -> list[NovaPostWarehouseSuggestion]:
+        indexes = await self.get_search_indexes()
+        return [
+            entry.item
+            for entry in indexes.warehouses.search(query, limit, city_ref)
+        ]
+
+    async def _sync_rows(
+        self,
+        repo: NovaPostMirrorRepository,
+        rows: Optional[list[dict]],
+    ) -> dict[str, int]:
+        """
+        Write only the difference between the upstream rows and the
+        mirror: new and changed rows by checksum, then removed refs.
+        The checksum covers the upstream fields only, rows added or
+        removed upstream don't change the others.
+        """
+        if rows is None:
+            # Upstream reported a failure, keep the current data
+            return {"changed": 0, "deleted": 0}
+        checksums = await repo.get_checksums()
+        changed = []
+        upstream_refs = set()
+        for row in rows:
+            if row["ref"] in upstream_refs:
+                continue
+            upstream_refs.add(row["ref"])
+            row["checksum"] = _get_checksum(row)
+            if checksums.get(row["ref"]) != row["checksum"]:
+                changed.append(row)
+        deleted = checksums.keys() - upstream_refs
+        if changed:
+            await repo.upsert(changed)
+        if deleted:
+            await repo.delete_by_refs(deleted)
+        return {"changed": len(changed), "deleted": len(deleted)}
+
+    async def sync_reference_data(self) -> dict[str, dict[str, int]]:
+        """Refresh the mirror of areas, cities and warehouses"""
+        manager = NovaPostAPIManager()
+        # Download everything before holding a DB connection
+        areas, cities, warehouses = await asyncio.gather(
+            manager.get_area_rows(),
+            manager.get_city_rows(),
+            manager.get_warehouse_rows(),
+        )
+        async with self.uow:
+            stats = {
+                "areas": await self._sync_rows(
+                    self.uow.nova_post_area, areas
+                ),
+                "cities": await self._sync_rows(
+                    self.uow.nova_post_city, cities
+                ),
+                "warehouses": await self._sync_rows(
+                    self.uow.nova_post_warehouse, warehouses
+                ),
+            }
+            if any(sum(item.values()) for item in stats.values()):
+                await self.invalidate_cache()
+            await self.uow.commit()
+        log.info("Nova Post reference data synced: %s", stats)
+        return stats
@@ -0,0 +1,17 @@
+import logging
+
+from ..core.celery import app as celery_app, run_async
+from ..core.db.unitofwork import UnitOfWork
+
+from .service import NovaPostService
+
+
+log = logging.getLogger(__name__)
+
+
+@celery_app.task(name="sync_nova_post_reference_data")
+def sync_nova_post_reference_data():
+    try:
+        run_async(NovaPostService(UnitOfWork()).sync_reference_data())
+    except Exception as e:
+        log.exception(e)
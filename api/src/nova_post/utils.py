@@ -1,64 +1,261 @@
-import requests
+import asyncio
+import logging
+import random
 
+from typing import Optional
+
+import httpx
 
 from ..core.config import settings
+from ..utils.exceptions.http.nova_post import NovaPostUnavailableException
 from .schemas import NovaPostArea, NovaPostCity, NovaPostWarehouse
 
 
-class NovaPostAPIManager:
+log = logging.getLogger(__name__)
+
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Dropped when the local reference data mirror changes
+NOVA_POST_CACHE_TAG = "nova_post"
+
+
+class NovaPostClient:
+    """
+    Async Nova Post API client. One instance per process keeps a pool of
+    keep-alive connections, at most `max_concurrency` requests are in flight
+    at once, and transport errors and 429/5xx answers are retried with
+    exponential backoff and jitter.
+
+    `base_url` defaults to `settings.nova_post.enter_url`, so tests can point
+    it (or the NOVA_POST_ENTER_URL env variable) at a local stub server, or
+    pass an `httpx.MockTransport` as `transport`.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        config = settings.nova_post
+        self.base_url = base_url or config.enter_url
+        self.api_key = api_key if api_key is not None else config.api_key
+        self.retries = config.retries
+        self.backoff = config.backoff
+        self.max_backoff = config.max_backoff
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            transport=transport,
+        )
+
     @property
-    def base_data(self):
-        return {
-            "apiKey": settings.nova_post.api_key,
-            "calledMethod": "",
-            "modelName": "AddressGeneral",
-            "methodProperties": {},
-        }
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
-    def process_api_method(self, called_method, method_properties=None):
-        base_data = self.base_data
-        base_data["calledMethod"] = called_method
-        if method_properties:
-            base_data["methodProperties"] = method_properties
-        response = requests.post(settings.nova_post.enter_url, json=base_data)
+    def _get_delay(self, attempt: int) -> float:
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2**attempt)
+        )
+
+    async def _post(self, payload: dict) -> dict:
+        async with self._semaphore:
+            response = await self._client.post(self.base_url, json=payload)
+        if response.status_code in RETRY_STATUS_CODES:
+            raise httpx.HTTPStatusError(
+                f"Nova Post API answered {response.status_code}",
+                request=response.request,
+                response=response,
+            )
+        response.raise_for_status()
         return response.json()
 
-    def get_areas(self) -> list[NovaPostArea]:
-        areas_list = []
-        response = self.process_api_method("getAreas")
-        if response["success"]:
-            for item in response["data"]:
-                if item["Description"] != "АРК":
-                    areas_list.append(
-                        NovaPostArea(
-                            ref=item["Ref"],
-                            description=item["Description"] + " область",
-                        )
+    async def call(
+        self,
+        called_method: str,
+        method_properties: Optional[dict] = None,
+        model_name: str = "AddressGeneral",
+    ) -> dict:
+        payload = {
+            "apiKey": self.api_key,
+            "modelName": model_name,
+            "calledMethod": called_method,
+            "methodProperties": method_properties or {},
+        }
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._post(payload)
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or (
+                    e.response.status_code in RETRY_STATUS_CODES
+                )
+                if not retryable or attempt == self.retries:
+                    log.warning(
+                        "Nova Post %s failed after %s attempts: %r",
+                        called_method,
+                        attempt + 1,
+                        e,
                     )
-        return areas_list
+                    raise NovaPostUnavailableException()
+                await asyncio.sleep(self._get_delay(attempt))
+            except ValueError:
+                log.warning("Nova Post %s returned invalid JSON", called_method)
+                raise NovaPostUnavailableException()
+
+
+_nova_post_client: Optional[NovaPostClient] = None
+
+
+def init_nova_post_client(**kwargs) -> NovaPostClient:
+    """
+    Create the process-wide client.
+    Safe to call more than once, only the first call creates it.
+    """
+    global _nova_post_client
+    if _nova_post_client is None or _nova_post_client.is_closed:
+        _nova_post_client = NovaPostClient(**kwargs)
+    return _nova_post_client
+
+
+def get_nova_post_client() -> NovaPostClient:
+    """
+    Return the shared client, creating it on first use
+    (scripts and Celery workers don't go through the app lifespan).
+    """
+    return init_nova_post_client()
 
-    def get_cities_by_area(self, area_ref: str) -> list[NovaPostCity]:
+
+async def close_nova_post_client() -> None:
+    """Close the pooled connections and drop the shared client"""
+    global _nova_post_client
+    if _nova_post_client is not None:
+        await _nova_post_client.aclose()
+    _nova_post_client = None
+
+
+def area_row(item: dict) -> dict:
+    return {
+        "ref": item["Ref"],
+        "description": item["Description"] + " область",
+    }
+
+
+def city_row(item: dict) -> dict:
+    return {
+        "ref": item["Ref"],
+        "description": item["Description"],
+        "area_ref": item["Area"],
+        "city_id": item["CityID"],
+        "settlement_type": item["SettlementType"],
+        "settlement_type_description": item["SettlementTypeDescription"],
+    }
+
+
+def warehouse_row(item: dict) -> dict:
+    return {
+        "ref": item["Ref"],
+        "description": item["Description"],
+        "city_ref": item["CityRef"],
+        "short_address": item["ShortAddress"],
+        "type_of_warehouse": item["TypeOfWarehouse"],
+        "phone": item["Phone"],
+        "number": item["Number"],
+        "total_max_weight_allowed": item["TotalMaxWeightAllowed"],
+        "place_max_weight_allowed": item["PlaceMaxWeightAllowed"],
+        "reception": item["Reception"],
+        "city_description": item["CityDescription"],
+    }
+
+
+class NovaPostAPIManager:
+    def __init__(self, client: Optional[NovaPostClient] = None) -> None:
+        self.client = client or get_nova_post_client()
+
+    async def process_api_method(self, called_method, method_properties=None):
+        return await self.client.call(called_method, method_properties)
+
+    async def get_all_pages(
+        self,
+        called_method: str,
+        page_size: int,
+        method_properties: Optional[dict] = None,
+    ) -> Optional[list[dict]]:
+        """
+        Every item of a paginated method. The first page tells the total
+        count, the rest are requested concurrently (the client caps how
+        many run at once). None when upstream reports a failure.
+        """
+
+        async def get_page(page: int) -> dict:
+            return await self.process_api_method(
+                called_method,
+                {**(method_properties or {}), "Page": page, "Limit": page_size},
+            )
+
+        first = await get_page(1)
+        if not first["success"]:
+            return None
+        items = list(first["data"])
+        total = (first.get("info") or {}).get("totalCount") or len(items)
+        pages_count = -(-int(total) // page_size)
+        for response in await asyncio.gather(
+            *[get_page(page) for page in range(2, pages_count + 1)]
+        ):
+            if not response["success"]:
+                return None
+            items.extend(response["data"])
+        return items
+
+    async def get_area_rows(self) -> Optional[list[dict]]:
+        response = await self.process_api_method("getAreas")
+        if not response["success"]:
+            return None
+        return [
+            area_row(item)
+            for item in response["data"]
+            if item["Description"] != "АРК"
+        ]
+
+    async def get_city_rows(self) -> Optional[list[dict]]:
+        items = await self.get_all_pages(
+            "getCities", settings.nova_post.sync_page_size
+        )
+        return None if items is None else [city_row(item) for item in items]
+
+    async def get_warehouse_rows(self) -> Optional[list[dict]]:
+        items = await self.get_all_pages(
+            "getWarehouses", settings.nova_post.sync_page_size
+        )
+        return (
+            None if items is None else [warehouse_row(item) for item in items]
+        )
+
+    async def get_areas(self) -> list[NovaPostArea]:
+        return [NovaPostArea(**row) for row in await self.get_area_rows() or []]
+
+    async def get_cities_by_area(self, area_ref: str) -> list[NovaPostCity]:
         cities_list = []
-        response = self.process_api_method("getCities")
+        response = await self.process_api_method("getCities")
         if response["success"]:
             for item in response["data"]:
                 if item["Area"] == area_ref:
-                    cities_list.append(
-                        NovaPostCity(
-                            ref=item["Ref"],
-                            description=item["Description"],
-                            city_id=item["CityID"],
-                            settlement_type=item["SettlementType"],
-                            settlement_type_description=item[
-                                "SettlementTypeDescription"
-                            ],
-                        )
-                    )
+                    cities_list.append(NovaPostCity(**city_row(item)))
         return cities_list
 
-    def get_warehouses_by_city(self, city_ref: str) -> list[NovaPostWarehouse]:
+    async def get_warehouses_by_city(
+        self, city_ref: str
+    ) -> list[NovaPostWarehouse]:
         warehouses_list = []
-        response = self.process_api_method(
+        response = await self.process_api_method(
             "getWarehouses",
             method_properties={
                 "CityRef": city_ref,
@@ -67,17 +264,6 @@ class NovaPostAPIManager:
         if response["success"]:
             for item in response["data"]:
                 warehouses_list.append(
-                    NovaPostWarehouse(
-                        ref=item["Ref"],
-                        description=item["Description"],
-                        short_address=item["ShortAddress"],
-                        type_of_warehouse=item["TypeOfWarehouse"],
-                        phone=item["Phone"],
-                        number=item["Number"],
-                        total_max_weight_allowed=item["TotalMaxWeightAllowed"],
-                        place_max_weight_allowed=item["PlaceMaxWeightAllowed"],
-                        reception=item["Reception"],
-                        city_description=item["CityDescription"],
-                    )
+                    NovaPostWarehouse(**warehouse_row(item))
                 )
         return warehouses_list
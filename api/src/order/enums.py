@@ -10,3 +10,8 @@ class OrderStatusEnum(BaseEnum):
     NEW = "new"
     ACCEPTED = "accepted"
     READY_FOR_SHIPMENT = "ready_for_shipment"
+
+
+class OrderExportFormatEnum(BaseEnum):
+    CSV = "csv"
+    XLSX = "xlsx"
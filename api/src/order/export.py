@@ -0,0 +1,294 @@
+import csv
+import io
+import re
+import zipfile
+
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from ..product.enums import ProductOrientationEnum, ProductTypeOfPlatbandEnum
+
+from .enums import ItemMaterialEnum, OrderExportFormatEnum, OrderStatusEnum
+from .models import Order, OrderItem
+
+
+EXPORT_HEADERS = [
+    "№ замовлення",
+    "Дата",
+    "Статус",
+    "ПІБ",
+    "Телефон",
+    "Електронна пошта",
+    "Регіон",
+    "Місто",
+    "Відділення",
+    "Самовивіз",
+    "Адреса доставки",
+    "Додаткова інформація",
+    "Назва товару",
+    "SKU",
+    "Ціна",
+    "Кількість",
+    "Загальна ціна",
+    "Матеріал",
+    "Тип плінтуса",
+    "Орієнтація",
+    "З склом",
+    "Колір",
+    "Колір скла",
+    "Покриття",
+    "Розмір",
+]
+
+STATUS_LABELS = {
+    OrderStatusEnum.NEW: "Нове",
+    OrderStatusEnum.ACCEPTED: "Приняте",
+    OrderStatusEnum.READY_FOR_SHIPMENT: "Готове до відправлення",
+}
+MATERIAL_LABELS = {
+    ItemMaterialEnum.WOOD: "Дерево",
+    ItemMaterialEnum.MDF: "МДФ",
+}
+TYPE_OF_PLATBAND_LABELS = {
+    ProductTypeOfPlatbandEnum.DEFAULT: "Звичайний",
+    ProductTypeOfPlatbandEnum.L_SHAPED: "Г-подібний",
+}
+ORIENTATION_LABELS = {
+    ProductOrientationEnum.LEFT: "Ліва",
+    ProductOrientationEnum.RIGHT: "Права",
+}
+
+
+def _yes_no(value: bool | None) -> str | None:
+    if value is None:
+        return None
+    return "Так" if value else "Ні"
+
+
+def _item_cells(item: OrderItem) -> list:
+    return [
+        item.product.name,
+        item.product.sku,
+        item.price,
+        item.quantity,
+        item.total_price,
+        MATERIAL_LABELS.get(item.material),
+        TYPE_OF_PLATBAND_LABELS.get(item.type_of_platband),
+        ORIENTATION_LABELS.get(item.orientation),
+        _yes_no(item.with_glass),
+        item.color.name if item.color else None,
+        item.glass_color.name if item.glass_color else None,
+        item.covering.name if item.covering else None,
+        item.size.dimensions if item.size else None,
+    ]
+
+
+def order_rows(order: Order) -> Iterator[list]:
+    """One row per item with the order repeated, one row without items"""
+    order_cells = [
+        order.id,
+        order.created_at.strftime("%Y-%m-%d %H:%M"),
+        STATUS_LABELS.get(order.status),
+        order.full_name,
+        order.phone,
+        order.email,
+        order.region,
+        order.city_or_settlement,
+        order.warehouse,
+        _yes_no(order.pickup),
+        order.delivery_address,
+        order.additional_info,
+    ]
+    if not order.items:
+        yield order_cells
+    for item in order.items:
+        yield order_cells + _item_cells(item)
+
+
+class OrderExportWriter(ABC):
+    """
+    Encodes export rows into chunks of a file, so the response can be
+    sent while the orders are still being read. `start` returns the
+    chunk with the headers and `finish` the end of the file.
+    """
+
+    media_type: str
+    extension: str
+
+    def start(self) -> bytes:
+        return self.write_rows([EXPORT_HEADERS])
+
+    @abstractmethod
+    def write_rows(self, rows: Iterable[list]) -> bytes:
+        raise NotImplementedError()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class CSVOrderExportWriter(OrderExportWriter):
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def start(self) -> bytes:
+        # The BOM makes Excel read the file as UTF-8
+        return "\ufeff".encode() + super().start()
+
+    def write_rows(self, rows: Iterable[list]) -> bytes:
+        self._writer.writerows(rows)
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data.encode()
+
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+        'content-types">'
+        '<Default Extension="rels" ContentType="application/'
+        'vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+        '2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+        '2006/main" xmlns:r="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships">'
+        '<sheets><sheet name="Orders" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+        '2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+_XLSX_SHEET = "xl/worksheets/sheet1.xml"
+_XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+    '2006/main"><sheetData>'
+).encode()
+_XLSX_SHEET_END = b"</sheetData></worksheet>"
+# Characters XML 1.0 doesn't allow
+_XML_ILLEGAL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def column_letter(index: int) -> str:
+    """Spreadsheet column of a zero-based index: A, ..., Z, AA, ..."""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+class _ChunkFile:
+    """Write-only file keeping what was written until it is drained"""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class XLSXOrderExportWriter(OrderExportWriter):
+    """
+    A minimal workbook with one sheet of inline strings. zipfile writes
+    entries to a file that can't seek with data descriptors, so the
+    compressed sheet is sent as its rows are written.
+    """
+
+    media_type = (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    extension = "xlsx"
+
+    def __init__(self) -> None:
+        self._file = _ChunkFile()
+        self._zip = zipfile.ZipFile(self._file, "w", zipfile.ZIP_DEFLATED)
+        self._sheet = None
+        self._row_number = 0
+        self._columns = [
+            column_letter(index) for index in range(len(EXPORT_HEADERS))
+        ]
+
+    def start(self) -> bytes:
+        for name, xml in _XLSX_PARTS.items():
+            self._zip.writestr(name, xml)
+        self._sheet = self._zip.open(_XLSX_SHEET, "w")
+        self._sheet.write(_XLSX_SHEET_START)
+        return super().start()
+
+    def _cell(self, column: str, value) -> str:
+        if value is None or value == "":
+            return ""
+        ref = f"{column}{self._row_number}"
+        if isinstance(value, int) and not isinstance(value, bool):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        text = escape(_XML_ILLEGAL.sub("", str(value)))
+        return (
+            f'<c r="{ref}" t="inlineStr">'
+            f'<is><t xml:space="preserve">{text}</t></is></c>'
+        )
+
+    def _row(self, row: list) -> str:
+        self._row_number += 1
+        cells = "".join(
+            self._cell(column, value)
+            for column, value in zip(self._columns, row)
+        )
+        return f'<row r="{self._row_number}">{cells}</row>'
+
+    def write_rows(self, rows: Iterable[list]) -> bytes:
+        self._sheet.write("".join(self._row(row) for row in rows).encode())
+        return self._file.drain()
+
+    def finish(self) -> bytes:
+        self._sheet.write(_XLSX_SHEET_END)
+        self._sheet.close()
+        self._zip.close()
+        return self._file.drain()
+
+
+EXPORT_WRITERS: dict[OrderExportFormatEnum, type[OrderExportWriter]] = {
+    OrderExportFormatEnum.CSV: CSVOrderExportWriter,
+    OrderExportFormatEnum.XLSX: XLSXOrderExportWriter,
+}
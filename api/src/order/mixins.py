@@ -2,7 +2,7 @@ import uuid
 
 from enum import Enum as PyEnum
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, func, select
 from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.dialects.postgresql import ENUM
@@ -139,6 +139,16 @@ class ItemMixin(BaseModelMixin):
     def total_price(self):
         return self.product.price * self.quantity
 
+    @total_price.inplace.expression
+    @classmethod
+    def _total_price_expression(cls):
+        return (
+            select(Product.price)
+            .where(Product.id == cls.product_id)
+            .scalar_subquery()
+            * cls.quantity
+        )
+
 
 class BasketAndOrderMixin(BaseModelMixin):
     user_id: Mapped[uuid.UUID] = mapped_column(
@@ -152,6 +162,27 @@ class BasketAndOrderMixin(BaseModelMixin):
     def total_value(self):
         return sum(item.total_price for item in self.items)
 
+    @total_value.inplace.expression
+    @classmethod
+    def _total_value_expression(cls):
+        item = cls.items.property.mapper.class_
+        return (
+            select(func.coalesce(func.sum(item.quantity * Product.price), 0))
+            .join(Product, Product.id == item.product_id)
+            .where(cls.items.property.primaryjoin)
+            .scalar_subquery()
+        )
+
     @hybrid_property
     def total_items(self):
         return sum(item.quantity for item in self.items)
+
+    @total_items.inplace.expression
+    @classmethod
+    def _total_items_expression(cls):
+        item = cls.items.property.mapper.class_
+        return (
+            select(func.coalesce(func.sum(item.quantity), 0))
+            .where(cls.items.property.primaryjoin)
+            .scalar_subquery()
+        )
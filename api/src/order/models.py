@@ -2,8 +2,9 @@ import datetime
 
 from enum import Enum as PyEnum
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, func, select
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.dialects.postgresql import ENUM
 
 from ..core.db.base import Base
@@ -30,8 +31,32 @@ class Basket(BasketAndOrderMixin, Base):
         return f"Basket {self.id}. Total items: {self.total_items}. Total value: {self.total_value}"
 
 
+# A basket holds one row per product variant, the conflict target of
+# the add-to-basket upsert
+BASKET_ITEM_KEY_COLUMNS = (
+    "basket_id",
+    "product_id",
+    "color_id",
+    "size_id",
+    "covering_id",
+    "glass_color_id",
+    "material",
+    "type_of_platband",
+    "orientation",
+    "with_glass",
+)
+
+
 class BasketItem(ItemMixin, Base):
     __tablename__ = "basket_item"
+    __table_args__ = (
+        Index(
+            "uq_basket_item_variant",
+            *BASKET_ITEM_KEY_COLUMNS,
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
 
     basket_id: Mapped[int] = mapped_column(
         ForeignKey(
@@ -105,6 +130,24 @@ class Order(BasketAndOrderMixin, Base):
         cascade="all, delete-orphan",
     )
 
+    # Orders are valued at the prices their items were ordered for
+    @hybrid_property
+    def total_value(self):
+        return sum(item.total_price for item in self.items)
+
+    @total_value.inplace.expression
+    @classmethod
+    def _total_value_expression(cls):
+        return (
+            select(
+                func.coalesce(
+                    func.sum(OrderItem.quantity * OrderItem.price), 0
+                )
+            )
+            .where(OrderItem.order_id == cls.id)
+            .scalar_subquery()
+        )
+
     def __str__(self) -> str:
         return f"Order {self.id}"
 
@@ -122,6 +165,19 @@ class OrderItem(ItemMixin, Base):
         index=True,
         doc="Order ID",
     )
+    price: Mapped[int] = mapped_column(
+        nullable=False,
+        doc="Product price when the order was placed",
+    )
+
+    @hybrid_property
+    def total_price(self):
+        return self.price * self.quantity
+
+    @total_price.inplace.expression
+    @classmethod
+    def _total_price_expression(cls):
+        return cls.price * cls.quantity
 
     def __str__(self) -> str:
         return f"{self.product.sku} - {self.quantity} шт."
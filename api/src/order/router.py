@@ -1,10 +1,13 @@
+import datetime
+
 from fastapi import APIRouter
 
 from fastapi.responses import StreamingResponse
 
 from ..core.db.dependencies import uowDEP
 from ..core.dependencies import pagination_params
-from ..user.dependencies import authorization
+from ..user.dependencies import current_user, required_user
+from ..utils.exceptions.http.user import UserPermissionException
 from ..utils.processors.filters.dependencies import filters_decoder
 
 from .schemas import (
@@ -16,6 +19,8 @@ from .schemas import (
     OrderUpdate,
     OrderListSchema,
 )
+from .enums import OrderExportFormatEnum
+from .export import EXPORT_WRITERS
 from .service import BasketService, OrderService
 
 
@@ -26,24 +31,29 @@ router = APIRouter(
 
 @router.get("/basket/", response_model=BasketShow, tags=["Basket"])
 async def get_basket(
-    authorization: authorization,
+    user: current_user,
     uow: uowDEP,
     basket_token: str = None,
+    with_items: bool = True,
 ) -> BasketShow:
-    return await BasketService(uow).get_basket(authorization, basket_token)
+    """With with_items=false only the totals are returned, without items"""
+    return await BasketService(uow).get_basket(user, basket_token, with_items)
 
 
 @router.post("/basket/add_item/", response_model=BasketShow, tags=["Basket"])
 async def add_item_to_basket(
     basket_item: BasketItemCreate,
-    authorization: authorization,
+    user: current_user,
     uow: uowDEP,
     basket_token: str = None,
+    with_items: bool = True,
 ) -> BasketShow:
+    """With with_items=false only the updated totals are returned"""
     return await BasketService(uow).add_item(
         item_data=basket_item,
-        authorization=authorization,
+        user=user,
         basket_token=basket_token,
+        with_items=with_items,
     )
 
 
@@ -55,14 +65,14 @@ async def add_item_to_basket(
 async def update_item_in_basket(
     basket_item: BasketItemUpdate,
     item_id: int,
-    authorization: authorization,
+    user: current_user,
     uow: uowDEP,
     basket_token: str = None,
 ) -> BasketShow:
     return await BasketService(uow).update_item(
         item_data=basket_item,
         item_id=item_id,
-        authorization=authorization,
+        user=user,
         basket_token=basket_token,
     )
 
@@ -84,13 +94,13 @@ async def remove_item_from_basket(
 @router.post("/create/", response_model=OrderShow, tags=["Order"])
 async def create_order(
     order_data: OrderCreate,
-    authorization: authorization,
+    user: current_user,
     uow: uowDEP,
     basket_token: str = None,
 ) -> int:
     return await OrderService(uow).create_order(
         data=order_data,
-        authorization=authorization,
+        user=user,
         basket_token=basket_token,
     )
 
@@ -112,18 +122,52 @@ async def get_order_list(
 
 @router.get("/for_user/", tags=["Order"])
 async def get_orders_for_user(
-    authorization: authorization,
+    user: required_user,
     pagination: pagination_params,
     filters_decoder: filters_decoder = None,
     uow: uowDEP = uowDEP,
 ) -> OrderListSchema | list[OrderShow]:
     return await OrderService(uow).get_orders_for_user(
-        authorization=authorization,
+        user=user,
         pagination=pagination,
         filters_decoder=filters_decoder,
     )
 
 
+@router.get("/export/", tags=["Order"])
+async def export_orders(
+    user: required_user,
+    uow: uowDEP,
+    filters_decoder: filters_decoder = None,
+    export_format: OrderExportFormatEnum = OrderExportFormatEnum.CSV,
+    created_from: datetime.date = None,
+    created_to: datetime.date = None,
+):
+    """
+    Orders matching the filters and creation dates as a CSV or XLSX
+    file with a row per item, streamed while the orders are read.
+    Admins only.
+    """
+    if not user.is_admin:
+        raise UserPermissionException(user.email)
+    chunks = await OrderService(uow).export_orders(
+        export_format=export_format,
+        filters_decoder=filters_decoder,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    writer = EXPORT_WRITERS[export_format]
+    return StreamingResponse(
+        chunks,
+        media_type=writer.media_type,
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename=orders.{writer.extension}"
+            )
+        },
+    )
+
+
 @router.get("/{order_id}/", response_model=OrderShow, tags=["Order"])
 async def get_order(
     order_id: int,
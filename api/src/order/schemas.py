@@ -3,7 +3,7 @@ import datetime
 
 from typing import Optional
 
-from pydantic import EmailStr
+from pydantic import EmailStr, field_validator
 
 from ..core.schemas import MainSchema, BaseListSchema
 from ..product.schemas import ProductShow
@@ -12,6 +12,16 @@ from ..product.enums import ProductTypeOfPlatbandEnum, ProductOrientationEnum
 from .enums import ItemMaterialEnum, OrderStatusEnum
 
 
+def _items_to_list_schema(items):
+    """Wrap the ORM items relationship into the list schema shape"""
+    if isinstance(items, list):
+        return {
+            "objects_count": sum(item.quantity for item in items),
+            "results": items,
+        }
+    return items
+
+
 class BasketItemShow(MainSchema):
     id: int
     product_id: int
@@ -60,6 +70,10 @@ class BasketShow(MainSchema):
     total_items: int
     items: Optional[BasketItemList] = None
 
+    _items_to_list_schema = field_validator("items", mode="before")(
+        _items_to_list_schema
+    )
+
 
 class BasketCreate(MainSchema):
     user_id: Optional[uuid.UUID] = None
@@ -82,6 +96,7 @@ class OrderItemShow(MainSchema):
     orientation: Optional[ProductOrientationEnum] = None
     with_glass: Optional[bool] = None
     quantity: int
+    price: int
     total_price: int
     product: ProductShow
 
@@ -109,6 +124,10 @@ class OrderShow(MainSchema):
     created_at: datetime.datetime
     updated_at: datetime.datetime
 
+    _items_to_list_schema = field_validator("items", mode="before")(
+        _items_to_list_schema
+    )
+
 
 class OrderItemCreate(MainSchema):
     product_id: int
@@ -6,20 +6,17 @@ from io import StringIO
 
 from sqlalchemy.exc import SQLAlchemyError
 
-from typing import Optional
+from typing import AsyncIterator, Optional
 
+from ..core.config import settings
 from ..core.dependencies import PaginationParams
 from ..core.db.service import BaseService
-from ..user.service import UserService
-from ..product.service import ProductService
+from ..user.auth import AuthUser
 
 from ..utils.processors.filters.decoder import FiltersDecoder
 from ..utils.processors.filters.order import OrderFilterProcessor
 
-from ..utils.exceptions.http.user import (
-    InvalidCredentialsException,
-    UserNotFoundByIdException,
-)
+from ..utils.exceptions.http.user import InvalidCredentialsException
 from ..utils.exceptions.http.order import (
     BasketGetException,
     BasketItemAddException,
@@ -35,18 +32,15 @@ from .models import Basket, Order
 from .schemas import (
     BasketShow,
     BasketCreate,
-    BasketItemList,
-    BasketItemShow,
     BasketItemCreate,
     BasketItemUpdate,
     OrderCreate,
     OrderShow,
-    OrderItemShow,
-    OrderItemList,
     OrderUpdate,
     OrderListSchema,
 )
-from .enums import OrderStatusEnum
+from .enums import OrderExportFormatEnum
+from .export import EXPORT_WRITERS, OrderExportWriter, order_rows
 from .utils import generate_basket_token
 
 
@@ -54,56 +48,34 @@ log = logging.getLogger(__name__)
 
 
 class BasketService(BaseService):
-    async def get_show_scheme(self, obj: Basket) -> BasketShow:
+    show_schema = BasketShow
+
+    async def get_basket_summary(self, basket: Basket) -> BasketShow:
+        """Basket with totals from an aggregate query, without items"""
+        total_value, total_items = await self.uow.basket.get_totals(
+            basket.id
+        )
         return BasketShow(
-            id=obj.id,
-            user_id=obj.user_id,
-            basket_token=obj.basket_token,
-            total_value=obj.total_value,
-            total_items=obj.total_items,
-            items=BasketItemList(
-                objects_count=obj.total_items,
-                results=[
-                    BasketItemShow(
-                        id=item.id,
-                        product_id=item.product_id,
-                        color_id=item.color_id,
-                        size_id=item.size_id,
-                        covering_id=item.covering_id,
-                        glass_color_id=item.glass_color_id,
-                        material=item.material,
-                        type_of_platband=item.type_of_platband,
-                        orientation=item.orientation,
-                        with_glass=item.with_glass,
-                        quantity=item.quantity,
-                        total_price=item.total_price,
-                        product=await ProductService(self.uow).get_show_scheme(
-                            item.product,
-                        ),
-                    )
-                    for item in obj.items
-                ],
-            ),
+            id=basket.id,
+            user_id=basket.user_id,
+            basket_token=basket.basket_token,
+            total_value=total_value,
+            total_items=total_items,
         )
 
     async def get_basket(
         self,
-        authorization: str | None = None,
+        user: Optional[AuthUser] = None,
         basket_token: str = None,
+        with_items: bool = True,
     ) -> BasketShow:
         try:
             async with self.uow:
                 basket = None
-                if authorization:
-                    user_id = await UserService(self.uow)._user_id_from_jwt(
-                        authorization
+                if user:
+                    basket = await self.uow.basket.get_by_user_id(
+                        user.id, load_items=with_items
                     )
-                    if not user_id:
-                        raise InvalidCredentialsException()
-                    user = await self.uow.user.get_by_id(obj_id=user_id)
-                    if not user:
-                        raise UserNotFoundByIdException()
-                    basket = await self.uow.basket.get_by_user_id(user.id)
                     if not basket:
                         basket_id = await self.uow.basket.create(
                             obj_in=BasketCreate(
@@ -114,7 +86,7 @@ class BasketService(BaseService):
                 else:
                     if basket_token:
                         basket = await self.uow.basket.get_by_token(
-                            token=basket_token
+                            token=basket_token, load_items=with_items
                         )
                     else:
                         basket_id = await self.uow.basket.create(
@@ -124,7 +96,11 @@ class BasketService(BaseService):
                         )
                 await self.uow.commit()
                 if not basket:
-                    basket = await self.uow.basket.get_by_id(obj_id=basket_id)
+                    basket = await self.uow.basket.get_by_id(
+                        obj_id=basket_id, load_items=with_items
+                    )
+                if not with_items:
+                    return await self.get_basket_summary(basket)
                 return await self.get_show_scheme(basket)
         except SQLAlchemyError as e:
             log.exception(e)
@@ -133,53 +109,30 @@ class BasketService(BaseService):
     async def add_item(
         self,
         item_data: BasketItemCreate,
-        authorization: str | None = None,
+        user: Optional[AuthUser] = None,
         basket_token: str | None = None,
+        with_items: bool = True,
     ) -> BasketShow:
+        """
+        Add or increase the item with one upsert, which also returns the
+        basket totals. Items are loaded only when `with_items` is set.
+        A missing product fails the foreign key and the upsert.
+        """
+        if not user and not basket_token:
+            raise BasketGetException()
         try:
             async with self.uow:
-                if authorization:
-                    user_id = await UserService(self.uow)._user_id_from_jwt(
-                        authorization
-                    )
-                    if not user_id:
-                        raise InvalidCredentialsException()
-                    user = await self.uow.user.get_by_id(obj_id=user_id)
-                    if not user:
-                        raise UserNotFoundByIdException()
-                    basket = await self.uow.basket.get_by_user_id(user.id)
-                else:
-                    basket = await self.uow.basket.get_by_token(
-                        token=basket_token
-                    )
+                basket = await self.uow.basket.add_item(
+                    obj_in=item_data,
+                    user_id=user.id if user else None,
+                    basket_token=basket_token,
+                )
                 if not basket:
                     raise BasketGetException()
-                item_data.basket_id = basket.id
-                product = await self.uow.product.get_by_id(
-                    obj_id=item_data.product_id
-                )
-                if not product:
-                    raise BasketItemAddException(
-                        product_id=item_data.product_id
-                    )
-                if await self.uow.basket_item.exists_by_attrs(
-                    attrs={
-                        self.uow.basket_item.model.product_id: item_data.product_id,
-                        self.uow.basket_item.model.basket_id: basket.id,
-                    }
-                ):
-                    basket_item = await self.uow.basket_item.get_by_attrs(
-                        {
-                            self.uow.basket_item.model.product_id: item_data.product_id,
-                            self.uow.basket_item.model.basket_id: basket.id,
-                        }
-                    )
-                    basket_item.quantity += (
-                        item_data.quantity if item_data.quantity else 1
-                    )
-                else:
-                    await self.uow.basket_item.create(obj_in=item_data)
                 await self.uow.commit()
+                if not with_items:
+                    return BasketShow(**basket._mapping)
+                basket = await self.uow.basket.get_by_id(obj_id=basket.id)
                 return await self.get_show_scheme(basket)
         except SQLAlchemyError as e:
             log.exception(e)
@@ -189,20 +142,12 @@ class BasketService(BaseService):
         self,
         item_data: BasketItemUpdate,
         item_id: int,
-        authorization: str | None = None,
+        user: Optional[AuthUser] = None,
         basket_token: str | None = None,
     ):
         try:
             async with self.uow:
-                if authorization:
-                    user_id = await UserService(self.uow)._user_id_from_jwt(
-                        authorization
-                    )
-                    if not user_id:
-                        raise InvalidCredentialsException()
-                    user = await self.uow.user.get_by_id(obj_id=user_id)
-                    if not user:
-                        raise UserNotFoundByIdException()
+                if user:
                     basket = await self.uow.basket.get_by_user_id(user.id)
                 else:
                     basket = await self.uow.basket.get_by_token(
@@ -242,89 +187,33 @@ class BasketService(BaseService):
 class OrderService(BaseService):
     filter_processor = OrderFilterProcessor
     list_schema = OrderListSchema
-
-    async def get_show_scheme(self, obj: Order) -> OrderShow:
-        return OrderShow(
-            id=obj.id,
-            user_id=obj.user_id,
-            full_name=obj.full_name,
-            phone=obj.phone,
-            email=obj.email,
-            region=obj.region,
-            city_or_settlement=obj.city_or_settlement,
-            warehouse=obj.warehouse,
-            pickup=obj.pickup,
-            delivery_address=obj.delivery_address,
-            items=OrderItemList(
-                objects_count=obj.total_items,
-                results=[
-                    OrderItemShow(
-                        id=item.id,
-                        product_id=item.product_id,
-                        color_id=item.color_id,
-                        size_id=item.size_id,
-                        covering_id=item.covering_id,
-                        glass_color_id=item.glass_color_id,
-                        material=item.material,
-                        type_of_platband=item.type_of_platband,
-                        orientation=item.orientation,
-                        with_glass=item.with_glass,
-                        quantity=item.quantity,
-                        total_price=item.total_price,
-                        product=await ProductService(self.uow).get_show_scheme(
-                            item.product,
-                        ),
-                    )
-                    for item in obj.items
-                ],
-            ),
-            created_at=obj.created_at,
-            updated_at=obj.updated_at,
-            total_items=obj.total_items,
-            total_value=obj.total_value,
-            additional_info=obj.additional_info,
-            status=obj.status,
-            status_date_to=obj.status_date_to,
-        )
+    show_schema = OrderShow
 
     async def create_order(
         self,
         data: OrderCreate,
-        authorization: str | None = None,
+        user: Optional[AuthUser] = None,
         basket_token: str | None = None,
     ):
+        if not user and not basket_token:
+            raise BasketGetException()
         try:
             async with self.uow:
-                order = await self.uow.order.create(obj_in=data)
-                if authorization:
-                    user_id = await UserService(self.uow)._user_id_from_jwt(
-                        authorization
-                    )
-                    if not user_id:
-                        raise InvalidCredentialsException()
-                    user = await self.uow.user.get_by_id(obj_id=user_id)
-                    if not user:
-                        raise UserNotFoundByIdException()
-                    order.user_id = user.id
-                    basket = await self.uow.basket.get_by_user_id(user.id)
-                else:
-                    basket = await self.uow.basket.get_by_token(
-                        token=basket_token
-                    )
-                if not basket:
+                created = await self.uow.order.create_from_basket(
+                    obj_in=data,
+                    user_id=user.id if user else None,
+                    basket_token=basket_token,
+                )
+                if not created:
                     raise BasketGetException()
-                basket.clear()
-                await self.uow.add_all([order, basket])
-                await self.uow.flush()
-
-                for item_data in data.items:
-                    order_item = await self.uow.order_item.create(
-                        obj_in=item_data,
-                        order_id=order.id,
+                if created.unknown_product_id is not None:
+                    raise BasketItemAddException(
+                        product_id=created.unknown_product_id
                     )
-                    await self.uow.add(order_item)
+                if not created.items_count:
+                    raise BasketGetException()
                 await self.uow.commit()
-                order = await self.uow.order.get_by_id(obj_id=order.id)
+                order = await self.uow.order.get_by_id(obj_id=created.id)
                 return await self.get_show_scheme(order)
         except SQLAlchemyError as e:
             log.exception(e)
@@ -390,30 +279,19 @@ class OrderService(BaseService):
 
     async def get_orders_for_user(
         self,
-        authorization: str,
+        user: AuthUser,
         pagination: Optional[PaginationParams] = None,
         filters_decoder: Optional[FiltersDecoder] = None,
     ) -> OrderListSchema | list[OrderShow]:
         try:
             async with self.uow:
-                if authorization:
-                    user_id = await UserService(self.uow)._user_id_from_jwt(
-                        authorization
-                    )
-                    if not user_id:
-                        raise InvalidCredentialsException()
-                    user = await self.uow.user.get_by_id(obj_id=user_id)
-                    if not user:
-                        raise UserNotFoundByIdException()
-                    return await self.get_obj_list(
-                        repo=self.uow.order,
-                        options=await self.uow.order._add_default_options(),
-                        pagination_params=pagination,
-                        filters_decoder=filters_decoder,
-                        filters=[self.uow.order.model.user_id == user.id],
-                    )
-                else:
-                    raise InvalidCredentialsException()
+                return await self.get_obj_list(
+                    repo=self.uow.order,
+                    options=await self.uow.order._add_default_options(),
+                    pagination_params=pagination,
+                    filters_decoder=filters_decoder,
+                    filters=[self.uow.order.model.user_id == user.id],
+                )
         except SQLAlchemyError as e:
             log.exception(e)
             raise InvalidCredentialsException()
@@ -497,7 +375,7 @@ class OrderService(BaseService):
                     row = [
                         product.name,
                         product.sku,
-                        product.price,
+                        item.price,
                         item.quantity,
                         item.total_price,
                     ]
@@ -539,6 +417,53 @@ class OrderService(BaseService):
             log.exception(e)
             raise OrderGetException(order_id=order_id)
 
+    async def export_orders(
+        self,
+        export_format: OrderExportFormatEnum = OrderExportFormatEnum.CSV,
+        filters_decoder: Optional[FiltersDecoder] = None,
+        created_from: Optional[datetime.date] = None,
+        created_to: Optional[datetime.date] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Chunks of a CSV or XLSX file of the orders matching the filters
+        and created between the dates (both included), one row per item.
+        Filters are checked here, before the response starts.
+        """
+        filters = []
+        if created_from:
+            filters.append(Order.created_at >= created_from)
+        if created_to:
+            filters.append(
+                Order.created_at < created_to + datetime.timedelta(days=1)
+            )
+        filters = await self.process_filters(filters, filters_decoder)
+        return self._stream_export(EXPORT_WRITERS[export_format](), filters)
+
+    async def _stream_export(
+        self,
+        writer: OrderExportWriter,
+        filters: Optional[list],
+    ) -> AsyncIterator[bytes]:
+        try:
+            async with self.uow:
+                yield writer.start()
+                async for orders in self.uow.order.iter_export_batches(
+                    filters=filters,
+                    batch_size=settings.pagination.export_batch_size,
+                ):
+                    chunk = writer.write_rows(
+                        row for order in orders for row in order_rows(order)
+                    )
+                    # Compressed formats buffer small batches
+                    if chunk:
+                        yield chunk
+                yield writer.finish()
+        except SQLAlchemyError as e:
+            # The response has started, re-raising aborts the connection
+            # so the client sees a failed download, not a complete file
+            log.exception(e)
+            raise
+
     async def update_orders_by_status_date_to(self):
         try:
             async with self.uow:
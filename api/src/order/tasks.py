@@ -1,7 +1,6 @@
-import asyncio
 import logging
 
-from ..core.celery import app as celery_app
+from ..core.celery import app as celery_app, run_async
 from ..core.db.unitofwork import UnitOfWork
 
 from .service import OrderService
@@ -13,7 +12,7 @@ log = logging.getLogger(__name__)
 @celery_app.task(name="update_order_status_by_status_date_to")
 def update_order_status_by_status_date_to():
     try:
-        asyncio.run(
+        run_async(
             OrderService(UnitOfWork()).update_orders_by_status_date_to(),
         )
     except Exception as e:
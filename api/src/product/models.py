@@ -1,9 +1,9 @@
 from enum import Enum as PyEnum
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Computed, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.dialects.postgresql import ENUM, JSONB
+from sqlalchemy.dialects.postgresql import ENUM, JSONB, TSVECTOR
 
 from ..core.db.base import Base
 from ..core.db.mixins import BaseModelMixin
@@ -13,7 +13,10 @@ from .enums import (
     ProductOrientationEnum,
     ProductTypeOfPlatbandEnum,
 )
-from .utils import _default_product_description_json
+from .utils import (
+    _default_product_description_json,
+    PRODUCT_SEARCH_VECTOR_SQL,
+)
 from .mixins import BaseProductRelMixin
 
 
@@ -116,6 +119,31 @@ class ProductGlassColor(BaseProductRelMixin, Base):
 
 class Product(BaseModelMixin, Base):
     __label__ = "Product"
+    __table_args__ = (
+        Index(
+            "ix_product_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_product_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_product_sku_trgm",
+            "sku",
+            postgresql_using="gin",
+            postgresql_ops={"sku": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_product_description_path_ops",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "jsonb_path_ops"},
+        ),
+    )
 
     name: Mapped[str] = mapped_column(nullable=True, index=True, doc="Name")
     sku: Mapped[str] = mapped_column(nullable=True, index=True, doc="SKU")
@@ -166,6 +194,24 @@ class Product(BaseModelMixin, Base):
         doc="Covering ID",
     )
 
+    main_photo: Mapped[str] = mapped_column(
+        nullable=True,
+        doc="Main photo, kept in sync by the photo write paths",
+    )
+    photo_index: Mapped[dict] = mapped_column(
+        JSONB,
+        nullable=True,
+        deferred=True,
+        doc="Photo lookups, see build_product_photo_index",
+    )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(PRODUCT_SEARCH_VECTOR_SQL, persisted=True),
+        nullable=True,
+        deferred=True,
+        doc="Full-text search document, generated by Postgres",
+    )
+
     category: Mapped[Category] = relationship(doc="Category")
     covering: Mapped[ProductCovering | None] = relationship(doc="Covering")
     photos: Mapped[list["ProductPhoto"]] = relationship(
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, status, Request
+from typing import Optional
 
+from fastapi import APIRouter, status, Request, Query
+
+from ..core.caching import cache
 from ..core.db.dependencies import uowDEP
 from ..core.dependencies import pagination_params
 
@@ -15,7 +18,13 @@ from .schemas import (
     ProductUpdate,
     ProductShow,
     ProductListSchema,
+    ProductCardShow,
+    ProductCardListSchema,
+    ProductSearchShow,
+    ProductSearchListSchema,
+    ProductFacets,
     ProductPhotoUpdate,
+    ProductPhotoShow,
     CategoryCreate,
     CategoryUpdate,
     CategoryShow,
@@ -29,7 +38,19 @@ from .schemas import (
     ProductRelShow,
     ProductRelListSchema,
 )
-from .enums import ProductRelModelEnum
+from .enums import (
+    ProductRelModelEnum,
+    ProductPhotoDepEnum,
+    ProductOrientationEnum,
+    ProductTypeOfPlatbandEnum,
+)
+from .utils import (
+    CATALOG_CACHE_TAG,
+    CATALOG_LIST_CACHE_TAG,
+    CATEGORY_CACHE_TAG,
+    PRODUCT_CACHE_TAG,
+    PRODUCT_SIZE_CACHE_TAG,
+)
 
 from ..utils.processors.filters.dependencies import filters_decoder
 
@@ -95,6 +116,7 @@ async def delete_product_rel_object(
     status_code=status.HTTP_200_OK,
     tags=["Product related"],
 )
+@cache(expire=300, tags=[CATALOG_CACHE_TAG], as_response=True)
 async def get_all_product_rel_objects(
     uow: uowDEP,
     rel_model: ProductRelModelEnum,
@@ -113,11 +135,12 @@ async def get_all_product_rel_objects(
     status_code=status.HTTP_200_OK,
     tags=["Product related"],
 )
+@cache(expire=300, tags=[CATALOG_CACHE_TAG], as_response=True)
 async def get_product_rel_object(
     uow: uowDEP,
     rel_model: ProductRelModelEnum,
     rel_obj_id: int,
-):
+) -> ProductRelShow:
     return await ProductRelService(uow).get_product_rel_obj(
         rel_model=rel_model,
         rel_obj_id=rel_obj_id,
@@ -175,6 +198,7 @@ async def delete_product_size(
     status_code=status.HTTP_200_OK,
     tags=["Product size"],
 )
+@cache(expire=300, tags=[CATALOG_CACHE_TAG], as_response=True)
 async def get_all_product_sizes(
     uow: uowDEP,
     pagination: pagination_params,
@@ -192,6 +216,11 @@ async def get_all_product_sizes(
     response_model=ProductSizeShow,
     tags=["Product size"],
 )
+@cache(
+    expire=300,
+    tags=[CATALOG_CACHE_TAG, PRODUCT_SIZE_CACHE_TAG + ":{size_id}"],
+    as_response=True,
+)
 async def get_product_size(
     uow: uowDEP,
     size_id: int,
@@ -252,6 +281,7 @@ async def delete_category(
     status_code=status.HTTP_200_OK,
     tags=["Category"],
 )
+@cache(expire=300, tags=[CATALOG_CACHE_TAG], as_response=True)
 async def get_all_categories(
     uow: uowDEP,
     pagination: pagination_params,
@@ -269,6 +299,11 @@ async def get_all_categories(
     response_model=CategoryShow,
     tags=["Category"],
 )
+@cache(
+    expire=300,
+    tags=[CATALOG_CACHE_TAG, CATEGORY_CACHE_TAG + ":{category_id}"],
+    as_response=True,
+)
 async def get_category(
     uow: uowDEP,
     category_id: int,
@@ -328,6 +363,11 @@ async def product_delete(
     status_code=status.HTTP_200_OK,
     tags=["Product"],
 )
+@cache(
+    expire=300,
+    tags=[CATALOG_CACHE_TAG, CATALOG_LIST_CACHE_TAG],
+    as_response=True,
+)
 async def get_all_products(
     uow: uowDEP,
     pagination: pagination_params,
@@ -339,11 +379,91 @@ async def get_all_products(
     )
 
 
+@router.get(
+    "/list/cards/",
+    status_code=status.HTTP_200_OK,
+    tags=["Product"],
+)
+@cache(
+    expire=300,
+    tags=[CATALOG_CACHE_TAG, CATALOG_LIST_CACHE_TAG],
+    as_response=True,
+)
+async def get_product_cards(
+    uow: uowDEP,
+    pagination: pagination_params,
+    filters_decoder: filters_decoder = None,
+) -> ProductCardListSchema | list[ProductCardShow]:
+    """Slim product list for catalog cards, see /{product_id}/ for details"""
+    return await ProductService(uow).get_product_card_list(
+        pagination=pagination,
+        filters_decoder=filters_decoder,
+    )
+
+
+@router.get(
+    "/facets/",
+    status_code=status.HTTP_200_OK,
+    response_model=ProductFacets,
+    tags=["Product"],
+)
+@cache(
+    expire=300,
+    stale_ttl=86400,
+    lock=True,
+    tags=[CATALOG_CACHE_TAG, CATALOG_LIST_CACHE_TAG],
+    as_response=True,
+)
+async def get_product_facets(
+    uow: uowDEP,
+    filters_decoder: filters_decoder = None,
+) -> ProductFacets:
+    """
+    Product counts per category, covering, glass availability and
+    price range for the filter sidebar, with the same filters as /list/
+    """
+    return await ProductService(uow).get_product_facets(
+        filters_decoder=filters_decoder,
+    )
+
+
+@router.get(
+    "/search/",
+    status_code=status.HTTP_200_OK,
+    tags=["Product"],
+)
+@cache(
+    expire=300,
+    tags=[CATALOG_CACHE_TAG, CATALOG_LIST_CACHE_TAG],
+    as_response=True,
+)
+async def search_products(
+    uow: uowDEP,
+    pagination: pagination_params,
+    q: str = Query(min_length=1, max_length=200),
+    filters_decoder: filters_decoder = None,
+) -> ProductSearchListSchema | list[ProductSearchShow]:
+    """
+    Full-text search over name, SKU and description with prefix
+    matching and typo tolerance, best matches first
+    """
+    return await ProductService(uow).search_products(
+        query=q,
+        pagination=pagination,
+        filters_decoder=filters_decoder,
+    )
+
+
 @router.get(
     "/list/category/{category_id}/",
     status_code=status.HTTP_200_OK,
     tags=["Product"],
 )
+@cache(
+    expire=300,
+    tags=[CATALOG_CACHE_TAG, CATALOG_LIST_CACHE_TAG],
+    as_response=True,
+)
 async def get_all_products_by_category(
     uow: uowDEP,
     category_id: int,
@@ -363,6 +483,11 @@ async def get_all_products_by_category(
     response_model=ProductShow,
     tags=["Product"],
 )
+@cache(
+    expire=300,
+    tags=[CATALOG_CACHE_TAG, PRODUCT_CACHE_TAG + ":{product_id}"],
+    as_response=True,
+)
 async def get_product(
     uow: uowDEP,
     product_id: int,
@@ -372,6 +497,39 @@ async def get_product(
     )
 
 
+@router.get(
+    "/{product_id}/photo/",
+    status_code=status.HTTP_200_OK,
+    response_model=Optional[ProductPhotoShow],
+    tags=["Product"],
+)
+@cache(
+    expire=300,
+    tags=[CATALOG_CACHE_TAG, PRODUCT_CACHE_TAG + ":{product_id}"],
+    as_response=True,
+)
+async def get_product_photo(
+    uow: uowDEP,
+    product_id: int,
+    dependency: Optional[ProductPhotoDepEnum] = None,
+    color_id: Optional[int] = None,
+    size_id: Optional[int] = None,
+    orientation: Optional[ProductOrientationEnum] = None,
+    with_glass: Optional[bool] = None,
+    type_of_platband: Optional[ProductTypeOfPlatbandEnum] = None,
+) -> Optional[ProductPhotoShow]:
+    """Photo of the configured variant, the main photo without filters"""
+    return await ProductPhotoService(uow).get_product_photo(
+        product_id=product_id,
+        dependency=dependency,
+        color_id=color_id,
+        size_id=size_id,
+        orientation=orientation,
+        with_glass=with_glass,
+        type_of_platband=type_of_platband,
+    )
+
+
 @router.post(
     "/add_photo/{product_id}/",
     status_code=status.HTTP_201_CREATED,
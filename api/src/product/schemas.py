@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 from ..core.schemas import MainSchema, BaseListSchema
 from .enums import (
@@ -112,9 +112,52 @@ class ProductShow(MainSchema):
     orientation_choice: bool
     category_id: int
     covering_id: Optional[int] = None
+    main_photo: Optional[str] = None
     photos: list[ProductPhotoShow] = []
 
 
+class ProductCardShow(MainSchema):
+    id: int
+    name: Optional[str] = None
+    sku: Optional[str] = None
+    price: int
+    category_id: int
+    covering_id: Optional[int] = None
+    main_photo: Optional[str] = None
+
+
+class ProductSearchShow(ProductCardShow):
+    rank: float
+    # Matched words wrapped in <b></b>
+    name_highlight: Optional[str] = None
+    description_highlight: Optional[str] = None
+
+
+class ProductFacetCount(MainSchema):
+    value: Optional[int] = None
+    count: int
+
+
+class ProductGlassFacetCount(MainSchema):
+    value: Optional[bool] = None
+    count: int
+
+
+class ProductPriceFacetCount(MainSchema):
+    # max is exclusive, None for the last bucket
+    min: Optional[int] = None
+    max: Optional[int] = None
+    count: int
+
+
+class ProductFacets(MainSchema):
+    total: int = 0
+    categories: list[ProductFacetCount] = []
+    coverings: list[ProductFacetCount] = []
+    have_glass: list[ProductGlassFacetCount] = []
+    prices: list[ProductPriceFacetCount] = []
+
+
 class CategoryCreate(BaseModel):
     name: str
     is_glass_available: bool
@@ -145,6 +188,11 @@ class CategoryShow(MainSchema):
     priority: Optional[int] = None
     allowed_sizes: list[int] = []
 
+    @field_validator("allowed_sizes", mode="before")
+    @classmethod
+    def allowed_sizes_to_ids(cls, v):
+        return [getattr(size, "id", size) for size in v]
+
 
 class ProductSizeCreate(BaseModel):
     height: int
@@ -183,6 +231,8 @@ class ProductRelShow(MainSchema):
 
 
 ProductListSchema = BaseListSchema[ProductShow]
+ProductCardListSchema = BaseListSchema[ProductCardShow]
+ProductSearchListSchema = BaseListSchema[ProductSearchShow]
 ProductSizeListSchema = BaseListSchema[ProductSizeShow]
 ProductRelListSchema = BaseListSchema[ProductRelShow]
 CategoryListSchema = BaseListSchema[CategoryShow]
\ No newline at end of file
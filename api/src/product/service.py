@@ -3,14 +3,15 @@ import json
 
 from typing import Optional, TypeVar
 
-from pydantic import BaseModel
+from pydantic import TypeAdapter
 
 from fastapi import Request
 from fastapi.datastructures import FormData
 
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 from sqlalchemy.exc import SQLAlchemyError
 
+from ..core.db.pagination import KeysetPage, Page
 from ..core.db.service import BaseService
 from ..core.dependencies import PaginationParams
 
@@ -31,6 +32,14 @@ from .schemas import (
     ProductUpdate,
     ProductShow,
     ProductListSchema,
+    ProductCardShow,
+    ProductCardListSchema,
+    ProductSearchShow,
+    ProductSearchListSchema,
+    ProductFacets,
+    ProductFacetCount,
+    ProductGlassFacetCount,
+    ProductPriceFacetCount,
     ProductPhotoCreate,
     ProductPhotoUpdate,
     ProductPhotoShow,
@@ -49,7 +58,18 @@ from .schemas import (
     ProductRelListSchema,
 )
 from .enums import ProductRelModelEnum, ProductPhotoDepEnum
-from .utils import _default_product_description_json
+from .utils import (
+    _default_product_description_json,
+    build_product_photo_index,
+    build_prefix_tsquery,
+    find_product_photo_id,
+    PRICE_FACET_BOUNDS,
+    CATALOG_CACHE_TAG,
+    CATALOG_LIST_CACHE_TAG,
+    CATEGORY_CACHE_TAG,
+    PRODUCT_CACHE_TAG,
+    PRODUCT_SIZE_CACHE_TAG,
+)
 from ..utils.processors.filters.decoder import FiltersDecoder
 from ..utils.processors.filters.product import (
     ProductFilterProcessor,
@@ -66,29 +86,25 @@ log = logging.getLogger(__name__)
 
 Repo = TypeVar("Repo")
 
+_card_list_adapter = TypeAdapter(list[ProductCardShow])
+_search_list_adapter = TypeAdapter(list[ProductSearchShow])
+
+# GROUPING() bits of the facet columns, set when the row doesn't group by it
+_FACET_GROUPING_BITS = {
+    "category_id": 0b1000,
+    "covering_id": 0b0100,
+    "have_glass": 0b0010,
+    "price_bucket": 0b0001,
+}
+_FACET_TOTAL_GROUPING = 0b1111
+
 
 class ProductService(BaseService):
     list_schema = ProductListSchema
     filter_processor = ProductFilterProcessor
-
-    async def get_show_scheme(self, obj) -> BaseModel:
-        return ProductShow(
-            id=obj.id,
-            name=obj.name,
-            sku=obj.sku,
-            price=obj.price,
-            description=obj.description,
-            have_glass=obj.have_glass,
-            material_choice=obj.material_choice,
-            type_of_platband_choice=obj.type_of_platband_choice,
-            orientation_choice=obj.orientation_choice,
-            category_id=obj.category_id,
-            covering_id=obj.covering_id,
-            photos=[
-                await ProductPhotoService(self.uow).get_show_scheme(photo)
-                for photo in obj.photos
-            ],
-        )
+    show_schema = ProductShow
+    cache_tag = PRODUCT_CACHE_TAG
+    list_cache_tags = (CATALOG_LIST_CACHE_TAG,)
 
     async def _clean_description(
         self,
@@ -137,6 +153,7 @@ class ProductService(BaseService):
                         data.description
                     )
                 product_id = await self.uow.product.create(obj_in=obj_in_data)
+                await self.invalidate_cache()
                 await self.uow.commit()
                 product = await self.uow.product.get_by_id(obj_id=product_id)
                 return await self.get_show_scheme(product)
@@ -183,6 +200,7 @@ class ProductService(BaseService):
                 product_id = await self.uow.product.update(
                     obj_in=obj_in_data, obj_id=product_id
                 )
+                await self.invalidate_cache(product_id)
                 await self.uow.commit()
                 product = await self.uow.product.get_by_id(obj_id=product_id)
                 return await self.get_show_scheme(product)
@@ -194,6 +212,7 @@ class ProductService(BaseService):
         try:
             async with self.uow:
                 await self.uow.product.delete_by_id(obj_id=product_id)
+                await self.invalidate_cache(product_id)
                 await self.uow.commit()
         except SQLAlchemyError as e:
             log.exception(e)
@@ -230,6 +249,156 @@ class ProductService(BaseService):
         except FilterException as e:
             raise FilterProcessException(e.message)
 
+    @staticmethod
+    def build_facets(rows) -> ProductFacets:
+        """Split the GROUPING SETS rows of `get_facets` by facet"""
+        facets = ProductFacets()
+        counts: dict[str, list[tuple]] = {
+            name: [] for name in _FACET_GROUPING_BITS
+        }
+        for row in rows:
+            if row.grouping == _FACET_TOTAL_GROUPING:
+                facets.total = row.products_count
+                continue
+            for name, bit in _FACET_GROUPING_BITS.items():
+                if row.grouping == _FACET_TOTAL_GROUPING ^ bit:
+                    counts[name].append(
+                        (getattr(row, name), row.products_count)
+                    )
+
+        def by_count(items: list[tuple]) -> list[tuple]:
+            return sorted(items, key=lambda item: (-item[1], str(item[0])))
+
+        facets.categories = [
+            ProductFacetCount(value=value, count=count)
+            for value, count in by_count(counts["category_id"])
+        ]
+        facets.coverings = [
+            ProductFacetCount(value=value, count=count)
+            for value, count in by_count(counts["covering_id"])
+        ]
+        facets.have_glass = [
+            ProductGlassFacetCount(value=value, count=count)
+            for value, count in by_count(counts["have_glass"])
+        ]
+        bounds = (None, *PRICE_FACET_BOUNDS, None)
+        facets.prices = [
+            ProductPriceFacetCount(
+                min=bounds[bucket],
+                max=bounds[bucket + 1],
+                count=count,
+            )
+            for bucket, count in sorted(counts["price_bucket"])
+        ]
+        return facets
+
+    async def get_catalog_facets(self) -> ProductFacets:
+        """
+        Facets of the whole catalog, shared by every storefront page
+        without filters. Cached by the /facets/ route.
+        """
+        async with self.uow:
+            rows = await self.uow.product.get_facets()
+        return self.build_facets(rows)
+
+    async def get_product_facets(
+        self,
+        filters_decoder: Optional[FiltersDecoder] = None,
+    ) -> ProductFacets:
+        try:
+            if not (filters_decoder and filters_decoder.encoded_filters):
+                return await self.get_catalog_facets()
+            async with self.uow:
+                filters = await self.process_filters(
+                    filters_decoder=filters_decoder
+                )
+                rows = await self.uow.product.get_facets(filters=filters)
+                return self.build_facets(rows)
+        except SQLAlchemyError as e:
+            log.exception(e)
+            raise ObjectUpdateException("Product")
+        except FilterException as e:
+            raise FilterProcessException(e.message)
+
+    async def search_products(
+        self,
+        query: str,
+        pagination: Optional[PaginationParams] = None,
+        filters_decoder: Optional[FiltersDecoder] = None,
+    ) -> ProductSearchListSchema | list[ProductSearchShow]:
+        tsquery = build_prefix_tsquery(query)
+        if tsquery is None:
+            # Nothing can match, answer in the pagination mode asked for
+            empty_page = (
+                KeysetPage([], objects_count=0)
+                if pagination and pagination.use_cursor
+                else Page([], objects_count=0)
+            )
+            return self.make_list_response(
+                empty_page,
+                [],
+                pagination,
+                list_schema=ProductSearchListSchema,
+            )
+        try:
+            async with self.uow:
+                filters = await self.process_filters(
+                    filters_decoder=filters_decoder
+                )
+                paginated = self.is_paginated(pagination)
+                rows = await self.uow.product.search(
+                    query=query,
+                    tsquery=tsquery,
+                    filters=filters,
+                    with_pagination=paginated,
+                    pagination=pagination if paginated else None,
+                )
+                return self.make_list_response(
+                    rows,
+                    _search_list_adapter.validate_python(
+                        rows, from_attributes=True
+                    ),
+                    pagination,
+                    list_schema=ProductSearchListSchema,
+                )
+        except SQLAlchemyError as e:
+            log.exception(e)
+            raise ObjectUpdateException("Product")
+        except FilterException as e:
+            raise FilterProcessException(e.message)
+
+    async def get_product_card_list(
+        self,
+        pagination: Optional[PaginationParams] = None,
+        filters_decoder: Optional[FiltersDecoder] = None,
+    ) -> ProductCardListSchema | list[ProductCardShow]:
+        try:
+            async with self.uow:
+                filters = await self.process_filters(
+                    filters_decoder=filters_decoder
+                )
+                sort = await self.process_sort(filters_decoder)
+                paginated = self.is_paginated(pagination)
+                rows = await self.uow.product.get_card_list(
+                    filters=filters,
+                    sort=sort,
+                    with_pagination=paginated,
+                    pagination=pagination if paginated else None,
+                )
+                return self.make_list_response(
+                    rows,
+                    _card_list_adapter.validate_python(
+                        rows, from_attributes=True
+                    ),
+                    pagination,
+                    list_schema=ProductCardListSchema,
+                )
+        except SQLAlchemyError as e:
+            log.exception(e)
+            raise ObjectUpdateException("Product")
+        except FilterException as e:
+            raise FilterProcessException(e.message)
+
     async def get_products_by_category(
         self,
         category_id: int,
@@ -259,18 +428,21 @@ class ProductService(BaseService):
 
 
 class ProductPhotoService(BaseService):
-    async def get_show_scheme(self, obj) -> ProductPhotoShow:
-        return ProductPhotoShow(
-            id=obj.id,
-            product_id=obj.product_id,
-            photo=obj.photo,
-            is_main=obj.is_main,
-            dependency=obj.dependency,
-            with_glass=obj.with_glass,
-            orientation=obj.orientation,
-            type_of_platband=obj.type_of_platband,
-            color_id=obj.color_id,
-            size_id=obj.size_id,
+    show_schema = ProductPhotoShow
+
+    async def invalidate_cache(self, product_id: Optional[int] = None) -> None:
+        """Photos are part of the product, so drop the product entries"""
+        if product_id is not None:
+            await self.uow.invalidate_cache(
+                f"{PRODUCT_CACHE_TAG}:{product_id}", CATALOG_LIST_CACHE_TAG
+            )
+
+    async def refresh_photo_index(self, product_id: int) -> None:
+        """Rebuild the product's photo index, call before the commit"""
+        await self.uow.flush()
+        photos = await self.uow.product_photo.get_by_product_id(product_id)
+        await self.uow.product.update_photo_index(
+            product_id, build_product_photo_index(photos)
         )
 
     async def __prepare_photos_data(
@@ -328,8 +500,10 @@ class ProductPhotoService(BaseService):
                     photos=photos_data
                 )
                 await self.uow.add_all(photos)
+                await self.refresh_photo_index(product_id)
+                await self.invalidate_cache(product_id)
                 await self.uow.commit()
-                return [await self.get_show_scheme(photo) for photo in photos]
+                return self.serialize_list(photos)
         except SQLAlchemyError as e:
             log.exception(e)
             raise ObjectUpdateException("ProductPhoto")
@@ -341,9 +515,23 @@ class ProductPhotoService(BaseService):
     ) -> ProductPhotoShow:
         try:
             async with self.uow:
-                return await self.update_obj(
-                    self.uow.product_photo, data, photo_id
+                photo = await self.uow.product_photo.get_by_id(
+                    obj_id=photo_id
+                )
+                if not photo:
+                    raise IdNotFoundException(
+                        self.uow.product_photo.model, photo_id
+                    )
+                await self.uow.product_photo.update(
+                    obj_in=data, obj_id=photo_id
+                )
+                await self.refresh_photo_index(photo.product_id)
+                await self.invalidate_cache(photo.product_id)
+                await self.uow.commit()
+                photo = await self.uow.product_photo.get_by_id(
+                    obj_id=photo_id
                 )
+                return self.serialize(photo)
         except SQLAlchemyError as e:
             log.exception(e)
             raise ObjectUpdateException("ProductPhoto")
@@ -351,28 +539,57 @@ class ProductPhotoService(BaseService):
     async def delete_product_photo(self, photo_id: int) -> None:
         try:
             async with self.uow:
+                photo = await self.uow.product_photo.get_by_id(
+                    obj_id=photo_id
+                )
                 await self.uow.product_photo.delete_by_id(obj_id=photo_id)
+                if photo:
+                    await self.refresh_photo_index(photo.product_id)
+                    await self.invalidate_cache(photo.product_id)
                 await self.uow.commit()
         except SQLAlchemyError as e:
             log.exception(e)
             raise ObjectUpdateException("ProductPhoto")
 
+    async def get_product_photo(
+        self,
+        product_id: int,
+        **lookup,
+    ) -> Optional[ProductPhotoShow]:
+        """
+        Photo of a product variant, found in the product's photo index
+        (main photo without a lookup)
+        """
+        try:
+            async with self.uow:
+                product = await self.uow.product.get_by_attr(
+                    self.uow.product.model.id,
+                    product_id,
+                    options=[undefer(self.uow.product.model.photo_index)],
+                )
+                if not product:
+                    raise IdNotFoundException(
+                        self.uow.product.model, product_id
+                    )
+                photo_id = find_product_photo_id(product.photo_index, **lookup)
+                if photo_id is None:
+                    return None
+                photo = await self.uow.product_photo.get_by_id(
+                    obj_id=photo_id
+                )
+                return self.serialize(photo) if photo else None
+        except SQLAlchemyError as e:
+            log.exception(e)
+            raise ObjectUpdateException("ProductPhoto")
+
 
 class CategoryService(BaseService):
     filter_processor = CategoryFilterProcessor
     list_schema = CategoryListSchema
-
-    async def get_show_scheme(self, obj) -> CategoryShow:
-        return CategoryShow(
-            id=obj.id,
-            name=obj.name,
-            is_glass_available=obj.is_glass_available,
-            have_material_choice=obj.have_material_choice,
-            have_orientation_choice=obj.have_orientation_choice,
-            have_type_of_platband_choice=obj.have_type_of_platband_choice,
-            priority=obj.priority,
-            allowed_sizes=[size.id for size in obj.allowed_sizes],
-        )
+    show_schema = CategoryShow
+    cache_tag = CATEGORY_CACHE_TAG
+    # Products are ordered by category priority
+    list_cache_tags = (CATALOG_CACHE_TAG,)
 
     async def create_category(self, data: CategoryCreate) -> CategoryShow:
         try:
@@ -384,6 +601,7 @@ class CategoryService(BaseService):
                     obj_in=data, allowed_sizes=sizes
                 )
                 await self.uow.add(category)
+                await self.invalidate_cache()
                 await self.uow.commit()
                 return await self.get_show_scheme(category)
         except SQLAlchemyError as e:
@@ -416,6 +634,7 @@ class CategoryService(BaseService):
                     allowed_sizes=allowed_sizes,
                 )
                 await self.uow.add(category)
+                await self.invalidate_cache()
                 await self.uow.commit()
                 return await self.get_show_scheme(category)
         except SQLAlchemyError as e:
@@ -426,6 +645,7 @@ class CategoryService(BaseService):
         try:
             async with self.uow:
                 await self.uow.category.delete_by_id(obj_id=category_id)
+                await self.invalidate_cache()
                 await self.uow.commit()
         except SQLAlchemyError as e:
             log.exception(e)
@@ -471,15 +691,10 @@ class CategoryService(BaseService):
 class ProductSizeService(BaseService):
     filter_processor = ProductSizeFilterProcessor
     list_schema = ProductSizeListSchema
-
-    async def get_show_scheme(self, obj) -> ProductSizeShow:
-        return ProductSizeShow(
-            id=obj.id,
-            height=obj.height,
-            width=obj.width,
-            thickness=obj.thickness,
-            dimensions=obj.dimensions,
-        )
+    show_schema = ProductSizeShow
+    cache_tag = PRODUCT_SIZE_CACHE_TAG
+    # Sizes are shown in categories and referenced by photos
+    list_cache_tags = (CATALOG_CACHE_TAG,)
 
     async def create_product_size(
         self, data: ProductSizeCreate
@@ -511,6 +726,7 @@ class ProductSizeService(BaseService):
                 await self.uow.product_size.delete_by_id(
                     obj_id=product_size_id
                 )
+                await self.invalidate_cache()
                 await self.uow.commit()
         except SQLAlchemyError as e:
             log.exception(e)
@@ -548,13 +764,9 @@ class ProductSizeService(BaseService):
 class ProductRelService(BaseService):
     filter_processor = None
     list_schema = ProductRelListSchema
-
-    async def get_show_scheme(self, obj) -> BaseModel:
-        return ProductRelShow(
-            id=obj.id,
-            name=obj.name,
-            active=obj.active,
-        )
+    show_schema = ProductRelShow
+    # Products and photos reference the related models
+    list_cache_tags = (CATALOG_CACHE_TAG,)
 
     async def get_repo(
         self, rel_model: ProductRelModelEnum
@@ -605,6 +817,7 @@ class ProductRelService(BaseService):
             async with self.uow:
                 repo = await self.get_repo(rel_model)
                 await repo.delete_by_id(obj_id=rel_obj_id)
+                await self.invalidate_cache()
                 await self.uow.commit()
         except SQLAlchemyError as e:
             log.exception(e)
@@ -1,3 +1,38 @@
+import re
+
+# Cache tags of the catalog endpoints. Lists and filters depend on
+# products and their photos, everything depends on the related models.
+CATALOG_CACHE_TAG = "catalog"
+CATALOG_LIST_CACHE_TAG = "catalog:list"
+PRODUCT_CACHE_TAG = "product"
+CATEGORY_CACHE_TAG = "category"
+PRODUCT_SIZE_CACHE_TAG = "product_size"
+
+# Postgres has no Ukrainian stemmer, words are matched as typed
+PRODUCT_SEARCH_CONFIG = "simple"
+PRODUCT_SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{PRODUCT_SEARCH_CONFIG}', coalesce(name, '')), 'A')"
+    f" || setweight(to_tsvector('{PRODUCT_SEARCH_CONFIG}', coalesce(sku, '')), 'A')"
+    f" || setweight(jsonb_to_tsvector('{PRODUCT_SEARCH_CONFIG}',"
+    " coalesce(description, '{}'::jsonb), '[\"string\"]'), 'B')"
+)
+
+
+# Lower bounds of the price facet buckets, the last one is open-ended
+PRICE_FACET_BOUNDS = (0, 5000, 10000, 15000, 20000, 30000)
+
+
+def build_prefix_tsquery(query: str) -> str | None:
+    """
+    to_tsquery() text matching every word of the query as a prefix,
+    so "біл двер" finds "Біла двері". None when nothing is searchable.
+    """
+    words = re.findall(r"\w+", query.casefold())
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in dict.fromkeys(words))
+
+
 def _default_product_description_json() -> dict:
     """
     Default JSON for product description.
@@ -32,3 +67,75 @@ def _default_product_description_json() -> dict:
         "text": None,
     }
     return default_dict
+
+
+# Photo attributes the product photo index can be looked up by
+PHOTO_INDEX_ATTRS = (
+    "color_id",
+    "size_id",
+    "orientation",
+    "with_glass",
+    "type_of_platband",
+)
+
+
+def _photo_index_key(value) -> str:
+    value = getattr(value, "value", value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def build_product_photo_index(photos) -> dict:
+    """
+    Precomputed lookups over the product photos, stored with the product.
+    Example:
+    {
+        "main": {"id": 1, "photo": "https://.../1.webp"},
+        "by_dependency": {"color": [1, 2]},
+        "by_color_id": {"3": [1], "4": [2]},
+        "by_orientation": {"left": [1]},
+        ...
+    }
+    """
+    photos = sorted(photos, key=lambda photo: photo.id)
+    main = next((photo for photo in photos if photo.is_main), None)
+    index = {
+        "main": {"id": main.id, "photo": main.photo} if main else None,
+        "by_dependency": {},
+    }
+    for attr in PHOTO_INDEX_ATTRS:
+        index[f"by_{attr}"] = {}
+    for photo in photos:
+        index["by_dependency"].setdefault(
+            _photo_index_key(photo.dependency), []
+        ).append(photo.id)
+        for attr in PHOTO_INDEX_ATTRS:
+            value = getattr(photo, attr)
+            if value is not None:
+                index[f"by_{attr}"].setdefault(
+                    _photo_index_key(value), []
+                ).append(photo.id)
+    return index
+
+
+def find_product_photo_id(photo_index: dict | None, **lookup) -> int | None:
+    """
+    Id of the first photo matching every given lookup (dependency or
+    one of PHOTO_INDEX_ATTRS), the main photo if nothing is given
+    """
+    if not photo_index:
+        return None
+    lookup = {key: value for key, value in lookup.items() if value is not None}
+    if not lookup:
+        main = photo_index.get("main")
+        return main["id"] if main else None
+    matches = None
+    for attr, value in lookup.items():
+        ids = set(
+            photo_index.get(f"by_{attr}", {}).get(_photo_index_key(value), ())
+        )
+        matches = ids if matches is None else matches & ids
+        if not matches:
+            return None
+    return min(matches)
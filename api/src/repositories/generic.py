@@ -1,6 +1,6 @@
 import uuid
 
-from typing import Generic, TypeVar, Optional, Any
+from typing import AsyncIterator, Generic, TypeVar, Optional, Any
 
 from pydantic import BaseModel
 
@@ -12,11 +12,25 @@ from sqlalchemy import (
     exists,
     func,
     and_,
+    text,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.db.base import Base
+from ..core.db.pagination import (
+    CURSOR_NEXT,
+    CURSOR_PREV,
+    Page,
+    KeysetPage,
+    SortKey,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+)
 from ..core.dependencies import PaginationParams
+from ..core.enums import PaginationCountEnum
+from ..utils.processors.filters.base import SortPlan
+from ..utils.exceptions.http.pagination import InvalidCursorException
 from ..utils.base import clean_dict
 
 
@@ -40,6 +54,18 @@ class GenericRepository(Generic[T, CreateScheme, UpdateScheme]):
             query = query.join(join)
         return query
 
+    async def _add_sort_joins_to_query(
+        self,
+        query,
+        sort: SortPlan,
+        joins: Optional[list] = None,
+    ) -> None:
+        """Outer join the models of the sort the query doesn't join yet"""
+        for model, relationship in sort.joins:
+            if not joins or model not in joins:
+                query = query.outerjoin(relationship)
+        return query
+
     async def _add_filters_to_query(self, query, filters: list) -> None:
         query = query.where(and_(*filters))
         return query
@@ -52,6 +78,189 @@ class GenericRepository(Generic[T, CreateScheme, UpdateScheme]):
     ) -> None:
         return query.limit(page_size).offset((page - 1) * page_size)
 
+    async def _get_query_count(self, query) -> int:
+        """Exact count of the rows a list query returns"""
+        count_query = select(func.count()).select_from(
+            query.order_by(None).subquery()
+        )
+        res = await self.session.execute(count_query)
+        return res.scalar_one()
+
+    async def get_estimated_count(self) -> Optional[int]:
+        """
+        Row count from the planner statistics, free for large tables
+        but only as fresh as the last ANALYZE. None if never analyzed.
+        """
+        res = await self.session.execute(
+            text(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE oid = to_regclass(:table_name)"
+            ),
+            {"table_name": self.model.__table__.fullname},
+        )
+        estimate = res.scalar()
+        return estimate if estimate is not None and estimate >= 0 else None
+
+    async def _get_objects_count(
+        self,
+        query,
+        count_mode: PaginationCountEnum,
+    ) -> Optional[int]:
+        if count_mode == PaginationCountEnum.NONE:
+            return None
+        # Statistics know nothing about filters, count those exactly
+        if (
+            count_mode == PaginationCountEnum.ESTIMATED
+            and query.whereclause is None
+        ):
+            estimate = await self.get_estimated_count()
+            if estimate is not None:
+                return estimate
+        return await self._get_query_count(query)
+
+    async def _get_offset_page(
+        self,
+        query,
+        order_by: list,
+        pagination: PaginationParams,
+        as_rows: bool = False,
+    ) -> Page:
+        """
+        Page by LIMIT/OFFSET. The exact total comes from a window
+        count over the same filtered query, so it costs no extra
+        round-trip; without a count one extra row tells if there's
+        a next page.
+        """
+        count_mode = pagination.count
+        if (
+            count_mode == PaginationCountEnum.ESTIMATED
+            and query.whereclause is not None
+        ):
+            count_mode = PaginationCountEnum.EXACT
+        page_query = await self._add_pagination_to_query(
+            query.order_by(*order_by),
+            page=pagination.page,
+            page_size=pagination.size,
+        )
+
+        if count_mode == PaginationCountEnum.EXACT:
+            res = await self.session.execute(
+                page_query.add_columns(func.count().over())
+            )
+            rows = res.all()
+            objs = [row if as_rows else row[0] for row in rows]
+            objects_count = (
+                rows[0][-1]
+                if rows
+                # Past the last page, the window has no rows to count
+                else await self._get_query_count(query)
+            )
+            return Page(
+                objs,
+                objects_count=objects_count,
+                has_next=pagination.page * pagination.size < objects_count,
+            )
+
+        res = await self.session.execute(
+            page_query.limit(pagination.size + 1)
+        )
+        objs = res.all() if as_rows else res.scalars().all()
+        objects_count = await self._get_objects_count(query, count_mode)
+        return Page(
+            objs[: pagination.size],
+            objects_count=objects_count,
+            has_next=len(objs) > pagination.size,
+        )
+
+    async def _get_keyset_page(
+        self,
+        query,
+        order_by: list,
+        pagination: PaginationParams,
+        as_rows: bool = False,
+    ) -> KeysetPage:
+        """
+        Seek on (order_by columns, id) instead of skipping rows with
+        OFFSET, so deep pages cost the same as the first one and don't
+        shift when rows are inserted between requests.
+        """
+        objects_count = await self._get_objects_count(query, pagination.count)
+        keys = [SortKey.from_order_by(clause) for clause in order_by]
+        if not (keys and keys[-1].column is self.model.id):
+            keys.append(SortKey(self.model.id))
+        direction, values = CURSOR_NEXT, None
+        if pagination.cursor:
+            direction, raw_values = decode_cursor(pagination.cursor)
+            if len(raw_values) != len(keys):
+                raise InvalidCursorException()
+            values = [
+                key.parse(value) for key, value in zip(keys, raw_values)
+            ]
+        # Previous pages are read backwards from the cursor row
+        query_keys = (
+            [key.reversed() for key in keys]
+            if direction == CURSOR_PREV
+            else keys
+        )
+        if values is not None:
+            query = query.where(keyset_filter(query_keys, values))
+        query = (
+            query.add_columns(*(key.column for key in keys))
+            .order_by(*(key.order_by for key in query_keys))
+            .limit(pagination.size + 1)
+        )
+        res = await self.session.execute(query)
+        rows = res.all()
+        has_more = len(rows) > pagination.size
+        rows = rows[: pagination.size]
+        if direction == CURSOR_PREV:
+            rows.reverse()
+        if not rows:
+            return KeysetPage([], objects_count=objects_count)
+
+        has_next = has_more if direction == CURSOR_NEXT else True
+        has_previous = (
+            has_more if direction == CURSOR_PREV else values is not None
+        )
+        return KeysetPage(
+            [row if as_rows else row[0] for row in rows],
+            next_cursor=(
+                encode_cursor(list(rows[-1][-len(keys):]), CURSOR_NEXT)
+                if has_next
+                else None
+            ),
+            previous_cursor=(
+                encode_cursor(list(rows[0][-len(keys):]), CURSOR_PREV)
+                if has_previous
+                else None
+            ),
+            objects_count=objects_count,
+        )
+
+    async def _get_list(
+        self,
+        query,
+        order_by: list,
+        with_pagination: bool,
+        pagination: Optional[PaginationParams],
+        as_rows: bool = False,
+    ) -> list[T]:
+        """
+        Run a list query with the requested pagination. With `as_rows`
+        the query selects columns and rows are returned instead of
+        entities (extra pagination columns are appended to each row).
+        """
+        if with_pagination and pagination.use_cursor:
+            return await self._get_keyset_page(
+                query, order_by, pagination, as_rows
+            )
+        if with_pagination:
+            return await self._get_offset_page(
+                query, order_by, pagination, as_rows
+            )
+        res = await self.session.execute(query.order_by(*order_by))
+        return res.all() if as_rows else res.scalars().all()
+
     async def create(
         self,
         *,
@@ -147,25 +356,16 @@ class GenericRepository(Generic[T, CreateScheme, UpdateScheme]):
             if order_by is not None
             else [self.model.created_at.desc()]
         )
-        query = (
-            select(self.model)
-            .where(self.model.id.in_(obj_ids))
-            .order_by(*order_by)
-        )
+        query = select(self.model).where(self.model.id.in_(obj_ids))
         if joins:
             query = await self._add_joins_to_query(query, joins)
         if options:
             query = await self._add_options_to_query(query, options)
         if filters:
             query = await self._add_filters_to_query(query, filters)
-        if with_pagination:
-            query = await self._add_pagination_to_query(
-                query,
-                page=pagination.page,
-                page_size=pagination.size,
-            )
-        res = await self.session.execute(query)
-        return res.scalars().all()
+        return await self._get_list(
+            query, order_by, with_pagination, pagination
+        )
 
     async def get_all(
         self,
@@ -175,27 +375,57 @@ class GenericRepository(Generic[T, CreateScheme, UpdateScheme]):
         joins: Optional[list] = None,
         with_pagination: bool = False,
         pagination: Optional[PaginationParams] = None,
+        sort: Optional[SortPlan] = None,
     ) -> list[T]:
+        if sort is not None:
+            order_by = list(sort.order_by)
         order_by = (
             order_by + [self.model.created_at.desc()]
             if order_by is not None
             else [self.model.created_at.desc()]
         )
-        query = select(self.model).order_by(*order_by)
+        query = select(self.model)
         if joins:
             query = await self._add_joins_to_query(query, joins)
+        if sort is not None:
+            query = await self._add_sort_joins_to_query(query, sort, joins)
         if options:
             query = await self._add_options_to_query(query, options)
         if filters:
             query = await self._add_filters_to_query(query, filters)
-        if with_pagination:
-            query = await self._add_pagination_to_query(
-                query,
-                page=pagination.page,
-                page_size=pagination.size,
-            )
-        res = await self.session.execute(query)
-        return res.scalars().all()
+        return await self._get_list(
+            query, order_by, with_pagination, pagination
+        )
+
+    async def iter_batches(
+        self,
+        options: Optional[list] = None,
+        filters: Optional[list] = None,
+        order_by: Optional[list] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[list[T]]:
+        """
+        Objects read through a server-side cursor `batch_size` at a time.
+        Options load relationships per batch (selectinload, not joinedload
+        of collections). The session is emptied after every batch so
+        memory stays flat, objects of earlier batches are detached.
+        """
+        query = select(self.model).order_by(
+            *(order_by if order_by is not None else [self.model.id])
+        )
+        if options:
+            query = await self._add_options_to_query(query, options)
+        if filters:
+            query = await self._add_filters_to_query(query, filters)
+        result = await self.session.stream_scalars(
+            query.execution_options(yield_per=batch_size)
+        )
+        try:
+            async for batch in result.partitions():
+                yield batch
+                self.session.expunge_all()
+        finally:
+            await result.close()
 
     async def exists_by_id(self, *, obj_id: int | uuid.UUID) -> bool:
         query = exists().where(self.model.id == obj_id).select()
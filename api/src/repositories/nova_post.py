@@ -0,0 +1,144 @@
+from typing import Iterable
+
+from sqlalchemy import select, delete, exists, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .generic import GenericRepository
+
+from ..nova_post.models import (
+    NovaPostAreaModel,
+    NovaPostCityModel,
+    NovaPostWarehouseModel,
+)
+from ..nova_post.schemas import (
+    NovaPostArea,
+    NovaPostCity,
+    NovaPostWarehouse,
+)
+
+
+# Keeps a statement well under the 65535 bind parameters limit
+MIRROR_BATCH_SIZE = 1000
+
+
+class NovaPostMirrorRepository(GenericRepository):
+    def _get_order_by(self) -> list:
+        """Stable order, rows added upstream don't move the others"""
+        return [self.model.description, self.model.ref]
+
+    async def has_rows(self) -> bool:
+        res = await self.session.execute(exists(self.model).select())
+        return res.scalar_one()
+
+    async def get_checksums(self) -> dict[str, str]:
+        res = await self.session.execute(
+            select(self.model.ref, self.model.checksum)
+        )
+        return dict(res.tuples().all())
+
+    async def get_by_parent_ref(self, attr, ref: str) -> list:
+        res = await self.session.execute(
+            select(self.model)
+            .where(attr == ref)
+            .order_by(*self._get_order_by())
+        )
+        return res.scalars().all()
+
+    async def upsert(self, rows: list[dict]) -> None:
+        """Insert new rows and overwrite existing ones by ref"""
+        for start in range(0, len(rows), MIRROR_BATCH_SIZE):
+            stmt = insert(self.model).values(
+                rows[start:start + MIRROR_BATCH_SIZE]
+            )
+            columns = [key for key in rows[0] if key != "ref"]
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[self.model.ref],
+                    set_={
+                        **{key: stmt.excluded[key] for key in columns},
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                )
+            )
+
+    async def delete_by_refs(self, refs: Iterable[str]) -> None:
+        refs = list(refs)
+        for start in range(0, len(refs), MIRROR_BATCH_SIZE):
+            await self.session.execute(
+                delete(self.model).where(
+                    self.model.ref.in_(refs[start:start + MIRROR_BATCH_SIZE])
+                )
+            )
+
+
+class NovaPostAreaRepository(
+    NovaPostMirrorRepository,
+    GenericRepository[NovaPostAreaModel, NovaPostArea, NovaPostArea],
+):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, NovaPostAreaModel)
+
+    async def get_areas(self) -> list[NovaPostAreaModel]:
+        res = await self.session.execute(
+            select(self.model).order_by(*self._get_order_by())
+        )
+        return res.scalars().all()
+
+
+class NovaPostCityRepository(
+    NovaPostMirrorRepository,
+    GenericRepository[NovaPostCityModel, NovaPostCity, NovaPostCity],
+):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, NovaPostCityModel)
+
+    async def get_by_area_ref(self, area_ref: str) -> list[NovaPostCityModel]:
+        return await self.get_by_parent_ref(self.model.area_ref, area_ref)
+
+    async def get_search_rows(self) -> list:
+        res = await self.session.execute(
+            select(
+                self.model.ref,
+                self.model.description,
+                self.model.area_ref,
+                self.model.settlement_type_description,
+            ).order_by(*self._get_order_by())
+        )
+        return res.all()
+
+
+class NovaPostWarehouseRepository(
+    NovaPostMirrorRepository,
+    GenericRepository[
+        NovaPostWarehouseModel, NovaPostWarehouse, NovaPostWarehouse
+    ],
+):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, NovaPostWarehouseModel)
+
+    def _get_order_by(self) -> list:
+        # Numbers are digits, No 2 goes before No 10
+        return [
+            func.length(self.model.number),
+            self.model.number,
+            self.model.ref,
+        ]
+
+    async def get_by_city_ref(
+        self, city_ref: str
+    ) -> list[NovaPostWarehouseModel]:
+        return await self.get_by_parent_ref(self.model.city_ref, city_ref)
+
+    async def get_search_rows(self) -> list:
+        res = await self.session.execute(
+            select(
+                self.model.ref,
+                self.model.description,
+                self.model.city_ref,
+                self.model.short_address,
+                self.model.number,
+                self.model.city_description,
+            ).order_by(*self._get_order_by())
+        )
+        return res.all()
@@ -1,7 +1,20 @@
 import uuid
 import datetime
 
-from sqlalchemy import update, and_
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import (
+    Row,
+    select,
+    update,
+    delete,
+    and_,
+    cast,
+    func,
+    true,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -9,6 +22,7 @@ from .generic import GenericRepository
 
 
 from ..order.models import (
+    BASKET_ITEM_KEY_COLUMNS,
     Basket,
     BasketItem,
     Order,
@@ -28,6 +42,32 @@ from ..order.schemas import (
 from ..order.enums import OrderStatusEnum
 
 
+# Columns copied from a basket item into an order item
+ITEM_COLUMNS = [
+    *(key for key in BASKET_ITEM_KEY_COLUMNS if key != "basket_id"),
+    "quantity",
+]
+
+
+def _basket_owner_criteria(
+    user_id: Optional[uuid.UUID], basket_token: Optional[str]
+):
+    """Basket of the user, or of the token without a user"""
+    if user_id:
+        return Basket.user_id == user_id
+    return Basket.basket_token == basket_token
+
+
+def _typed_values(model, values: dict) -> list:
+    """Values to select for INSERT ... SELECT, typed with their columns,
+    as NULLs in a select list would be text"""
+    columns = model.__table__.c
+    return [
+        cast(value, columns[key].type).label(key)
+        for key, value in values.items()
+    ]
+
+
 class BasketRepository(GenericRepository[Basket, BasketCreate, BasketUpdate]):
     def __init__(self, session: AsyncSession):
         super().__init__(session, Basket)
@@ -55,16 +95,20 @@ class BasketRepository(GenericRepository[Basket, BasketCreate, BasketUpdate]):
         *,
         obj_id: uuid.UUID,
         options: list | None = None,
+        load_items: bool = True,
     ) -> Basket:
-        options = await self._add_default_options(options)
+        if load_items:
+            options = await self._add_default_options(options)
         return await super().get_by_id(obj_id=obj_id, options=options)
 
     async def get_by_user_id(
         self,
         user_id: uuid.UUID,
         options: list | None = None,
+        load_items: bool = True,
     ) -> Basket:
-        options = await self._add_default_options(options)
+        if load_items:
+            options = await self._add_default_options(options)
         return await self.get_by_attr(
             self.model.user_id,
             user_id,
@@ -75,14 +119,111 @@ class BasketRepository(GenericRepository[Basket, BasketCreate, BasketUpdate]):
         self,
         token: str,
         options: list | None = None,
+        load_items: bool = True,
     ) -> Basket:
-        options = await self._add_default_options(options)
+        if load_items:
+            options = await self._add_default_options(options)
         return await self.get_by_attr(
             self.model.basket_token,
             token,
             options=options,
         )
 
+    async def get_totals(self, basket_id: int) -> tuple[int, int]:
+        """Total value and total items of the basket in one aggregate"""
+        query = (
+            select(
+                func.coalesce(
+                    func.sum(BasketItem.quantity * Product.price), 0
+                ),
+                func.coalesce(func.sum(BasketItem.quantity), 0),
+            )
+            .join(Product, Product.id == BasketItem.product_id)
+            .where(BasketItem.basket_id == basket_id)
+        )
+        res = await self.session.execute(query)
+        total_value, total_items = res.one()
+        return total_value, total_items
+
+    async def add_item(
+        self,
+        *,
+        obj_in: BasketItemCreate,
+        user_id: Optional[uuid.UUID] = None,
+        basket_token: Optional[str] = None,
+    ) -> Optional[Row]:
+        """
+        Add the item to the basket of the user, or of the token without a
+        user, in one statement. An item with the same product variant
+        gets its quantity increased instead, which the unique variant
+        index keeps safe under concurrent adds.
+
+        Returns the basket id, user_id, basket_token and its totals with
+        the item added, or None when there is no such basket.
+        """
+        basket = (
+            select(self.model.id, self.model.user_id, self.model.basket_token)
+            .where(_basket_owner_criteria(user_id, basket_token))
+            .limit(1)
+            .cte("target_basket")
+        )
+
+        values = obj_in.model_dump(include=set(ITEM_COLUMNS))
+        values["quantity"] = obj_in.quantity or 1
+        insert_stmt = insert(BasketItem).from_select(
+            ["basket_id", *values],
+            select(basket.c.id, *_typed_values(BasketItem, values)),
+        )
+        upserted = insert_stmt.on_conflict_do_update(
+            index_elements=BASKET_ITEM_KEY_COLUMNS,
+            set_={
+                "quantity": BasketItem.quantity
+                + insert_stmt.excluded.quantity,
+                "updated_at": func.now(),
+            },
+        ).returning(
+            BasketItem.id,
+            BasketItem.basket_id,
+            BasketItem.product_id,
+            BasketItem.quantity,
+        ).cte("upserted_item")
+
+        # The statement sees the items as they were before the upsert,
+        # so the upserted row replaces its old version in the totals
+        items = union_all(
+            select(
+                BasketItem.basket_id,
+                BasketItem.product_id,
+                BasketItem.quantity,
+            ).where(
+                BasketItem.basket_id.in_(select(basket.c.id)),
+                BasketItem.id.not_in(select(upserted.c.id)),
+            ),
+            select(
+                upserted.c.basket_id,
+                upserted.c.product_id,
+                upserted.c.quantity,
+            ),
+        ).subquery("items")
+        query = (
+            select(
+                basket.c.id,
+                basket.c.user_id,
+                basket.c.basket_token,
+                func.coalesce(
+                    func.sum(items.c.quantity * Product.price), 0
+                ).label("total_value"),
+                func.coalesce(func.sum(items.c.quantity), 0).label(
+                    "total_items"
+                ),
+            )
+            .join(items, items.c.basket_id == basket.c.id)
+            .join(Product, Product.id == items.c.product_id)
+            .group_by(basket.c.id, basket.c.user_id, basket.c.basket_token)
+        )
+        res = await self.session.execute(query)
+        return res.one_or_none()
+
 
 class BasketItemRepository(
     GenericRepository[BasketItem, BasketItemCreate, BasketItemUpdate]
@@ -117,26 +258,131 @@ class OrderRepository(GenericRepository[Order, OrderCreate, OrderUpdate]):
             options.append(default_options)
         return options
 
-    async def create(
+    async def iter_export_batches(
+        self,
+        filters: Optional[list] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[list[Order]]:
+        """Orders with what the export reads, without the product photos"""
+        export_options = [
+            selectinload(self.model.items).options(
+                selectinload(OrderItem.product),
+                selectinload(OrderItem.color),
+                selectinload(OrderItem.size),
+                selectinload(OrderItem.covering),
+                selectinload(OrderItem.glass_color),
+            ),
+        ]
+        async for batch in self.iter_batches(
+            options=export_options,
+            filters=filters,
+            batch_size=batch_size,
+        ):
+            yield batch
+
+    async def create_from_basket(
         self,
         *,
         obj_in: OrderCreate,
-        clean_dict_ignore_keys: list | None = None,
-        **kwargs,
-    ) -> Order:
-        order = self.model(
-            full_name=obj_in.full_name,
-            phone=obj_in.phone,
-            email=obj_in.email,
-            region=obj_in.region,
-            city_or_settlement=obj_in.city_or_settlement,
-            warehouse=obj_in.warehouse,
-            pickup=obj_in.pickup,
-            delivery_address=obj_in.delivery_address,
-            additional_info=obj_in.additional_info,
-            status=OrderStatusEnum.NEW,
+        user_id: Optional[uuid.UUID] = None,
+        basket_token: Optional[str] = None,
+    ) -> Optional[Row]:
+        """
+        Place the order in one statement: insert the order, delete the
+        basket items and insert them as order items with the current
+        product prices. Items given in `obj_in.items` are ordered instead
+        of the basket ones, and the basket is emptied either way.
+
+        Returns a row of the order `id`, the `items_count` inserted and
+        the first requested `unknown_product_id` (None when all of them
+        exist), or None when there is no such basket. The caller rolls
+        back orders without items or with unknown products.
+        """
+        basket = (
+            select(Basket.id)
+            .where(_basket_owner_criteria(user_id, basket_token))
+            .limit(1)
+            .cte("target_basket")
+        )
+
+        values = obj_in.model_dump(exclude={"user_id", "items"})
+        values.update(user_id=user_id, status=OrderStatusEnum.NEW)
+        new_order = (
+            insert(self.model)
+            .from_select(
+                list(values),
+                select(*_typed_values(self.model, values)).select_from(
+                    basket
+                ),
+            )
+            .returning(self.model.id)
+            .cte("new_order")
         )
-        return order
+
+        moved_items = (
+            delete(BasketItem)
+            .where(BasketItem.basket_id.in_(select(basket.c.id)))
+            .returning(*[BasketItem.__table__.c[key] for key in ITEM_COLUMNS])
+            .cte("moved_items")
+        )
+        if obj_in.items:
+            items = union_all(
+                *[
+                    select(
+                        *_typed_values(
+                            OrderItem,
+                            item.model_dump(include=set(ITEM_COLUMNS)),
+                        )
+                    )
+                    for item in obj_in.items
+                ]
+            ).cte("requested_items")
+            unknown_product_id = (
+                select(items.c.product_id)
+                .where(
+                    ~select(Product.id)
+                    .where(Product.id == items.c.product_id)
+                    .exists()
+                )
+                .limit(1)
+                .scalar_subquery()
+            )
+        else:
+            items = moved_items
+            # Basket items reference existing products
+            unknown_product_id = None
+        order_items = (
+            insert(OrderItem)
+            .from_select(
+                ["order_id", *ITEM_COLUMNS, "price"],
+                select(
+                    new_order.c.id,
+                    *[items.c[key] for key in ITEM_COLUMNS],
+                    Product.price,
+                )
+                .select_from(items)
+                .join(Product, Product.id == items.c.product_id)
+                .join(new_order, true()),
+            )
+            .returning(OrderItem.id)
+            .cte("order_items")
+        )
+
+        # Statements in WITH run even when nothing selects from them
+        query = select(
+            new_order.c.id,
+            select(func.count())
+            .select_from(order_items)
+            .scalar_subquery()
+            .label("items_count"),
+            (
+                unknown_product_id
+                if unknown_product_id is not None
+                else cast(None, Product.id.type)
+            ).label("unknown_product_id"),
+        ).add_cte(moved_items)
+        res = await self.session.execute(query)
+        return res.one_or_none()
 
     async def get_by_id(
         self, *, obj_id: int | uuid.UUID, options: list | None = None
@@ -175,26 +421,3 @@ class OrderItemRepository(
 ):
     def __init__(self, session: AsyncSession):
         super().__init__(session, OrderItem)
-
-    async def create(
-        self,
-        *,
-        obj_in: OrderItemCreate,
-        order_id: int,
-        clean_dict_ignore_keys: list | None = None,
-        **kwargs,
-    ) -> OrderItem:
-        order_item = self.model(
-            order_id=order_id,
-            product_id=obj_in.product_id,
-            color_id=obj_in.color_id,
-            size_id=obj_in.size_id,
-            covering_id=obj_in.covering_id,
-            glass_color_id=obj_in.glass_color_id,
-            material=obj_in.material,
-            type_of_platband=obj_in.type_of_platband,
-            orientation=obj_in.orientation,
-            with_glass=obj_in.with_glass,
-            quantity=obj_in.quantity,
-        )
-        return order_item
@@ -2,6 +2,15 @@ from typing import TypeVar, Iterable, Optional
 
 from uuid import UUID
 
+from sqlalchemy import (
+    select,
+    update,
+    func,
+    or_,
+    tuple_,
+    literal_column,
+    Float,
+)
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -18,6 +27,7 @@ from ..product.models import (
     ProductCovering,
     ProductGlassColor,
 )
+from ..product.utils import PRODUCT_SEARCH_CONFIG, PRICE_FACET_BOUNDS
 from ..product.schemas import (
     ProductCreate,
     ProductUpdate,
@@ -32,6 +42,18 @@ from ..product.schemas import (
 )
 
 from ..utils.base import clean_dict
+from ..utils.processors.filters.base import SortPlan
+
+# Every string value of the product description JSON
+DESCRIPTION_STRINGS = (
+    func.jsonb_array_elements_text(
+        func.jsonb_path_query_array(
+            Product.description, 'strict $.** ? (@.type() == "string")'
+        )
+    )
+    .table_valued("value")
+    .render_derived()
+)
 
 ProductRel = TypeVar(
     "ProductRel",
@@ -82,6 +104,7 @@ class ProductRepository(
         filters: list | None = None,
         with_pagination: bool = False,
         pagination: Optional[PaginationParams] = None,
+        sort: Optional[SortPlan] = None,
     ) -> list[Product]:
         options = await self._add_default_options(options)
         return await super().get_all(
@@ -91,7 +114,175 @@ class ProductRepository(
             joins=[Category],
             with_pagination=with_pagination,
             pagination=pagination,
+            sort=sort,
+        )
+
+    async def get_card_list(
+        self,
+        filters: list | None = None,
+        with_pagination: bool = False,
+        pagination: Optional[PaginationParams] = None,
+        sort: Optional[SortPlan] = None,
+    ) -> list:
+        """
+        Rows with only the columns a catalog card needs and the main
+        photo, without the description or the photos
+        """
+        query = select(
+            self.model.id,
+            self.model.name,
+            self.model.sku,
+            self.model.price,
+            self.model.category_id,
+            self.model.covering_id,
+            self.model.main_photo,
+        ).join(Category)
+        order_by = [Category.priority]
+        if sort is not None:
+            query = await self._add_sort_joins_to_query(
+                query, sort, [Category]
+            )
+            order_by = list(sort.order_by)
+        if filters:
+            query = await self._add_filters_to_query(query, filters)
+        return await self._get_list(
+            query,
+            [*order_by, self.model.created_at.desc()],
+            with_pagination,
+            pagination,
+            as_rows=True,
+        )
+
+    async def search(
+        self,
+        query: str,
+        tsquery: str,
+        filters: list | None = None,
+        with_pagination: bool = False,
+        pagination: Optional[PaginationParams] = None,
+    ) -> list:
+        """
+        Card rows matching the full-text prefix query, or similar to the
+        query by trigrams (typos, partial SKUs), best matches first.
+        Highlights are only computed for the returned page.
+        """
+        ts_query = func.to_tsquery(PRODUCT_SEARCH_CONFIG, tsquery)
+        name_similarity = func.word_similarity(query, self.model.name)
+        sku_similarity = func.similarity(self.model.sku, query)
+        rank = (
+            func.ts_rank_cd(self.model.search_vector, ts_query, type_=Float)
+            + func.greatest(
+                func.coalesce(name_similarity, 0),
+                func.coalesce(sku_similarity, 0),
+            )
+        ).label("rank")
+        description_text = (
+            select(func.string_agg(DESCRIPTION_STRINGS.c.value, " "))
+            .scalar_subquery()
+        )
+        headline_options = "StartSel=<b>, StopSel=</b>, MaxFragments=2"
+        stmt = (
+            select(
+                self.model.id,
+                self.model.name,
+                self.model.sku,
+                self.model.price,
+                self.model.category_id,
+                self.model.covering_id,
+                self.model.main_photo,
+                rank,
+                func.ts_headline(
+                    PRODUCT_SEARCH_CONFIG,
+                    self.model.name,
+                    ts_query,
+                    "StartSel=<b>, StopSel=</b>, HighlightAll=true",
+                ).label("name_highlight"),
+                func.ts_headline(
+                    PRODUCT_SEARCH_CONFIG,
+                    description_text,
+                    ts_query,
+                    headline_options,
+                ).label("description_highlight"),
+            )
+            .join(Category)
+            .where(
+                or_(
+                    self.model.search_vector.op("@@")(ts_query),
+                    # word_similarity and similarity above the pg_trgm
+                    # thresholds, both served by the trigram indexes
+                    self.model.name.op("%>")(query),
+                    self.model.sku.op("%")(query),
+                )
+            )
+        )
+        if filters:
+            stmt = await self._add_filters_to_query(stmt, filters)
+        return await self._get_list(
+            stmt,
+            # Equal ranks are common, id keeps offset pages disjoint
+            [rank.desc(), self.model.id],
+            with_pagination,
+            pagination,
+            as_rows=True,
+        )
+
+    def get_price_bucket(self, bounds: tuple[int, ...] = PRICE_FACET_BOUNDS):
+        """Index of the price bucket, 0 below the first bound"""
+        return func.width_bucket(
+            self.model.price,
+            # Inlined, so the SELECT and GROUP BY expressions are identical
+            literal_column(f"ARRAY[{', '.join(str(int(b)) for b in bounds)}]"),
+        )
+
+    async def get_facets(self, filters: list | None = None) -> list:
+        """
+        Product counts per category, covering, glass availability and
+        price bucket, plus the total, in one GROUPING SETS query.
+        `grouping` tells which set a row belongs to, see
+        `ProductService.build_facets`.
+        """
+        price_bucket = self.get_price_bucket()
+        facet_columns = (
+            self.model.category_id,
+            self.model.covering_id,
+            self.model.have_glass,
+            price_bucket,
+        )
+        query = (
+            select(
+                *facet_columns[:3],
+                price_bucket.label("price_bucket"),
+                func.grouping(*facet_columns).label("grouping"),
+                func.count().label("products_count"),
+            )
+            .join(Category)
+            .group_by(
+                func.grouping_sets(
+                    *(tuple_(column) for column in facet_columns),
+                    tuple_(),
+                )
+            )
         )
+        if filters:
+            query = await self._add_filters_to_query(query, filters)
+        res = await self.session.execute(query)
+        return res.all()
+
+    async def update_photo_index(
+        self,
+        product_id: int,
+        photo_index: dict,
+    ) -> None:
+        main = photo_index.get("main")
+        stmt = (
+            update(self.model)
+            .where(self.model.id == product_id)
+            .values(
+                photo_index=photo_index,
+                main_photo=main["photo"] if main else None,
+            )
+        )
+        await self.session.execute(stmt)
 
     async def get_by_id(
         self,
@@ -137,6 +328,16 @@ class ProductPhotoRepository(
             instance_list.append(ProductPhoto(**photo_data))
         return instance_list
 
+    async def get_by_product_id(self, product_id: int) -> list[ProductPhoto]:
+        query = (
+            select(self.model)
+            .where(self.model.product_id == product_id)
+            .order_by(self.model.id)
+            .execution_options(populate_existing=True)
+        )
+        res = await self.session.execute(query)
+        return res.scalars().all()
+
 
 class CategoryRepository(
     GenericRepository[Category, CategoryCreate, CategoryUpdate]
@@ -204,12 +405,14 @@ class ProductRelRepository(
         filters: list | None = None,
         with_pagination: bool = False,
         pagination: Optional[PaginationParams] = None,
+        sort: Optional[SortPlan] = None,
     ) -> list[ProductRel]:
         return await super().get_all(
             options=options,
             filters=filters,
             with_pagination=with_pagination,
             pagination=pagination,
+            sort=sort,
         )
 
 
@@ -0,0 +1,74 @@
+"""
+Tokens verified per second on one core: the shared `JWTCodec` (PyJWT,
+key prepared once) against python-jose when it is installed, which
+decoded every token before, usually twice per request.
+
+    python -m src.scripts.benchmark_jwt --seconds 2
+"""
+
+import argparse
+import datetime
+import sys
+import time
+import uuid
+
+from ..core.config import settings
+from ..utils.token import JWTCodec
+
+
+def _rate(func, seconds: float) -> float:
+    """Calls per second of `func` in a single thread"""
+    func()
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            func()
+        calls += 100
+    return calls / (time.perf_counter() - start)
+
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description="JWT verification benchmark")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args(argv[1:])
+
+    codec = JWTCodec()
+    token = codec.encode(
+        {
+            "exp": datetime.datetime.now(datetime.UTC)
+            + datetime.timedelta(hours=1),
+            "sub": str(uuid.uuid4()),
+        }
+    )
+    if codec.decode(token) is None:
+        raise SystemExit("The codec rejected its own token")
+
+    results = [("codec", _rate(lambda: codec.decode(token), args.seconds))]
+    try:
+        from jose import jwt as jose_jwt
+    except ImportError:
+        print("python-jose is not installed, measuring the codec only")
+    else:
+        results.append(
+            (
+                "jose",
+                _rate(
+                    lambda: jose_jwt.decode(
+                        token,
+                        settings.secret_key,
+                        algorithms=[settings.jwt.algorithm],
+                    ),
+                    args.seconds,
+                ),
+            )
+        )
+
+    print(f"{settings.jwt.algorithm} tokens verified per second per core")
+    for label, rate in results:
+        print(f"{label:<6} {rate:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare password checks run on the event loop (how logins worked before)
+with the hashing pool, under concurrent logins. Besides the throughput,
+a ticker task measures how long the event loop was blocked, which is
+how long every other request on the worker waits.
+
+No database needed:
+
+    python -m src.scripts.benchmark_login --logins 64 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from ..core.config import settings
+from ..utils.hashing import (
+    Hashing,
+    get_hashing_executor,
+    shutdown_hashing_executor,
+)
+
+
+PASSWORD = "correct horse battery staple"
+
+
+async def _verify_on_loop(hashed_password: str) -> bool:
+    return Hashing.verify_password(PASSWORD, hashed_password)
+
+
+async def _verify_in_pool(hashed_password: str) -> bool:
+    return await Hashing.verify_password_async(PASSWORD, hashed_password)
+
+
+async def _ticker(stop: asyncio.Event, interval: float, lags: list) -> None:
+    """Record how late each tick wakes up"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(
+    verify,
+    hashed_password: str,
+    logins: int,
+    concurrency: int,
+) -> tuple[float, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            if not await verify(hashed_password):
+                raise SystemExit("Password check failed")
+
+    stop = asyncio.Event()
+    lags: list[float] = []
+    ticker = asyncio.create_task(_ticker(stop, 0.005, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return logins / elapsed, max(lags, default=0.0)
+
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description="Login hashing benchmark")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args(argv[1:])
+
+    hashed_password = Hashing.get_hashed_password(PASSWORD)
+    get_hashing_executor()
+    print(
+        f"bcrypt rounds {settings.hashing.bcrypt_rounds}, "
+        f"pool of {settings.hashing.max_workers} threads"
+    )
+    for label, verify in (
+        ("on loop", _verify_on_loop),
+        ("pool", _verify_in_pool),
+    ):
+        throughput, max_lag = asyncio.run(
+            run(verify, hashed_password, args.logins, args.concurrency)
+        )
+        print(
+            f"{label:<8} {throughput:8.1f} logins/s  "
+            f"max event loop stall {max_lag * 1000:8.1f} ms"
+        )
+    shutdown_hashing_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Compare the per-object async serialization that services used before
+(`[await self.get_show_scheme(obj) for obj in objs]` with a nested service
+per photo/item) with the batched `BaseService.serialize_list`.
+
+Runs on transient ORM objects, no database needed:
+
+    python -m src.scripts.benchmark_serializers --size 500 --repeat 20
+"""
+
+import argparse
+import asyncio
+import datetime
+import sys
+import time
+import uuid
+
+from ..core.db.service import BaseService
+from ..core.db.unitofwork import UnitOfWork  # noqa: F401, configures mappers
+from ..order.enums import OrderStatusEnum
+from ..order.models import Basket, BasketItem, Order, OrderItem
+from ..order.schemas import (
+    BasketItemList,
+    BasketItemShow,
+    BasketShow,
+    OrderItemList,
+    OrderItemShow,
+    OrderShow,
+)
+from ..order.service import BasketService, OrderService
+from ..product.enums import ProductPhotoDepEnum
+from ..product.models import Product, ProductPhoto
+from ..product.schemas import ProductPhotoShow, ProductShow
+from ..product.service import ProductService
+
+
+class LegacyPhotoService:
+    async def get_show_scheme(self, obj) -> ProductPhotoShow:
+        return ProductPhotoShow(
+            id=obj.id,
+            product_id=obj.product_id,
+            photo=obj.photo,
+            is_main=obj.is_main,
+            dependency=obj.dependency,
+            with_glass=obj.with_glass,
+            orientation=obj.orientation,
+            type_of_platband=obj.type_of_platband,
+            color_id=obj.color_id,
+            size_id=obj.size_id,
+        )
+
+
+class LegacyProductService:
+    async def get_show_scheme(self, obj) -> ProductShow:
+        return ProductShow(
+            id=obj.id,
+            name=obj.name,
+            sku=obj.sku,
+            price=obj.price,
+            description=obj.description,
+            have_glass=obj.have_glass,
+            material_choice=obj.material_choice,
+            type_of_platband_choice=obj.type_of_platband_choice,
+            orientation_choice=obj.orientation_choice,
+            category_id=obj.category_id,
+            covering_id=obj.covering_id,
+            photos=[
+                await LegacyPhotoService().get_show_scheme(photo)
+                for photo in obj.photos
+            ],
+        )
+
+
+async def _legacy_item(item, item_schema, **kwargs):
+    return item_schema(
+        id=item.id,
+        product_id=item.product_id,
+        color_id=item.color_id,
+        size_id=item.size_id,
+        covering_id=item.covering_id,
+        glass_color_id=item.glass_color_id,
+        material=item.material,
+        type_of_platband=item.type_of_platband,
+        orientation=item.orientation,
+        with_glass=item.with_glass,
+        quantity=item.quantity,
+        total_price=item.total_price,
+        product=await LegacyProductService().get_show_scheme(item.product),
+        **kwargs,
+    )
+
+
+class LegacyBasketService:
+    async def get_show_scheme(self, obj) -> BasketShow:
+        return BasketShow(
+            id=obj.id,
+            user_id=obj.user_id,
+            basket_token=obj.basket_token,
+            total_value=obj.total_value,
+            total_items=obj.total_items,
+            items=BasketItemList(
+                objects_count=obj.total_items,
+                results=[
+                    await _legacy_item(item, BasketItemShow)
+                    for item in obj.items
+                ],
+            ),
+        )
+
+
+class LegacyOrderService:
+    async def get_show_scheme(self, obj) -> OrderShow:
+        return OrderShow(
+            id=obj.id,
+            user_id=obj.user_id,
+            full_name=obj.full_name,
+            phone=obj.phone,
+            email=obj.email,
+            region=obj.region,
+            city_or_settlement=obj.city_or_settlement,
+            warehouse=obj.warehouse,
+            pickup=obj.pickup,
+            delivery_address=obj.delivery_address,
+            items=OrderItemList(
+                objects_count=obj.total_items,
+                results=[
+                    await _legacy_item(item, OrderItemShow, price=item.price)
+                    for item in obj.items
+                ],
+            ),
+            created_at=obj.created_at,
+            updated_at=obj.updated_at,
+            total_items=obj.total_items,
+            total_value=obj.total_value,
+            additional_info=obj.additional_info,
+            status=obj.status,
+            status_date_to=obj.status_date_to,
+        )
+
+
+def make_product(product_id: int, photos: int) -> Product:
+    product = Product(
+        id=product_id,
+        name=f"Door {product_id}",
+        sku=f"SKU-{product_id}",
+        price=1000 + product_id,
+        description={"text": "Door", "advantages": ["Solid"]},
+        have_glass=True,
+        material_choice=True,
+        type_of_platband_choice=False,
+        orientation_choice=True,
+        category_id=1,
+        covering_id=None,
+    )
+    product.photos = [
+        ProductPhoto(
+            id=product_id * 100 + photo_num,
+            product_id=product_id,
+            photo=f"/static/{product_id}_{photo_num}.webp",
+            is_main=photo_num == 0,
+            dependency=ProductPhotoDepEnum.COLOR,
+            color_id=photo_num,
+        )
+        for photo_num in range(photos)
+    ]
+    return product
+
+
+def make_items(
+    item_model, products: list[Product], with_price: bool = False
+) -> list:
+    return [
+        item_model(
+            id=num,
+            product_id=product.id,
+            product=product,
+            quantity=num % 3 + 1,
+            **({"price": product.price} if with_price else {}),
+        )
+        for num, product in enumerate(products)
+    ]
+
+
+def make_baskets(count: int, products: list[Product]) -> list[Basket]:
+    return [
+        Basket(
+            id=num,
+            basket_token=uuid.uuid4().hex,
+            items=make_items(BasketItem, products),
+        )
+        for num in range(count)
+    ]
+
+
+def make_orders(count: int, products: list[Product]) -> list[Order]:
+    now = datetime.datetime.now()
+    return [
+        Order(
+            id=num,
+            full_name="Test User",
+            phone="+380000000000",
+            email="user@example.com",
+            region="Kyiv",
+            city_or_settlement="Kyiv",
+            status=OrderStatusEnum.NEW,
+            created_at=now,
+            updated_at=now,
+            items=make_items(OrderItem, products, with_price=True),
+        )
+        for num in range(count)
+    ]
+
+
+async def _run_legacy(service, objs: list) -> list:
+    return [await service.get_show_scheme(obj) for obj in objs]
+
+
+def _timeit(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(
+    label: str,
+    legacy_service,
+    service: BaseService,
+    objs: list,
+    repeat: int,
+) -> None:
+    legacy = asyncio.run(_run_legacy(legacy_service, objs))
+    batched = service.serialize_list(objs)
+    if [obj.model_dump() for obj in legacy] != [
+        obj.model_dump() for obj in batched
+    ]:
+        raise SystemExit(f"{label}: serializers produce different output")
+
+    legacy_time = _timeit(
+        lambda: asyncio.run(_run_legacy(legacy_service, objs)), repeat
+    )
+    batched_time = _timeit(lambda: service.serialize_list(objs), repeat)
+    print(
+        f"{label:<10} {len(objs):>5} objs  "
+        f"per-object {legacy_time * 1000:8.2f} ms  "
+        f"batched {batched_time * 1000:8.2f} ms  "
+        f"x{legacy_time / batched_time:.1f}"
+    )
+
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description="Serializer benchmark")
+    parser.add_argument("--size", type=int, default=500, help="Page size")
+    parser.add_argument("--photos", type=int, default=6)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv[1:])
+
+    products = [make_product(num, args.photos) for num in range(args.size)]
+    item_products = products[: args.items]
+    bench(
+        "products",
+        LegacyProductService(),
+        ProductService(uow=None),
+        products,
+        args.repeat,
+    )
+    bench(
+        "baskets",
+        LegacyBasketService(),
+        BasketService(uow=None),
+        make_baskets(args.size, item_products),
+        args.repeat,
+    )
+    bench(
+        "orders",
+        LegacyOrderService(),
+        OrderService(uow=None),
+        make_orders(args.size, item_products),
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import time
+import uuid
+
+from dataclasses import dataclass
+from typing import Optional
+
+from ..core.caching import CacheStats, LocalCache, RedisCaching
+from ..core.config import settings
+from ..core.db.unitofwork import AbstractUnitOfWork
+from ..utils.exceptions.http.user import (
+    InvalidCredentialsException,
+    UserInactiveException,
+    UserNotFoundByIdException,
+)
+from ..utils.token import get_jwt_codec
+
+
+# Dropped by UserService when a user is updated or deleted
+USER_CACHE_TAG = "user"
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """Active user of a request, safe to share between requests"""
+
+    id: uuid.UUID
+    email: str
+    is_admin: bool
+
+
+auth_cache_stats = CacheStats()
+_claims_cache = LocalCache(settings.jwt.claims_cache_size)
+_users_cache = LocalCache(settings.jwt.user_cache_size)
+RedisCaching.register_local_cache(_users_cache)
+
+
+def user_cache_tag(user_id: uuid.UUID | str) -> str:
+    return f"{USER_CACHE_TAG}:{user_id}"
+
+
+def get_bearer_token(authorization: str) -> Optional[str]:
+    scheme, _, token = authorization.partition(" ")
+    token = token.strip()
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+async def get_token_claims(token: str) -> Optional[dict]:
+    """
+    Claims of a valid token. Decoded tokens are kept until they expire,
+    so a client sending the same token skips the signature check.
+    """
+    claims = _claims_cache.get(token, auth_cache_stats)
+    if isinstance(claims, dict):
+        return claims
+    claims = get_jwt_codec().decode(token)
+    if not claims:
+        return None
+    ttl = claims["exp"] - time.time()
+    if ttl > 0:
+        _claims_cache.set(token, claims, ttl, auth_cache_stats)
+    return claims
+
+
+async def get_active_user(
+    uow: AbstractUnitOfWork,
+    user_id: uuid.UUID,
+) -> AuthUser:
+    """
+    The user if it exists and is active. Found users are kept for
+    `user_cache_ttl` seconds or until the user changes.
+    """
+    key = str(user_id)
+    user = _users_cache.get(key, auth_cache_stats)
+    if isinstance(user, AuthUser):
+        return user
+    async with uow:
+        user_obj = await uow.user.get_by_id(obj_id=user_id)
+    if not user_obj:
+        raise UserNotFoundByIdException(key)
+    if not user_obj.is_active:
+        raise UserInactiveException(user_obj.email)
+    user = AuthUser(
+        id=user_obj.id,
+        email=user_obj.email,
+        is_admin=user_obj.is_admin,
+    )
+    _users_cache.set(
+        key,
+        user,
+        settings.jwt.user_cache_ttl,
+        auth_cache_stats,
+        tags=[user_cache_tag(user_id)],
+    )
+    return user
+
+
+async def authenticate(
+    uow: AbstractUnitOfWork,
+    authorization: str,
+) -> AuthUser:
+    """Active user of an `Authorization: Bearer <token>` header"""
+    token = get_bearer_token(authorization)
+    claims = await get_token_claims(token) if token else None
+    if not claims:
+        raise InvalidCredentialsException()
+    try:
+        user_id = uuid.UUID(claims["sub"])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCredentialsException()
+    return await get_active_user(uow, user_id)
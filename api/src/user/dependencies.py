@@ -1,7 +1,12 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
 from fastapi import Depends, Header
 
+from ..core.db.dependencies import uowDEP
+from ..utils.exceptions.http.user import InvalidCredentialsException
+
+from .auth import AuthUser, authenticate
+
 
 def get_authorization(
     authorization: str | None = Header(
@@ -13,3 +18,28 @@ def get_authorization(
 
 
 authorization = Annotated[str | None, Depends(get_authorization)]
+
+
+async def get_current_user(
+    authorization: authorization,
+    uow: uowDEP,
+) -> Optional[AuthUser]:
+    """
+    User of the request's bearer token, None without the header.
+    Resolved once per request, however many dependencies use it.
+    """
+    if not authorization:
+        return None
+    return await authenticate(uow, authorization)
+
+
+async def get_required_user(
+    user: Annotated[Optional[AuthUser], Depends(get_current_user)],
+) -> AuthUser:
+    if user is None:
+        raise InvalidCredentialsException()
+    return user
+
+
+current_user = Annotated[Optional[AuthUser], Depends(get_current_user)]
+required_user = Annotated[AuthUser, Depends(get_required_user)]
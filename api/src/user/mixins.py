@@ -1,10 +1,8 @@
 import uuid
 import datetime
 
-from jose import jwt
-from jose import JWTError
-
 from ..core.config import settings
+from ..utils.token import get_jwt_codec
 
 
 class JWTTokensMixin:
@@ -31,12 +29,7 @@ class JWTTokensMixin:
         if as_admin:
             claims["admin"] = True
 
-        encoded_jwt = jwt.encode(
-            claims=claims,
-            key=settings.secret_key,
-            algorithm=settings.jwt.algorithm,
-        )
-        return encoded_jwt
+        return get_jwt_codec().encode(claims)
 
     async def generate_access_token(
         self,
@@ -86,26 +79,24 @@ class JWTTokensMixin:
         return False
 
     async def get_decoded_token(self, jwt_token: str) -> dict | None:
-        return jwt.decode(
-            jwt_token,
-            settings.secret_key,
-            algorithms=[settings.jwt.algorithm],
-        )
+        """Claims of a token with a valid signature and exp, else None"""
+        return get_jwt_codec().decode(jwt_token)
 
-    async def check_token_exp_valid(self, decoded_token: dict) -> bool:
-        try:
-            exp = decoded_token["exp"]
-            current_time = datetime.datetime.now(datetime.UTC)
-            if current_time < datetime.datetime.fromtimestamp(
-                exp, datetime.UTC
-            ):
-                return True
-            else:
-                return False
-        except JWTError:
-            return False
-        except (Exception,):
-            return False
+    async def get_valid_token_data(
+        self,
+        jwt_token: str,
+        check_refresh: bool = False,
+        as_admin: bool = False,
+    ) -> dict | None:
+        """Claims of a valid token of the requested kind, decoded once"""
+        decoded_token = await self.get_decoded_token(jwt_token)
+        if decoded_token is None:
+            return None
+        if check_refresh and not decoded_token.get("refresh"):
+            return None
+        if as_admin and not decoded_token.get("admin"):
+            return None
+        return decoded_token
 
     async def is_token_valid(
         self,
@@ -113,41 +104,19 @@ class JWTTokensMixin:
         check_refresh: bool = False,
         as_admin: bool = False,
     ) -> bool:
-        try:
-            decoded_token = await self.get_decoded_token(jwt_token)
-            token_exp_valid = await self.check_token_exp_valid(decoded_token)
-            if not token_exp_valid:
-                return False
-            if check_refresh and not decoded_token.get("refresh"):
-                return False
-            if as_admin and not decoded_token.get("admin"):
-                return False
-            return True
-        except JWTError:
-            return False
-        except (Exception,):
-            return False
+        return (
+            await self.get_valid_token_data(jwt_token, check_refresh, as_admin)
+            is not None
+        )
 
     async def get_jwt_token_data(
         self,
         jwt_token: str,
         check_bearer: bool = True,
     ) -> dict | None:
-        try:
-            if check_bearer:
-                if await self.is_token_valid_bearer(jwt_token):
-                    jwt_token = jwt_token.split("Bearer ")[1].strip()
-                else:
-                    return None
-            decoded_token = await self.get_decoded_token(jwt_token)
-            exp = decoded_token["exp"]
-            current_time = datetime.datetime.now(datetime.UTC)
-            if current_time < datetime.datetime.fromtimestamp(
-                exp,
-                datetime.UTC,
-            ):
-                return decoded_token
+        if check_bearer:
+            if await self.is_token_valid_bearer(jwt_token):
+                jwt_token = jwt_token.split(" ", 1)[1].strip()
             else:
                 return None
-        except JWTError:
-            return None
+        return await self.get_decoded_token(jwt_token)
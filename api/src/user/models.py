@@ -11,7 +11,7 @@ from sqlalchemy.dialects.postgresql import UUID, ENUM
 from ..core.db.base import Base
 from ..core.db.mixins import BaseModelMixin
 
-from ..utils.hashing import Hashing
+from ..utils.hashing import Hashing, HashedPassword
 
 from .enums import UserRole, AuthTokenType
 
@@ -49,8 +49,17 @@ class User(BaseModelMixin, Base):
     def is_admin(self):
         return self.role == UserRole.ADMIN
 
-    def check_password(self, password: str) -> bool:
-        return Hashing.verify_password(password, self.password)
+    async def verify_password(self, password: str) -> bool:
+        """
+        Check the password off the event loop. A hash made with outdated
+        cost parameters is replaced, the caller commits the new one.
+        """
+        verified, new_hash = await Hashing.verify_and_update_async(
+            password, self.password
+        )
+        if new_hash is not None:
+            self.password = HashedPassword(new_hash)
+        return verified
 
     def __str__(self) -> str:
         return f"User: {self.email}. Role: {self.role}"
@@ -93,6 +102,8 @@ class AuthToken(BaseModelMixin, Base):
 
 @event.listens_for(User.password, "set", retval=True)
 def hash_user_password_before_insert(target, value, oldvalue, initiator):
+    if isinstance(value, HashedPassword):
+        return str(value)
     if value != oldvalue:
         return Hashing.get_hashed_password(value)
     return value
@@ -31,9 +31,9 @@ from ..utils.exceptions.http.user import (
     UserByEmailAlreadyExistsException,
 )
 
+from ..utils.hashing import Hashing
 from ..utils.token import generate_token
 
-from .models import User, AuthToken
 from .schemas import (
     UserCreate,
     AdminUserCreate,
@@ -51,6 +51,7 @@ from .schemas import (
     UserPasswordResetConfirm,
     UserPasswordChange,
 )
+from .auth import USER_CACHE_TAG
 from .enums import AuthTokenType
 # ЗАКОМЕНТОВАНО: Celery tasks не працюють без worker
 # from .tasks import (
@@ -65,17 +66,7 @@ log = logging.getLogger(__name__)
 
 
 class AuthTokenService(BaseService):
-    async def get_show_scheme(self, obj: AuthToken) -> UserShow:
-        return AuthTokenShow(
-            id=obj.id,
-            token=obj.token,
-            token_type=obj.token_type,
-            owner_email=obj.owner_email,
-            owner_new_email=obj.owner_new_email,
-            expires_at=obj.expires_at,
-            created_at=obj.created_at,
-            updated_at=obj.updated_at,
-        )
+    show_schema = AuthTokenShow
 
     async def create_auth_token(self, data: AuthTokenCreate) -> AuthTokenShow:
         try:
@@ -94,18 +85,8 @@ class AuthTokenService(BaseService):
 class UserService(JWTTokensMixin, BaseService):
     list_schema = UserListSchema
     filter_processor = UserFilterProcessor
-
-    async def get_show_scheme(self, obj: User) -> UserShow:
-        return UserShow(
-            id=obj.id,
-            email=obj.email,
-            phone=obj.phone,
-            full_name=obj.full_name,
-            is_active=obj.is_active,
-            is_admin=obj.is_admin,
-            created_at=obj.created_at,
-            updated_at=obj.updated_at,
-        )
+    show_schema = UserShow
+    cache_tag = USER_CACHE_TAG
 
     async def create_user(
         self,
@@ -116,6 +97,13 @@ class UserService(JWTTokensMixin, BaseService):
             async with self.uow:
                 if await self.uow.user.exists_by_email(data.email):
                     raise UserByEmailAlreadyExistsException(data.email)
+                data = data.model_copy(
+                    update={
+                        "password": await Hashing.get_hashed_password_async(
+                            data.password
+                        )
+                    }
+                )
                 user = await self.uow.user.create(obj_in=data)
                 await self.uow.add(user)
                 if send_confirmation_email:
@@ -171,12 +159,14 @@ class UserService(JWTTokensMixin, BaseService):
                 user = await self.uow.user.get_by_email(data.email)
                 if not user:
                     raise UserNotFoundByEmailException(data.email)
-                if not user.check_password(data.password):
+                if not await user.verify_password(data.password):
                     raise UserInvalidPasswordException(data.email)
                 if not user.is_active:
                     raise UserInactiveException(data.email)
                 if as_admin and not user.is_admin:
                     raise UserIsNotAdminException(data.email)
+                # Saves the hash if it was made with outdated parameters
+                await self.uow.commit()
                 tokens = await self.generate_tokens_for_user(user.id, as_admin)
                 return JWTTokensSchema(**tokens)
         except SQLAlchemyError as e:
@@ -200,15 +190,13 @@ class UserService(JWTTokensMixin, BaseService):
         data: TokenVerifyOrRefreshSchema,
         as_admin: bool = False,
     ) -> bool:
-        token_valid = await self.is_token_valid(
+        token_data = await self.get_valid_token_data(
             data.token,
             as_admin=as_admin,
         )
-        if not token_valid:
-            return False
-        user_id = await self._user_id_from_jwt(data.token, check_bearer=False)
-        if not user_id:
+        if not token_data:
             return False
+        user_id = token_data["sub"]
         try:
             async with self.uow:
                 user = await self.uow.user.get_by_id(obj_id=user_id)
@@ -228,14 +216,14 @@ class UserService(JWTTokensMixin, BaseService):
         data: TokenVerifyOrRefreshSchema,
         as_admin: bool = False,
     ):
-        token_valid = await self.is_token_valid(
+        token_data = await self.get_valid_token_data(
             data.token,
             check_refresh=True,
             as_admin=as_admin,
         )
-        if not token_valid:
+        if not token_data:
             raise InvalidTokenException(data.token)
-        user_id = await self._user_id_from_jwt(data.token, check_bearer=False)
+        user_id = token_data["sub"]
         if not user_id:
             raise InvalidTokenUserException(data.token)
         try:
@@ -308,6 +296,7 @@ class UserService(JWTTokensMixin, BaseService):
                 if not user:
                     return False
                 await self.uow.user.delete_by_id(obj_id=user_id)
+                await self.invalidate_cache(user_id)
                 await self.uow.commit()
                 return True
         except SQLAlchemyError as e:
@@ -421,6 +410,7 @@ class UserService(JWTTokensMixin, BaseService):
                 user.email = token_obj.owner_new_email
                 await self.uow.add(user)
                 await self.uow.auth_token.delete_by_id(obj_id=token_obj.id)
+                await self.invalidate_cache(user.id)
                 await self.uow.commit()
                 return True
         except SQLAlchemyError as e:
@@ -474,7 +464,9 @@ class UserService(JWTTokensMixin, BaseService):
                 user = await self.uow.user.get_by_email(token_obj.owner_email)
                 if not user:
                     raise UserNotFoundByEmailException(token_obj.owner_email)
-                user.password = data.new_password
+                user.password = await Hashing.get_hashed_password_async(
+                    data.new_password
+                )
                 await self.uow.add(user)
                 await self.uow.auth_token.delete_by_id(obj_id=token_obj.id)
                 await self.uow.commit()
@@ -499,9 +491,13 @@ class UserService(JWTTokensMixin, BaseService):
                         raise UserNotFoundByIdException(user_id)
                     if not user.is_active:
                         raise UserInactiveException(user.email)
-                    if not user.check_password(data.old_password):
+                    if not await user.verify_password(data.old_password):
                         raise UserInvalidPasswordException(user.email)
-                    user.password = data.new_password
+                    user.password = (
+                        await Hashing.get_hashed_password_async(
+                            data.new_password
+                        )
+                    )
                     await self.uow.add(user)
                     await self.uow.commit()
                     return True
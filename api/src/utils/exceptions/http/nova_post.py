@@ -0,0 +1,17 @@
+from typing import Any, Optional
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+
+
+class NovaPostUnavailableException(HTTPException):
+    def __init__(
+        self,
+        detail: Any = "Nova Post API is unavailable",
+        headers: Optional[dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=detail,
+            headers=headers,
+        )
@@ -80,6 +80,19 @@ class UserIsNotAdminException(HTTPException):
         )
 
 
+class UserPermissionException(HTTPException):
+    def __init__(
+        self,
+        email: str,
+        headers: Optional[dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"User with email: {email} has no access to this resource",
+            headers=headers,
+        )
+
+
 class UserByEmailAlreadyExistsException(HTTPException):
     def __init__(
         self,
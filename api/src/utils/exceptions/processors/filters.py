@@ -27,6 +27,34 @@ class FilterInvalidColumnException(FilterException):
         super().__init__(f"Invalid column: {column} for {model.__label__}")
 
 
+class FilterInvalidSortException(FilterException):
+    def __init__(self, field: str):
+        super().__init__(f"Invalid sort field: {field}")
+
+
+class FilterUnsupportedOperatorException(FilterException):
+    def __init__(self, operator: str, column: str):
+        super().__init__(f"Operator {operator} is not supported for {column}")
+
+
+class FilterInvalidGroupException(FilterException):
+    def __init__(self):
+        super().__init__(
+            "Filter group must have one of the keys and, or, not "
+            "with a non-empty list of filters"
+        )
+
+
+class FilterDepthException(FilterException):
+    def __init__(self, max_depth: int):
+        super().__init__(f"Filter groups can be nested {max_depth} deep")
+
+
+class FilterInvalidValueException(FilterException):
+    def __init__(self, column: str, value):
+        super().__init__(f"Invalid value: {value} for {column}")
+
+
 class FilterRangeListSizeException(FilterException):
     def __init__(self):
         super().__init__("Filter range length must be 2")
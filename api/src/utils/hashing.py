@@ -1,7 +1,13 @@
+import asyncio
 import logging
 
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 
+from ..core.config import settings
+
 # Set logging level for passlib to silence the warnings
 # related with bcrypt versions from `4.0.1` to `4.1.1`
 # https://foss.heptapod.net/python-libs/passlib/-/issues/190
@@ -9,7 +15,47 @@ from passlib.context import CryptContext
 logging.getLogger("passlib").setLevel(logging.ERROR)
 
 
-hash_content = CryptContext(schemes=["bcrypt"])
+# Hashes made with other rounds need an update, see `verify_and_update`
+hash_content = CryptContext(
+    schemes=["bcrypt"],
+    bcrypt__default_rounds=settings.hashing.bcrypt_rounds,
+    bcrypt__min_rounds=settings.hashing.bcrypt_rounds,
+    bcrypt__max_rounds=settings.hashing.bcrypt_rounds,
+)
+
+
+class HashedPassword(str):
+    """Password hash made in advance, the user model stores it as is"""
+
+
+_hashing_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_hashing_executor() -> ThreadPoolExecutor:
+    """
+    Pool the async hashing methods run in. bcrypt releases the GIL,
+    so threads hash in parallel; the pool size caps how many CPU cores
+    logins can take from the process.
+    """
+    global _hashing_executor
+    if _hashing_executor is None:
+        _hashing_executor = ThreadPoolExecutor(
+            max_workers=settings.hashing.max_workers,
+            thread_name_prefix="hashing",
+        )
+    return _hashing_executor
+
+
+def shutdown_hashing_executor() -> None:
+    global _hashing_executor
+    if _hashing_executor is not None:
+        _hashing_executor.shutdown(wait=True, cancel_futures=True)
+    _hashing_executor = None
+
+
+async def _run_in_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), func, *args)
 
 
 class Hashing:
@@ -24,3 +70,38 @@ class Hashing:
     def get_hashed_password(password: str) -> str:
         """Generate a hash for a given password."""
         return hash_content.hash(password)
+
+    @staticmethod
+    def verify_and_update(
+        password: str, hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        """
+        Verify a password and return a new hash for it when the given
+        one was made with outdated cost parameters.
+        """
+        return hash_content.verify_and_update(password, hashed_password)
+
+    @staticmethod
+    async def verify_password_async(
+        password: str, hashed_password: str
+    ) -> bool:
+        """`verify_password` in the hashing pool, off the event loop."""
+        return await _run_in_executor(
+            Hashing.verify_password, password, hashed_password
+        )
+
+    @staticmethod
+    async def get_hashed_password_async(password: str) -> HashedPassword:
+        """`get_hashed_password` in the hashing pool, off the event loop."""
+        return HashedPassword(
+            await _run_in_executor(Hashing.get_hashed_password, password)
+        )
+
+    @staticmethod
+    async def verify_and_update_async(
+        password: str, hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        """`verify_and_update` in the hashing pool, off the event loop."""
+        return await _run_in_executor(
+            Hashing.verify_and_update, password, hashed_password
+        )
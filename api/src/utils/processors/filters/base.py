@@ -1,17 +1,182 @@
+import functools
+
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum as PyEnum
+from typing import Any, Hashable, Optional
 
-from sqlalchemy import Enum
-from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy import Enum, String, and_, or_, not_, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
 
-from .enums import FilterOperator
+from .enums import FilterOperator, FilterGroupOperator
+from .decoder import FiltersDecoder
 from ...exceptions.processors.filters import (
+    FilterDecoderException,
+    FilterDepthException,
     FilterLenListException,
     FilterInvalidColumnException,
+    FilterInvalidGroupException,
     FilterInvalidOperatorException,
+    FilterInvalidSortException,
+    FilterInvalidValueException,
     FilterRangeListSizeException,
+    FilterUnsupportedOperatorException,
 )
 
 
+# Compiled filter plans kept per process
+FILTER_PLAN_CACHE_SIZE = 512
+# How deep and/or/not groups can be nested
+FILTER_MAX_DEPTH = 5
+
+
+@dataclass(frozen=True)
+class SortPlan:
+    """ORDER BY of the client's `sort` and the joins it needs"""
+
+    order_by: tuple
+    # (related model, relationship attribute) pairs to outer join
+    joins: tuple = ()
+
+
+class FilterColumn:
+    """
+    Filterable model attribute and the enum its values are cast to.
+    Columns of related models keep the relationship they are reached by.
+    """
+
+    def __init__(
+        self,
+        model,
+        name: str,
+        enum_class: Optional[type[PyEnum]] = None,
+        column_type=None,
+        relationship=None,
+    ) -> None:
+        self.model = model
+        self.name = name
+        self.enum_class = enum_class
+        self.column_type = column_type
+        self.relationship = relationship
+
+    @property
+    def sortable(self) -> bool:
+        # A to-many path would repeat the parent rows
+        return not self.is_json and (
+            self.relationship is None or not self.relationship.uselist
+        )
+
+    @property
+    def is_string(self) -> bool:
+        return isinstance(self.column_type, String) and self.enum_class is None
+
+    @property
+    def is_json(self) -> bool:
+        return isinstance(self.column_type, JSONB)
+
+    @functools.cached_property
+    def attribute(self):
+        # Resolved on first use, hybrid expressions need configured mappers
+        return getattr(self.model, self.name)
+
+    def convert(self, value: Any) -> Any:
+        if self.enum_class is None:
+            return value
+        try:
+            if isinstance(value, list):
+                return [self.enum_class(item) for item in value]
+            return self.enum_class(value)
+        except ValueError:
+            raise FilterInvalidValueException(self.name, value)
+
+    def semi_join(self, criteria: list):
+        """
+        Parent rows having a related row that matches the criteria, as
+        `fk IN (SELECT ...)`. The subquery is uncorrelated, so Postgres
+        runs it once as a hashed semi-join, and a to-many path can't
+        repeat the parent rows.
+        """
+        ((local, remote),) = self.relationship.local_remote_pairs
+        subquery = select(remote).where(*criteria)
+        # NOT (fk IN ...) must stay true for parents without a related row
+        if remote.nullable:
+            subquery = subquery.where(remote.is_not(None))
+        if local.nullable:
+            return and_(local.is_not(None), local.in_(subquery))
+        return local.in_(subquery)
+
+
+def _get_filter_column(model, column, relationship=None) -> FilterColumn:
+    enum_class = (
+        column.type.enum_class if isinstance(column.type, Enum) else None
+    )
+    return FilterColumn(
+        model, column.key, enum_class, column.type, relationship
+    )
+
+
+def build_filter_columns(model) -> dict[str, FilterColumn]:
+    """Table columns and hybrid properties of the model by name"""
+    columns = {}
+    for column in model.__table__.columns:
+        columns[column.key] = _get_filter_column(model, column)
+    for klass in reversed(model.__mro__):
+        for name, value in vars(klass).items():
+            if isinstance(value, hybrid_property) and not name.startswith("_"):
+                columns[name] = FilterColumn(model, name)
+    return columns
+
+
+def build_relationship_column(
+    model,
+    relationships: tuple[str, ...],
+    path: str,
+) -> Optional[FilterColumn]:
+    """
+    Column of a related model by its dotted path, e.g. "category.priority".
+    Only the listed relationships with a single-column key are followed.
+    """
+    name, _, column_name = path.partition(".")
+    if name not in relationships:
+        return None
+    relationship = model.__mapper__.relationships.get(name)
+    if relationship is None or len(relationship.local_remote_pairs) != 1:
+        return None
+    target = relationship.mapper.class_
+    column = target.__table__.columns.get(column_name)
+    if column is None:
+        return None
+    return _get_filter_column(target, column, relationship)
+
+
+class FilterPlanCache:
+    """LRU of compiled filter criteria and sort plans"""
+
+    def __init__(self, maxsize: int = FILTER_PLAN_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._plans: OrderedDict[Hashable, tuple] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[tuple]:
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+        return plan
+
+    def set(self, key: Hashable, plan: tuple) -> None:
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        self._plans.clear()
+
+
+filter_plans = FilterPlanCache()
+
+
 class AbstractFilterProcessor(ABC):
     model = None
 
@@ -43,6 +208,14 @@ class AbstractFilterProcessor(ABC):
     async def process_value_less_than_or_equals(self, field: str, value: str):
         raise NotImplementedError
 
+    @abstractmethod
+    async def process_contains(self, field: str, value: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def process_json_contains(self, field: str, value: dict | list):
+        raise NotImplementedError
+
     @abstractmethod
     async def process_filters(self, filters: list):
         """
@@ -65,79 +238,228 @@ class AbstractFilterProcessor(ABC):
 
 
 class FilterProcessor(AbstractFilterProcessor):
+    # Built once per subclass when it's defined
+    columns: dict[str, FilterColumn] = {}
+    # Relationships whose columns can be filtered and sorted by
+    # dotted paths, e.g. "category.priority"
+    relationships: tuple[str, ...] = ()
+
+    operator_methods = {
+        FilterOperator.EQUALS.value: "process_equals",
+        FilterOperator.RANGE.value: "process_range",
+        FilterOperator.VALUE_IN.value: "process_value_in",
+        FilterOperator.VALUE_MORE_THAN.value: "process_value_more_than",
+        FilterOperator.VALUE_LESS_THAN.value: "process_value_less_than",
+        FilterOperator.VALUE_MORE_THAN_OR_EQUALS.value: (
+            "process_value_more_than_or_equals"
+        ),
+        FilterOperator.VALUE_LESS_THAN_OR_EQUALS.value: (
+            "process_value_less_than_or_equals"
+        ),
+        FilterOperator.CONTAINS.value: "process_contains",
+        FilterOperator.JSON_CONTAINS.value: "process_json_contains",
+    }
+    group_operators = {
+        FilterGroupOperator.AND.value: and_,
+        FilterGroupOperator.OR.value: or_,
+    }
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if cls.model is not None and "model" in vars(cls):
+            cls.columns = build_filter_columns(cls.model)
+
     def __init__(self) -> None:
         super().__init__()
 
+    @classmethod
+    def get_filter_column(cls, field: Any) -> Optional[FilterColumn]:
+        """
+        Column by name or dotted relationship path. Paths are resolved
+        on first use, when the mappers are configured.
+        """
+        if not isinstance(field, str):
+            return None
+        filter_column = cls.columns.get(field)
+        if filter_column is None and "." in field:
+            filter_column = build_relationship_column(
+                cls.model, cls.relationships, field
+            )
+            if filter_column is not None:
+                cls.columns[field] = filter_column
+        return filter_column
+
+    def get_attribute(self, field: str):
+        return self.columns[field].attribute
+
     async def process_equals(self, field: str, value: str):
-        print("process_equals")
-        print(field, value)
-        return [getattr(self.model, field) == value]
+        return [self.get_attribute(field) == value]
 
     async def process_range(self, field: str, range_values: list):
-        if len(range_values) != 2:
+        if not isinstance(range_values, list) or len(range_values) != 2:
             raise FilterRangeListSizeException()
-        return [getattr(self.model, field).between(*range_values)]
+        return [self.get_attribute(field).between(*range_values)]
 
     async def process_value_in(self, field: str, values: list):
-        print("process_value_in")
-        return [getattr(self.model, field).in_(values)]
+        return [self.get_attribute(field).in_(values)]
 
     async def process_value_more_than(self, field: str, value: str):
-        return [getattr(self.model, field) > value]
+        return [self.get_attribute(field) > value]
 
     async def process_value_less_than(self, field: str, value: str):
-        return [getattr(self.model, field) < value]
+        return [self.get_attribute(field) < value]
 
     async def process_value_more_than_or_equals(self, field: str, value: str):
-        return [getattr(self.model, field) >= value]
+        return [self.get_attribute(field) >= value]
 
     async def process_value_less_than_or_equals(self, field: str, value: str):
-        return [getattr(self.model, field) <= value]
+        return [self.get_attribute(field) <= value]
 
-    async def process_filters(self, filters: list):
+    async def process_contains(self, field: str, value: str):
+        """
+        Case-insensitive substring match. A plain ILIKE, so the pg_trgm
+        GIN indexes can serve it (lower() on the column would not).
+        """
+        if not self.columns[field].is_string:
+            raise FilterUnsupportedOperatorException(
+                FilterOperator.CONTAINS.value, field
+            )
+        if not isinstance(value, str) or not value:
+            raise FilterInvalidValueException(field, value)
+        escaped = (
+            value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        # Backslash is the default LIKE escape character in Postgres
+        return [self.get_attribute(field).ilike(f"%{escaped}%")]
+
+    async def process_json_contains(self, field: str, value: dict | list):
+        """JSONB containment (@>), served by a jsonb_path_ops GIN index"""
+        if not self.columns[field].is_json:
+            raise FilterUnsupportedOperatorException(
+                FilterOperator.JSON_CONTAINS.value, field
+            )
+        if not isinstance(value, (dict, list)):
+            raise FilterInvalidValueException(field, value)
+        return [self.get_attribute(field).contains(value)]
+
+    async def process_filters(self, filters: list | dict):
+        if isinstance(filters, dict):
+            filters = [filters]
+        if not isinstance(filters, list):
+            raise FilterDecoderException()
         filters_list = []
         for filter_lst in filters:
             filters_list.extend(await self.process_filter(filter_lst))
-        print(filters_list)
         return filters_list
 
-    async def __get_column_enum(self, column: str):
-        column = getattr(self.model, column)
-        if isinstance(column, InstrumentedAttribute) and isinstance(
-            column.property.columns[0].type,
-            Enum,
-        ):
-            return column.property.columns[0].type.enum_class
-        return None
-
-    async def process_filter(self, filter_lst: list):
-        if len(filter_lst) != 3:
+    async def process_group(self, group: dict, depth: int = 1):
+        """
+        {"and": [...]}, {"or": [...]} or {"not": filter or [...]},
+        members are filters or nested groups
+        """
+        if depth > FILTER_MAX_DEPTH:
+            raise FilterDepthException(FILTER_MAX_DEPTH)
+        if len(group) != 1:
+            raise FilterInvalidGroupException()
+        ((operator, members),) = group.items()
+        if operator == FilterGroupOperator.NOT.value:
+            if isinstance(members, dict) or (
+                isinstance(members, list)
+                and len(members) == 3
+                and isinstance(members[0], str)
+            ):
+                members = [members]
+            return [not_(and_(*await self._process_members(members, depth)))]
+        combine = self.group_operators.get(operator)
+        if combine is None:
+            raise FilterInvalidGroupException()
+        return [combine(*await self._process_members(members, depth))]
+
+    async def _process_members(self, members: list, depth: int) -> list:
+        if not isinstance(members, list) or not members:
+            raise FilterInvalidGroupException()
+        criteria = []
+        for member in members:
+            member_criteria = await self.process_filter(member, depth)
+            criteria.append(
+                member_criteria[0]
+                if len(member_criteria) == 1
+                else and_(*member_criteria)
+            )
+        return criteria
+
+    async def compile_filters(self, filters_decoder: FiltersDecoder) -> list:
+        """
+        Criteria of the client's encoded filters. Plans are cached by
+        the encoded string, so repeated queries skip decoding and
+        validation. Clause elements are immutable and safe to reuse.
+        """
+        key = (type(self), filters_decoder.encoded_filters)
+        plan = filter_plans.get(key)
+        if plan is None:
+            plan = tuple(
+                await self.process_filters(filters_decoder.decoded_filters)
+            )
+            filter_plans.set(key, plan)
+        return list(plan)
+
+    async def compile_sort(self, sort: str) -> SortPlan:
+        """
+        ORDER BY of a comma-separated list of fields, "-" in front
+        of a field sorts it descending: "category.priority,-price".
+        Related columns are reachable only through to-one relationships,
+        which are outer joined.
+        """
+        key = (type(self), "sort", sort)
+        plan = filter_plans.get(key)
+        if plan is not None:
+            return plan
+        order_by = []
+        joins = []
+        for item in sort.split(","):
+            field = item.strip()
+            descending = field.startswith("-")
+            field = field.removeprefix("-")
+            filter_column = self.get_filter_column(field)
+            if filter_column is None or not filter_column.sortable:
+                raise FilterInvalidSortException(field)
+            attribute = filter_column.attribute
+            order_by.append(
+                attribute.desc() if descending else attribute.asc()
+            )
+            if filter_column.relationship is not None:
+                join = (
+                    filter_column.model,
+                    getattr(self.model, filter_column.relationship.key),
+                )
+                if join not in joins:
+                    joins.append(join)
+        plan = SortPlan(order_by=tuple(order_by), joins=tuple(joins))
+        filter_plans.set(key, plan)
+        return plan
+
+    async def process_filter(self, filter_lst: list | dict, depth: int = 0):
+        if isinstance(filter_lst, dict):
+            return await self.process_group(filter_lst, depth + 1)
+        if not isinstance(filter_lst, list) or len(filter_lst) != 3:
             raise FilterLenListException()
 
         column, operator, value = filter_lst
 
-        if not hasattr(self.model, column):
+        filter_column = self.get_filter_column(column)
+        if filter_column is None:
             raise FilterInvalidColumnException(column, self.model)
-        if operator not in FilterOperator.values():
+        method = (
+            self.operator_methods.get(operator)
+            if isinstance(operator, str)
+            else None
+        )
+        if method is None:
             raise FilterInvalidOperatorException(operator)
 
-        enum_class = await self.__get_column_enum(column)
-        if enum_class:
-            value = enum_class(value)
-
-        print(column, operator, value)
-
-        if operator == FilterOperator.EQUALS:
-            return await self.process_equals(column, value)
-        elif operator == FilterOperator.RANGE:
-            return await self.process_range(column, value)
-        elif operator == FilterOperator.VALUE_IN:
-            return await self.process_value_in(column, value)
-        elif operator == FilterOperator.VALUE_MORE_THAN:
-            return await self.process_value_more_than(column, value)
-        elif operator == FilterOperator.VALUE_LESS_THAN:
-            return await self.process_value_less_than(column, value)
-        elif operator == FilterOperator.VALUE_MORE_THAN_OR_EQUALS:
-            return await self.process_value_more_than_or_equals(column, value)
-        elif operator == FilterOperator.VALUE_LESS_THAN_OR_EQUALS:
-            return await self.process_value_less_than_or_equals(column, value)
+        criteria = await getattr(self, method)(
+            column, filter_column.convert(value)
+        )
+        if filter_column.relationship is not None:
+            return [filter_column.semi_join(criteria)]
+        return criteria
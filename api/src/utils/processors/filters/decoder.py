@@ -1,22 +1,34 @@
 import json
 import base64
+import functools
 
 from ...exceptions.processors.filters import (
     FilterDecoderException,
 )
 
 
+# Decoded filters kept per process, catalog pages repeat the same ones
+DECODED_FILTERS_CACHE_SIZE = 512
+
+
 class FiltersDecoder:
-    def __init__(self, encoded_filters: str = None) -> None:
+    def __init__(self, encoded_filters: str = None, sort: str = None) -> None:
         self.encoded_filters = encoded_filters
-        if self.encoded_filters:
-            self.decoded_filters = self.decode_custom_encoded_filters(
-                self.encoded_filters,
-            )
-        else:
-            self.decoded_filters = None
+        # Comma-separated fields, "-" in front sorts descending
+        self.sort = sort
+
+    @property
+    def decoded_filters(self):
+        """
+        Decoded on first access. The result is shared between
+        requests with the same filters and must not be modified.
+        """
+        if not self.encoded_filters:
+            return None
+        return self.decode_custom_encoded_filters(self.encoded_filters)
 
     @staticmethod
+    @functools.lru_cache(maxsize=DECODED_FILTERS_CACHE_SIZE)
     def decode_custom_encoded_filters(encoded_filters: str) -> dict:
         try:
             decoded_custom_encoded_filters = (
@@ -30,4 +42,4 @@ class FiltersDecoder:
             decoded_filters_dict = json.loads(decoded_filters_json)
             return decoded_filters_dict
         except Exception:
-            FilterDecoderException()
+            raise FilterDecoderException()
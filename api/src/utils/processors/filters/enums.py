@@ -9,3 +9,11 @@ class FilterOperator(BaseEnum):
     VALUE_LESS_THAN = "<"
     VALUE_MORE_THAN_OR_EQUALS = ">="
     VALUE_LESS_THAN_OR_EQUALS = "<="
+    CONTAINS = "ilike"
+    JSON_CONTAINS = "@>"
+
+
+class FilterGroupOperator(BaseEnum):
+    AND = "and"
+    OR = "or"
+    NOT = "not"
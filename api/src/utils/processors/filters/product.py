@@ -14,17 +14,26 @@ from ....product.models import (
 
 class ProductFilterProcessor(FilterProcessor):
     model = Product
+    relationships = ("category", "covering", "photos")
 
     async def process_equals(self, field: str, value: str):
-        field_attr = getattr(self.model, field)
+        field_attr = self.get_attribute(field)
         if field == "have_glass":
+            # Products of categories without glass match either value
+            glass_available = self.get_filter_column(
+                "category.is_glass_available"
+            )
             return [
                 or_(
                     and_(
                         field_attr == value,
-                        self.model.category.has(is_glass_available=True),
+                        glass_available.semi_join(
+                            [Category.is_glass_available.is_(True)]
+                        ),
+                    ),
+                    glass_available.semi_join(
+                        [Category.is_glass_available.is_(False)]
                     ),
-                    self.model.category.has(is_glass_available=False),
                 )
             ]
         return [field_attr == value]
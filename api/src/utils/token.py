@@ -1,6 +1,72 @@
 import os
 import binascii
 
+from typing import Optional
+
+import jwt
+
+from ..core.config import settings
+
 
 def generate_token() -> str:
     return binascii.hexlify(os.urandom(20)).decode()
+
+
+class JWTCodec:
+    """
+    Signs and verifies JWTs with one key and algorithm, both resolved
+    when the codec is created instead of on every call. Only tokens
+    signed with that algorithm are accepted.
+    """
+
+    def __init__(
+        self,
+        key: Optional[str] = None,
+        algorithm: Optional[str] = None,
+    ) -> None:
+        self.algorithm = algorithm or settings.jwt.algorithm
+        self._signing_key = jwt.get_algorithm_by_name(
+            self.algorithm
+        ).prepare_key(key or settings.secret_key)
+        # Asymmetric algorithms verify with the public half
+        public_key = getattr(self._signing_key, "public_key", None)
+        self._verifying_key = (
+            public_key() if callable(public_key) else self._signing_key
+        )
+        self._jwt = jwt.PyJWT(options={"require": ["exp", "sub"]})
+
+    def encode(self, claims: dict) -> str:
+        return self._jwt.encode(
+            claims, self._signing_key, algorithm=self.algorithm
+        )
+
+    def decode(self, token: str) -> Optional[dict]:
+        """Claims of a token with a valid signature and exp, else None"""
+        try:
+            return self._jwt.decode(
+                token, self._verifying_key, algorithms=[self.algorithm]
+            )
+        except jwt.PyJWTError:
+            return None
+
+
+_jwt_codec: Optional[JWTCodec] = None
+
+
+def init_jwt_codec(**kwargs) -> JWTCodec:
+    """
+    Create the process-wide codec, so a bad key or algorithm fails
+    at startup. Safe to call more than once.
+    """
+    global _jwt_codec
+    if _jwt_codec is None:
+        _jwt_codec = JWTCodec(**kwargs)
+    return _jwt_codec
+
+
+def get_jwt_codec() -> JWTCodec:
+    """
+    Return the shared codec, creating it on first use
+    (scripts and Celery workers don't go through the app lifespan).
+    """
+    return init_jwt_codec()